@@ -0,0 +1,118 @@
+"""Scheduled background jobs.
+
+Keeps the trade snapshot and tracked people's sentiment fresh, and warms
+the per-person trade, holdings and price caches for everyone in a
+portfolio, so the first dashboard view doesn't pay for the downloads.
+Price history is backfilled to each traded ticker's first transaction, so
+holdings and trade analytics have entry closes to mark against.
+"""
+import asyncio
+import os
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+
+from .database import AsyncSessionLocal
+from .models import PortfolioPerson
+from .routers import sentiment, trades
+from .services import prices
+from .services.scheduler import JobScheduler
+
+# Jobs running at once; the rest wait for a slot
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "2"))
+
+PREWARM_INTERVAL = timedelta(minutes=int(os.getenv("PREWARM_MINUTES", "15")))
+# Lets the trade refresh at startup take its slot first
+PREWARM_DELAY = timedelta(seconds=10)
+# The chart widget's default period
+PREWARM_PRICE_PERIOD = "1mo"
+PREWARM_PRICE_CONCURRENCY = 4
+
+BACKFILL_INTERVAL = timedelta(minutes=int(os.getenv("PRICE_BACKFILL_MINUTES", "30")))
+# After the trade refresh and the first pre-warm
+BACKFILL_DELAY = timedelta(seconds=30)
+# Tickers fetched per run; the rest wait for the next one
+BACKFILL_BATCH = int(os.getenv("PRICE_BACKFILL_BATCH", "100"))
+
+scheduler = JobScheduler(concurrency=JOB_CONCURRENCY, name="jobs")
+
+
+def _enabled(variable: str) -> bool:
+    return os.getenv(variable, "true").lower() in ("1", "true", "yes")
+
+
+def start() -> None:
+    """Register the enabled jobs and start running them"""
+    if _enabled("TRADES_BACKGROUND_REFRESH"):
+        scheduler.add("trades", trades.refresh_trades, trades.CACHE_DURATION)
+    if _enabled("SENTIMENT_BACKGROUND_REFRESH"):
+        scheduler.add(
+            "sentiment", sentiment.refresh_tracked, sentiment.SENTIMENT_REFRESH_INTERVAL,
+            timeout=sentiment.SENTIMENT_REFRESH_INTERVAL,
+        )
+    if _enabled("PREWARM_JOBS"):
+        scheduler.add("prewarm", prewarm_people, PREWARM_INTERVAL, timeout=PREWARM_INTERVAL, initial_delay=PREWARM_DELAY)
+    if _enabled("PRICE_BACKFILL"):
+        scheduler.add(
+            "price_backfill", backfill_prices, BACKFILL_INTERVAL, timeout=BACKFILL_INTERVAL, initial_delay=BACKFILL_DELAY
+        )
+    scheduler.start()
+
+
+async def stop() -> None:
+    await scheduler.stop()
+
+
+async def tracked_people() -> Dict[str, Optional[str]]:
+    """Distinct politicians across all portfolios, name to stored identifier"""
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(PortfolioPerson.name, PortfolioPerson.identifier).where(PortfolioPerson.type == "politician")
+        )
+    people: Dict[str, Optional[str]] = {}
+    for name, identifier in rows:
+        if name and not people.get(name):
+            people[name] = identifier
+    return people
+
+
+async def prewarm_people() -> None:
+    """Trade and holdings responses, then held tickers' prices, for tracked people"""
+    people = await tracked_people()
+    if not people:
+        return
+    tickers = await trades.warm_people(people)
+    await _warm_prices(sorted(t for t in tickers if t and t != "--"))
+
+
+async def _warm_prices(symbols: List[str]) -> None:
+    await _fetch_prices(symbols, lambda symbol: prices.get_bars(symbol, PREWARM_PRICE_PERIOD), "warming")
+
+
+async def backfill_prices() -> None:
+    """Bars back to each traded ticker's first transaction, then reprice the snapshot"""
+    starts = await trades.backfill_starts(await tracked_people())
+    symbols = (await asyncio.to_thread(prices.uncovered, starts))[:BACKFILL_BATCH]
+    if symbols:
+        await _fetch_prices(
+            symbols, lambda symbol: asyncio.to_thread(prices.load_bars, symbol, starts[symbol]), "backfilling"
+        )
+    # Also picks up bars other jobs and requests stored since the last build
+    await trades.reprice_trades()
+
+
+async def _fetch_prices(symbols: List[str], fetch: Callable[[str], Awaitable], action: str) -> None:
+    semaphore = asyncio.Semaphore(PREWARM_PRICE_CONCURRENCY)
+
+    async def run(symbol: str) -> None:
+        async with semaphore:
+            await fetch(symbol)
+
+    results = await asyncio.gather(*(run(symbol) for symbol in symbols), return_exceptions=True)
+    errors = [(symbol, e) for symbol, e in zip(symbols, results) if isinstance(e, Exception)]
+    if errors and len(errors) == len(symbols):
+        # Nothing could be fetched (e.g. provider down), so back off
+        raise RuntimeError(f"No prices for {len(errors)} symbols: {errors[0][1]}")
+    for symbol, e in errors:
+        print(f"Error {action} prices for {symbol}: {e}")
@@ -1,12 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import init_db
-from .routers import portfolios, sentiment, trades
+from . import jobs
+from .database import async_engine, init_db
+from .routers import admin, portfolios, sentiment, trades
+from .services.http import http_clients
+from .services.responses import CompressionMiddleware, FastJSONResponse
 
 app = FastAPI(
     title="Portfolio Tracker API",
     description="Track politicians and hedge fund managers with sentiment analysis",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware
@@ -16,16 +20,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Rows-Changed"],
 )
 
+# Brotli (if installed) or gzip for large payloads like trade lists and price history
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(portfolios.router, prefix="/api/portfolios", tags=["portfolios"])
 app.include_router(sentiment.router, prefix="/api/sentiment", tags=["sentiment"])
 app.include_router(trades.router, prefix="/api/trades", tags=["trades"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 @app.on_event("startup")
 async def startup():
     init_db()
+    await trades.load_persisted_trades()
+    # Trade and sentiment refreshes plus cache pre-warming, each toggled by env
+    jobs.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    trades.close_streams()
+    await jobs.stop()
+    await trades.cancel_refresh()
+    await sentiment.cancel_refreshes()
+    await http_clients.close()
+    await async_engine.dispose()
 
 @app.get("/")
 async def root():
@@ -33,4 +55,4 @@ async def root():
 
 @app.get("/api/health")
 async def health():
-    return {"status": "healthy"}
+    return {"status": "healthy", "upstreams": http_clients.metrics()}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, JSON, Boolean, Index, Float
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -13,6 +13,8 @@ class Portfolio(Base):
     data_sources = Column(JSON, default=list)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped on every write to the portfolio, its people or its widgets
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
 
     people = relationship("PortfolioPerson", back_populates="portfolio", cascade="all, delete-orphan")
     widgets = relationship("WidgetLayout", back_populates="portfolio", cascade="all, delete-orphan")
@@ -44,3 +46,113 @@ class WidgetLayout(Base):
     h = Column(Integer, default=3)
 
     portfolio = relationship("Portfolio", back_populates="widgets")
+
+
+class Representative(Base):
+    __tablename__ = "representatives"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), nullable=False, unique=True)  # As disclosed
+    name_normalized = Column(String(255), nullable=False, index=True)
+    district = Column(String(20), nullable=True)
+
+    trades = relationship("Trade", back_populates="representative")
+
+
+class Ticker(Base):
+    __tablename__ = "tickers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String(20), nullable=False, unique=True)
+
+    trades = relationship("Trade", back_populates="ticker")
+
+
+class Trade(Base):
+    __tablename__ = "trades"
+
+    id = Column(Integer, primary_key=True, index=True)
+    trade_hash = Column(String(40), nullable=False, unique=True)  # Stable identity across refreshes
+    content_hash = Column(String(40), nullable=False)  # Detects upstream edits
+    position = Column(Integer, nullable=False, index=True)  # Upstream dump order when first ingested
+    representative_id = Column(Integer, ForeignKey("representatives.id"), nullable=False, index=True)
+    ticker_id = Column(Integer, ForeignKey("tickers.id"), nullable=True, index=True)
+    transaction_date = Column(String(10), nullable=True, index=True)
+    disclosure_date = Column(String(10), nullable=True, index=True)
+    disclosure_year = Column(Integer, nullable=True)
+    type = Column(String(50), nullable=True)
+    amount = Column(String(100), nullable=True)
+    amount_low = Column(Float, nullable=True)  # Parsed bounds of the disclosed range
+    amount_high = Column(Float, nullable=True)
+    owner = Column(String(50), nullable=True)
+    asset_description = Column(Text, nullable=True)
+    ptr_link = Column(String(500), nullable=True)
+    cap_gains_over_200_usd = Column(Boolean, nullable=True)
+
+    representative = relationship("Representative", back_populates="trades")
+    ticker = relationship("Ticker", back_populates="trades")
+
+    __table_args__ = (
+        Index("ix_trades_representative_transaction_date", "representative_id", "transaction_date"),
+    )
+
+
+class SentimentObservation(Base):
+    __tablename__ = "sentiment_observations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    query = Column(String(255), nullable=False)  # Normalized person/topic
+    observed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    overall = Column(Integer, nullable=False)
+    mentions = Column(Integer, nullable=False, default=0)
+    result = Column(JSON, nullable=False)  # Full get_sentiment payload
+
+    __table_args__ = (
+        Index("ix_sentiment_observations_query_observed_at", "query", "observed_at"),
+    )
+
+
+class SentimentAggregate(Base):
+    """Rolling aggregates per query, updated incrementally on each observation"""
+    __tablename__ = "sentiment_aggregates"
+
+    query = Column(String(255), primary_key=True)
+    observation_count = Column(Integer, nullable=False, default=0)
+    first_observed_at = Column(DateTime, nullable=False)
+    last_observed_at = Column(DateTime, nullable=False)
+    last_result = Column(JSON, nullable=False)
+    # Time-decayed EMAs of the overall score and decayed observation counts
+    ema_1h = Column(Float, nullable=False)
+    ema_24h = Column(Float, nullable=False)
+    ema_7d = Column(Float, nullable=False)
+    count_1h = Column(Float, nullable=False, default=0)
+    count_24h = Column(Float, nullable=False, default=0)
+    count_7d = Column(Float, nullable=False, default=0)
+
+
+class PriceBar(Base):
+    """Daily OHLCV bar for a symbol"""
+    __tablename__ = "price_bars"
+
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String(20), nullable=False)
+    date = Column(String(10), nullable=False)  # YYYY-MM-DD
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    volume = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_price_bars_symbol_date", "symbol", "date", unique=True),
+    )
+
+
+class PriceCoverage(Base):
+    """Date range already fetched for a symbol, so only gaps are requested"""
+    __tablename__ = "price_coverage"
+
+    symbol = Column(String(20), primary_key=True)
+    first_date = Column(String(10), nullable=False)
+    last_date = Column(String(10), nullable=False)
+    checked_at = Column(DateTime, nullable=False)
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException
+from .. import jobs
+
+router = APIRouter()
+
+
+@router.get("/jobs")
+async def get_jobs():
+    """Scheduled jobs with run timings, failures and next run times"""
+    return jobs.scheduler.status()
+
+
+@router.post("/jobs/{name}/run", status_code=202)
+async def run_job(name: str):
+    """Run a job now instead of at its next scheduled time"""
+    job = jobs.scheduler.jobs.get(name)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.task is None or job.task.done():
+        raise HTTPException(status_code=409, detail="Job isn't scheduled")
+    return jobs.scheduler.trigger(name).status()
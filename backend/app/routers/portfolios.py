@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional, Set
 from pydantic import BaseModel
-from ..database import get_db
+from ..database import get_async_db
 from ..models import Portfolio, PortfolioPerson, WidgetLayout
+from ..services import sentiment_history
+from ..services.responses import FastJSONResponse, cache_headers, etag, is_not_modified, not_modified
+from . import sentiment, trades
+import asyncio
 import uuid
 
 router = APIRouter()
@@ -19,6 +25,7 @@ class PersonCreate(BaseModel):
 
 class WidgetCreate(BaseModel):
     widget_type: str
+    widget_id: Optional[str] = None
     x: int = 0
     y: int = 0
     w: int = 4
@@ -86,22 +93,133 @@ DEFAULT_WIDGET_LAYOUTS = {
 }
 
 
+PORTFOLIO_FIELDS = set(PortfolioResponse.model_fields)
+
+# Portfolios are user data: caches may keep them but must revalidate, which
+# costs a 304 until the portfolio's revision changes
+CACHE_CONTROL = "private, no-cache"
+
+# Response header reporting the rows a create or update wrote, e.g.
+# "people_inserted=2, people_deleted=2, widgets_inserted=0, widgets_deleted=0"
+ROWS_CHANGED_HEADER = "X-Rows-Changed"
+
+
 @router.get("/", response_model=List[PortfolioResponse])
-def get_portfolios(db: Session = Depends(get_db)):
-    portfolios = db.query(Portfolio).all()
-    return [_portfolio_to_response(p) for p in portfolios]
+async def get_portfolios(
+    request: Request,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List portfolios ordered by id.
+
+    Pass ``limit`` to page through them: when a page is full the
+    ``X-Next-Cursor`` header holds the ``after_id`` for the next one.
+    ``fields`` is a comma-separated projection; relationships that aren't
+    requested aren't loaded at all.
+    """
+    # Any create, update or delete changes one of these
+    version = (await db.execute(
+        select(func.count(), func.max(Portfolio.id), func.sum(Portfolio.revision), func.max(Portfolio.updated_at))
+    )).one()
+    tag = etag("portfolios", *version)
+    if is_not_modified(request, tag):
+        return not_modified(tag, CACHE_CONTROL)
+
+    selected = _parse_fields(fields)
+
+    # One query per relationship for the whole page instead of one per portfolio
+    query = select(Portfolio).order_by(Portfolio.id)
+    for relationship in ("people", "widgets"):
+        if selected is None or relationship in selected:
+            query = query.options(selectinload(getattr(Portfolio, relationship)))
+    if after_id is not None:
+        query = query.where(Portfolio.id > after_id)
+    if limit is not None:
+        query = query.limit(limit)
+    portfolios = (await db.scalars(query)).all()
+
+    headers = cache_headers(tag, CACHE_CONTROL)
+    if limit is not None and len(portfolios) == limit:
+        headers["X-Next-Cursor"] = str(portfolios[-1].id)
+
+    # Returned as a response so FastAPI doesn't revalidate dicts we just built
+    # against PortfolioResponse; the model still documents the shape
+    return FastJSONResponse([_portfolio_to_response(p, selected) for p in portfolios], headers=headers)
 
 
 @router.get("/{portfolio_id}", response_model=PortfolioResponse)
-def get_portfolio(portfolio_id: int, db: Session = Depends(get_db)):
-    portfolio = db.query(Portfolio).filter(Portfolio.id == portfolio_id).first()
+async def get_portfolio(request: Request, portfolio_id: int, db: AsyncSession = Depends(get_async_db)):
+    tag = await _portfolio_etag(db, portfolio_id)
+    if is_not_modified(request, tag):
+        return not_modified(tag, CACHE_CONTROL)
+    portfolio = await _load_portfolio(db, portfolio_id)
+    if not portfolio:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    return FastJSONResponse(_portfolio_to_response(portfolio), headers=cache_headers(tag, CACHE_CONTROL))
+
+
+@router.get("/{portfolio_id}/dashboard")
+async def get_portfolio_dashboard(
+    request: Request,
+    portfolio_id: int,
+    trade_limit: int = 20,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Trades, holdings and sentiment for everyone in a portfolio in one call"""
+    # Sentiment is read first so stale aggregates start refreshing even when
+    # the response turns out to be a 304
+    names = list(dict.fromkeys((await db.scalars(
+        select(PortfolioPerson.name).where(PortfolioPerson.portfolio_id == portfolio_id)
+    )).all()))
+    aggregates = await asyncio.gather(*(sentiment.get_sentiment_aggregate(name) for name in names))
+
+    # Versioned by the portfolio, the trade snapshot and each person's sentiment
+    sentiment_versions = sorted((a.query, a.last_observed_at, a.observation_count) for a in aggregates)
+    tag = await _portfolio_etag(db, portfolio_id, trade_limit, await trades.get_snapshot_version(), sentiment_versions)
+    if is_not_modified(request, tag):
+        return not_modified(tag, CACHE_CONTROL)
+
+    portfolio = await _load_portfolio(db, portfolio_id)
     if not portfolio:
         raise HTTPException(status_code=404, detail="Portfolio not found")
-    return _portfolio_to_response(portfolio)
+    response = _portfolio_to_response(portfolio)
+
+    people = {}
+    for person in portfolio.people:
+        people.setdefault(person.name, person.identifier)
+    summaries = await trades.get_people_summary(people, trade_limit=trade_limit)
+    sentiment_by_name = {name: sentiment_history.to_response(a) for name, a in zip(names, aggregates)}
+
+    return FastJSONResponse({
+        "portfolio": response,
+        "people": [
+            {
+                **person,
+                **summaries[person["name"]],
+                "sentiment": sentiment_by_name[person["name"]],
+            }
+            for person in response["people"]
+        ],
+    }, headers=cache_headers(tag, CACHE_CONTROL))
+
+
+@router.get("/{portfolio_id}/sectors")
+async def get_portfolio_sectors(request: Request, portfolio_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Combined sector exposure of everyone in a portfolio"""
+    tag = await _portfolio_etag(db, portfolio_id, await trades.get_snapshot_version())
+    if is_not_modified(request, tag):
+        return not_modified(tag, CACHE_CONTROL)
+    portfolio = await _load_portfolio(db, portfolio_id)
+    if not portfolio:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    exposure = await trades.get_sector_exposure({p.name: p.identifier for p in portfolio.people})
+    return FastJSONResponse(exposure, headers=cache_headers(tag, CACHE_CONTROL))
 
 
 @router.post("/", response_model=PortfolioResponse)
-def create_portfolio(portfolio_data: PortfolioCreate, db: Session = Depends(get_db)):
+async def create_portfolio(portfolio_data: PortfolioCreate, db: AsyncSession = Depends(get_async_db)):
     # Create portfolio
     portfolio = Portfolio(
         name=portfolio_data.name,
@@ -109,56 +227,27 @@ def create_portfolio(portfolio_data: PortfolioCreate, db: Session = Depends(get_
         data_sources=portfolio_data.data_sources
     )
     db.add(portfolio)
-    db.flush()  # Get the ID
-
-    # Add people
-    for person_data in portfolio_data.people:
-        person = PortfolioPerson(
-            portfolio_id=portfolio.id,
-            name=person_data.name,
-            type=person_data.type,
-            identifier=person_data.identifier,
-            image_url=person_data.image_url
-        )
-        db.add(person)
+    await db.flush()  # Get the ID
 
-    # Add widgets with automatic layout
-    x, y = 0, 0
-    max_row_height = 0
-    cols = 12  # Grid columns
+    # Add people and widgets, one executemany INSERT each
+    people = _person_rows(portfolio.id, portfolio_data.people)
+    if people:
+        await db.execute(insert(PortfolioPerson), people)
+    widgets = _widget_rows(portfolio.id, portfolio_data.widgets)
+    if widgets:
+        await db.execute(insert(WidgetLayout), widgets)
 
-    for widget_type in portfolio_data.widgets:
-        layout = DEFAULT_WIDGET_LAYOUTS.get(widget_type, {'w': 4, 'h': 3})
+    await db.commit()
 
-        # Check if widget fits in current row
-        if x + layout['w'] > cols:
-            x = 0
-            y += max_row_height
-            max_row_height = 0
-
-        widget = WidgetLayout(
-            portfolio_id=portfolio.id,
-            widget_id=f"{widget_type}-{uuid.uuid4().hex[:8]}",
-            widget_type=widget_type,
-            x=x,
-            y=y,
-            w=layout['w'],
-            h=layout['h']
-        )
-        db.add(widget)
-
-        x += layout['w']
-        max_row_height = max(max_row_height, layout['h'])
-
-    db.commit()
-    db.refresh(portfolio)
-
-    return _portfolio_to_response(portfolio)
+    return FastJSONResponse(
+        _portfolio_to_response(await _load_portfolio(db, portfolio.id, refresh=True)),
+        headers=_rows_changed(people_inserted=len(people), widgets_inserted=len(widgets)),
+    )
 
 
 @router.put("/{portfolio_id}", response_model=PortfolioResponse)
-def update_portfolio(portfolio_id: int, portfolio_data: PortfolioCreate, db: Session = Depends(get_db)):
-    portfolio = db.query(Portfolio).filter(Portfolio.id == portfolio_id).first()
+async def update_portfolio(portfolio_id: int, portfolio_data: PortfolioCreate, db: AsyncSession = Depends(get_async_db)):
+    portfolio = await _load_portfolio(db, portfolio_id)
     if not portfolio:
         raise HTTPException(status_code=404, detail="Portfolio not found")
 
@@ -166,72 +255,204 @@ def update_portfolio(portfolio_id: int, portfolio_data: PortfolioCreate, db: Ses
     portfolio.description = portfolio_data.description
     portfolio.data_sources = portfolio_data.data_sources
 
-    # Update people - remove old, add new
-    db.query(PortfolioPerson).filter(PortfolioPerson.portfolio_id == portfolio_id).delete()
-    for person_data in portfolio_data.people:
-        person = PortfolioPerson(
-            portfolio_id=portfolio.id,
-            name=person_data.name,
-            type=person_data.type,
-            identifier=person_data.identifier,
-            image_url=person_data.image_url
-        )
-        db.add(person)
-
-    db.commit()
-    db.refresh(portfolio)
-
-    return _portfolio_to_response(portfolio)
+    # Update people - remove old, add new, unless they're unchanged
+    people = _person_rows(portfolio.id, portfolio_data.people)
+    current = [
+        {"portfolio_id": p.portfolio_id, "name": p.name, "type": p.type,
+         "identifier": p.identifier, "image_url": p.image_url}
+        for p in portfolio.people
+    ]
+    people_changed = people != current
+    deleted = inserted = 0
+    if people_changed:
+        result = await db.execute(delete(PortfolioPerson).where(PortfolioPerson.portfolio_id == portfolio_id))
+        deleted = result.rowcount
+        if people:
+            await db.execute(insert(PortfolioPerson), people)
+            inserted = len(people)
+
+    if not people_changed and not db.is_modified(portfolio):
+        return FastJSONResponse(_portfolio_to_response(portfolio), headers=_rows_changed())
+
+    portfolio.revision += 1
+    await db.commit()
+
+    return FastJSONResponse(
+        _portfolio_to_response(await _load_portfolio(db, portfolio_id, refresh=True)),
+        headers=_rows_changed(people_inserted=inserted, people_deleted=deleted),
+    )
 
 
 @router.delete("/{portfolio_id}")
-def delete_portfolio(portfolio_id: int, db: Session = Depends(get_db)):
-    portfolio = db.query(Portfolio).filter(Portfolio.id == portfolio_id).first()
+async def delete_portfolio(portfolio_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Relationships are loaded up front so the ORM cascade can delete them
+    portfolio = await _load_portfolio(db, portfolio_id)
     if not portfolio:
         raise HTTPException(status_code=404, detail="Portfolio not found")
 
-    db.delete(portfolio)
-    db.commit()
+    deleted = {"people_deleted": len(portfolio.people), "widgets_deleted": len(portfolio.widgets)}
+    await db.delete(portfolio)
+    await db.commit()
 
-    return {"message": "Portfolio deleted successfully"}
+    return {"message": "Portfolio deleted successfully", **deleted}
 
 
 @router.put("/{portfolio_id}/widgets")
-def update_widget_layouts(
+async def update_widget_layouts(
     portfolio_id: int,
     widgets: List[WidgetCreate],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    portfolio = db.query(Portfolio).filter(Portfolio.id == portfolio_id).first()
-    if not portfolio:
+    """Save widget positions in one bulk UPDATE.
+
+    Widgets are matched on ``widget_id``; ``widget_type`` is only used for
+    requests without one, and only when the portfolio has a single widget of
+    that type. Rows whose layout didn't change aren't written, and nothing
+    is committed if no row changed.
+    """
+    if await db.scalar(select(Portfolio.id).where(Portfolio.id == portfolio_id)) is None:
         raise HTTPException(status_code=404, detail="Portfolio not found")
 
-    # Update widget positions
+    existing = (await db.execute(
+        select(WidgetLayout.id, WidgetLayout.widget_id, WidgetLayout.widget_type,
+               WidgetLayout.x, WidgetLayout.y, WidgetLayout.w, WidgetLayout.h)
+        .where(WidgetLayout.portfolio_id == portfolio_id)
+    )).all()
+    by_widget_id = {row.widget_id: row for row in existing}
+    by_type = {}
+    for row in existing:
+        by_type.setdefault(row.widget_type, []).append(row)
+
+    changes = {}
     for widget_data in widgets:
-        widget = db.query(WidgetLayout).filter(
-            WidgetLayout.portfolio_id == portfolio_id,
-            WidgetLayout.widget_type == widget_data.widget_type
-        ).first()
+        if widget_data.widget_id is not None:
+            row = by_widget_id.get(widget_data.widget_id)
+        else:
+            candidates = by_type.get(widget_data.widget_type, [])
+            row = candidates[0] if len(candidates) == 1 else None
+        if row is None:
+            continue
+
+        layout = {"x": widget_data.x, "y": widget_data.y, "w": widget_data.w, "h": widget_data.h}
+        if (row.x, row.y, row.w, row.h) != (layout["x"], layout["y"], layout["w"], layout["h"]):
+            changes[row.id] = {"id": row.id, **layout}
+
+    if changes:
+        await db.execute(update(WidgetLayout), list(changes.values()))
+        await db.execute(
+            update(Portfolio).where(Portfolio.id == portfolio_id).values(revision=Portfolio.revision + 1)
+        )
+        await db.commit()
+
+    return {"message": "Widget layouts updated", "updated": len(changes)}
+
+
+def _rows_changed(
+    people_inserted: int = 0, people_deleted: int = 0, widgets_inserted: int = 0, widgets_deleted: int = 0
+) -> dict:
+    counts = {
+        "people_inserted": people_inserted, "people_deleted": people_deleted,
+        "widgets_inserted": widgets_inserted, "widgets_deleted": widgets_deleted,
+    }
+    return {ROWS_CHANGED_HEADER: ", ".join(f"{name}={count}" for name, count in counts.items())}
+
+
+def _person_rows(portfolio_id: int, people: List[PersonCreate]) -> List[dict]:
+    # Politicians are resolved to representative IDs once here, so reads are
+    # keyed lookups instead of name matching
+    return [
+        {
+            "portfolio_id": portfolio_id,
+            "name": person_data.name,
+            "type": person_data.type,
+            "identifier": person_data.identifier or (
+                trades.resolve_identifier(person_data.name) if person_data.type == "politician" else None
+            ),
+            "image_url": person_data.image_url
+        }
+        for person_data in people
+    ]
+
+
+def _widget_rows(portfolio_id: int, widget_types: List[str]) -> List[dict]:
+    """Widgets with automatic layout, filling rows of the grid left to right"""
+    rows = []
+    x, y = 0, 0
+    max_row_height = 0
+    cols = 12  # Grid columns
+
+    for widget_type in widget_types:
+        layout = DEFAULT_WIDGET_LAYOUTS.get(widget_type, {'w': 4, 'h': 3})
+
+        # Check if widget fits in current row
+        if x + layout['w'] > cols:
+            x = 0
+            y += max_row_height
+            max_row_height = 0
+
+        rows.append({
+            "portfolio_id": portfolio_id,
+            "widget_id": f"{widget_type}-{uuid.uuid4().hex[:8]}",
+            "widget_type": widget_type,
+            "x": x,
+            "y": y,
+            "w": layout['w'],
+            "h": layout['h']
+        })
+
+        x += layout['w']
+        max_row_height = max(max_row_height, layout['h'])
+
+    return rows
 
-        if widget:
-            widget.x = widget_data.x
-            widget.y = widget_data.y
-            widget.w = widget_data.w
-            widget.h = widget_data.h
 
-    db.commit()
-    return {"message": "Widget layouts updated"}
+async def _portfolio_etag(db: AsyncSession, portfolio_id: int, *parts) -> str:
+    """ETag from the portfolio's revision, read without loading the portfolio"""
+    version = (await db.execute(
+        select(Portfolio.revision, Portfolio.updated_at).where(Portfolio.id == portfolio_id)
+    )).first()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    return etag("portfolio", portfolio_id, *version, *parts)
 
 
-def _portfolio_to_response(portfolio: Portfolio) -> dict:
-    return {
+async def _load_portfolio(db: AsyncSession, portfolio_id: int, refresh: bool = False) -> Optional[Portfolio]:
+    """Fetch a portfolio with its people and widgets in a fixed number of queries.
+
+    ``refresh`` reloads one already in the session, e.g. after a write.
+    """
+    query = (
+        select(Portfolio)
+        .options(selectinload(Portfolio.people), selectinload(Portfolio.widgets))
+        .where(Portfolio.id == portfolio_id)
+    )
+    if refresh:
+        query = query.execution_options(populate_existing=True)
+    return (await db.scalars(query)).first()
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[Set[str]]:
+    if fields is None:
+        return None
+    selected = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = selected - PORTFOLIO_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return selected | {"id"}
+
+
+def _portfolio_to_response(portfolio: Portfolio, fields: Optional[Set[str]] = None) -> dict:
+    response = {
         "id": portfolio.id,
         "name": portfolio.name,
         "description": portfolio.description,
         "data_sources": portfolio.data_sources or [],
         "created_at": portfolio.created_at.isoformat() if portfolio.created_at else None,
         "updated_at": portfolio.updated_at.isoformat() if portfolio.updated_at else None,
-        "people": [
+    }
+    # Only touch relationships that were asked for, so they never lazy-load
+    if fields is None or "people" in fields:
+        response["people"] = [
             {
                 "id": p.id,
                 "portfolio_id": p.portfolio_id,
@@ -241,8 +462,9 @@ def _portfolio_to_response(portfolio: Portfolio) -> dict:
                 "image_url": p.image_url
             }
             for p in portfolio.people
-        ],
-        "widgets": [
+        ]
+    if fields is None or "widgets" in fields:
+        response["widgets"] = [
             {
                 "id": w.id,
                 "portfolio_id": w.portfolio_id,
@@ -255,4 +477,6 @@ def _portfolio_to_response(portfolio: Portfolio) -> dict:
             }
             for w in portfolio.widgets
         ]
-    }
+    if fields is not None:
+        response = {k: v for k, v in response.items() if k in fields}
+    return response
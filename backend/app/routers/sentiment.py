@@ -1,62 +1,198 @@
-from fastapi import APIRouter, HTTPException
-from typing import Optional
-import httpx
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Awaitable, Callable, Dict, List
+from dataclasses import dataclass
 import feedparser
 from datetime import datetime, timedelta
 import asyncio
+import os
+import time
+from ..database import AsyncSessionLocal
+from ..models import SentimentAggregate
+from ..services import sentiment_history
+from ..services.cache import TTLCache
+from ..services.http import http_clients
+from ..services.responses import FastJSONResponse, cache_headers, etag, is_not_modified, not_modified
+from ..services.sentiment_scorer import label, score_texts, to_percent
 
 router = APIRouter()
 
+# Stored sentiment younger than this is served without scoring again; older
+# is served once more while a refresh runs in the background
+SENTIMENT_MAX_AGE = timedelta(minutes=int(os.getenv("SENTIMENT_MAX_AGE_MINUTES", "30")))
+
+# Tracked people (names in any portfolio) are re-scored on this interval, so
+# their reads never wait on upstream
+SENTIMENT_REFRESH_INTERVAL = timedelta(minutes=int(os.getenv("SENTIMENT_REFRESH_MINUTES", "15")))
+SENTIMENT_REFRESH_CONCURRENCY = 4
+
+_refreshing: Dict[str, asyncio.Task] = {}
+
+# Parsed Google News feeds per normalized query
+NEWS_CACHE_TTL = timedelta(minutes=10)
+_news_cache = TTLCache(maxsize=512, ttl=NEWS_CACHE_TTL.total_seconds(), name="google_news")
+
+# Headlines scored per query for the aggregate news score
+NEWS_SENTIMENT_LIMIT = 100
+
+# Stored sentiment changes at most once per refresh; ETags carry the time of
+# the last observation so revalidation is a 304 until the next one
+CACHE_CONTROL = "public, max-age=60"
 
-# Mock sentiment data for demo (will be replaced with real API calls)
-MOCK_SENTIMENT = {
-    "nancy pelosi": {"overall": 45, "reddit": 38, "news": 52, "trend": "up", "mentions": 1247},
-    "dan crenshaw": {"overall": 62, "reddit": 58, "news": 66, "trend": "up", "mentions": 892},
-    "warren buffett": {"overall": 78, "reddit": 82, "news": 74, "trend": "neutral", "mentions": 2341},
-    "ray dalio": {"overall": 55, "reddit": 48, "news": 62, "trend": "down", "mentions": 567},
-}
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters for the news cache"""
+    return _news_cache.metrics()
 
 
 @router.get("/{query}")
-async def get_sentiment(query: str):
-    """Get sentiment data for a person or topic"""
-    query_lower = query.lower()
+async def get_sentiment(request: Request, query: str):
+    """Get sentiment data for a person or topic.
+
+    Served from the stored aggregates; ``trend`` compares the 1h and 24h
+    EMAs. Only a query that has never been observed waits on live scoring.
+    """
+    aggregate = await get_sentiment_aggregate(query)
+    tag = _aggregate_etag(aggregate)
+    if is_not_modified(request, tag):
+        return not_modified(tag, CACHE_CONTROL)
+    return FastJSONResponse(sentiment_history.to_response(aggregate), headers=cache_headers(tag, CACHE_CONTROL))
+
+
+async def get_sentiment_aggregate(query: str) -> SentimentAggregate:
+    """Stored aggregate for a query, scoring it first if it was never observed"""
+    # Own session: the dashboard calls this for several people concurrently
+    async with AsyncSessionLocal() as db:
+        aggregate = await sentiment_history.get_aggregate(db, query)
+
+    if aggregate is None:
+        aggregate = await refresh_sentiment(query)
+    elif not sentiment_history.is_fresh(aggregate, SENTIMENT_MAX_AGE):
+        _start_refresh(query)
+    return aggregate
+
 
-    # Check mock data first
-    if query_lower in MOCK_SENTIMENT:
-        return MOCK_SENTIMENT[query_lower]
+def _aggregate_etag(aggregate: SentimentAggregate, *parts) -> str:
+    return etag("sentiment", aggregate.query, aggregate.last_observed_at, aggregate.observation_count, *parts)
 
-    # Try to fetch real sentiment (simplified for demo)
+
+async def refresh_sentiment(query: str) -> SentimentAggregate:
+    """Score a query live and record the observation"""
+    return await asyncio.shield(_start_refresh(query))
+
+
+def _start_refresh(query: str) -> asyncio.Task:
+    # One refresh per query at a time; concurrent callers share it
+    key = sentiment_history.normalize_query(query)
+    task = _refreshing.get(key)
+    if task is None:
+        task = _refreshing[key] = asyncio.create_task(_refresh(key))
+    return task
+
+
+async def _refresh(query: str) -> SentimentAggregate:
     try:
-        reddit_sentiment = await _get_reddit_sentiment(query)
-        news_sentiment = await _get_news_sentiment(query)
+        result = await _score_sentiment(query)
+        async with AsyncSessionLocal() as db:
+            if not result["mentions"]:
+                # Nothing was scored (e.g. every source failed): an outage
+                # isn't an observation, so history and the EMAs stay as they were
+                return await sentiment_history.get_aggregate(db, query) or sentiment_history.unrecorded(query, result)
+            return await sentiment_history.record(db, query, result)
+    finally:
+        _refreshing.pop(query, None)
 
-        overall = (reddit_sentiment + news_sentiment) // 2
 
-        return {
-            "overall": overall,
-            "reddit": reddit_sentiment,
-            "news": news_sentiment,
-            "trend": "up" if overall > 50 else "down" if overall < 40 else "neutral",
-            "mentions": 100  # Placeholder
-        }
-    except Exception:
-        # Return neutral sentiment on error
-        return {
-            "overall": 50,
-            "reddit": 50,
-            "news": 50,
-            "trend": "neutral",
-            "mentions": 0
+async def _score_sentiment(query: str) -> dict:
+    """Query all sources and combine their scores.
+
+    All sources are queried concurrently, each under its own deadline, so a
+    slow or failing source only drops out of the aggregate; ``sources``
+    reports what happened to each one. Scores are None rather than a
+    neutral 50 when there was nothing to score.
+    """
+    results = await asyncio.gather(*(
+        _run_source(name, source, query) for name, source in SENTIMENT_SOURCES.items()
+    ))
+
+    all_scores = []
+    sources = {}
+    for name, status, scores, elapsed in results:
+        all_scores.extend(scores)
+        sources[name] = {
+            "status": status,
+            "score": to_percent(scores),
+            "mentions": len(scores),
+            "latency_ms": round(elapsed * 1000, 1),
         }
+    # Listed so clients can tell "no client yet" from "nothing said"
+    for name in UNAVAILABLE_SOURCES:
+        sources[name] = {"status": "unavailable", "score": None, "mentions": 0, "latency_ms": None}
+
+    # No score (None) wherever nothing was scored: a failed, timed-out or
+    # unavailable source, and overall when no source produced anything
+    return {
+        "overall": to_percent(all_scores),
+        **{name: sources[name]["score"] for name in sources},
+        "mentions": len(all_scores),
+        "sources": sources
+    }
+
+
+async def refresh_tracked() -> None:
+    """Re-score every person that appears in a portfolio"""
+    async with AsyncSessionLocal() as db:
+        queries = await sentiment_history.tracked_queries(db)
+
+    semaphore = asyncio.Semaphore(SENTIMENT_REFRESH_CONCURRENCY)
+
+    async def refresh_one(query: str) -> None:
+        async with semaphore:
+            try:
+                await refresh_sentiment(query)
+            except Exception as e:
+                print(f"Error refreshing sentiment for {query}: {e}")
+
+    await asyncio.gather(*(refresh_one(query) for query in queries))
+
+
+async def cancel_refreshes() -> None:
+    """Cancel scoring in progress, e.g. on shutdown"""
+    for task in list(_refreshing.values()):
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+async def _run_source(name: str, source: "SentimentSource", query: str):
+    started = time.monotonic()
+    try:
+        scores = await asyncio.wait_for(source.fetch(query), source.timeout)
+        status = "ok"
+    except asyncio.TimeoutError:
+        scores, status = [], "timeout"
+    except Exception as e:
+        print(f"Error fetching {name} sentiment: {e}")
+        scores, status = [], "error"
+    return name, status, scores, time.monotonic() - started
 
 
 @router.get("/reddit/{query}")
 async def get_reddit_posts(query: str, limit: int = 10):
     """Get Reddit posts mentioning the query"""
+    posts = _mock_reddit_posts(query)[:limit]
+    for post, score in zip(posts, score_texts([p["title"] for p in posts])):
+        post["sentiment"] = label(score)
+    return posts
+
+
+def _mock_reddit_posts(query: str) -> list:
     # For demo, return mock data
     # In production, use PRAW (Python Reddit API Wrapper)
-    mock_posts = [
+    return [
         {
             "id": "abc123",
             "title": f"Discussion about {query}'s latest trades",
@@ -92,8 +228,6 @@ async def get_reddit_posts(query: str, limit: int = 10):
         }
     ]
 
-    return mock_posts[:limit]
-
 
 @router.get("/news/{query}")
 async def get_news(query: str, limit: int = 10):
@@ -140,38 +274,92 @@ async def get_news(query: str, limit: int = 10):
     return mock_news[:limit]
 
 
-async def _get_reddit_sentiment(query: str) -> int:
-    """Calculate sentiment from Reddit mentions"""
-    # Simplified - would use PRAW in production
-    return 55  # Neutral-positive default
+@router.get("/history/{query}")
+async def get_sentiment_history(
+    request: Request,
+    query: str,
+    hours: int = Query(24, ge=1, le=24 * 30),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Rolling sentiment aggregates and recent observations for a query.
 
+    Under ``/history/`` rather than ``/{query}/history``, which
+    ``/news/{query}`` and ``/reddit/{query}`` would shadow.
+    """
+    async with AsyncSessionLocal() as db:
+        aggregate = await sentiment_history.get_aggregate(db, query)
+        if aggregate is None:
+            raise HTTPException(status_code=404, detail="No sentiment history for this query")
+        observations = await sentiment_history.get_observations(
+            db, query, datetime.utcnow() - timedelta(hours=hours), limit
+        )
+    # The window slides, so the tag names the observations actually in it
+    window = (hours, limit, len(observations), observations[-1].observed_at if observations else None)
+    tag = _aggregate_etag(aggregate, *window)
+    if is_not_modified(request, tag):
+        return not_modified(tag, CACHE_CONTROL)
 
-async def _get_news_sentiment(query: str) -> int:
-    """Calculate sentiment from news articles"""
-    # Simplified - would use NLP in production
-    return 52  # Neutral-positive default
+    return FastJSONResponse({
+        **sentiment_history.summarize(aggregate),
+        "observations": [
+            {"observed_at": o.observed_at.isoformat(), "overall": o.overall, "mentions": o.mentions}
+            for o in observations
+        ]
+    }, headers=cache_headers(tag, CACHE_CONTROL))
+
+
+async def _get_news_sentiment(query: str) -> list:
+    """Compound scores for news headlines about the query"""
+    news_items = await _fetch_google_news(query, NEWS_SENTIMENT_LIMIT)
+    return [item["sentiment_score"] for item in news_items]
+
+
+@dataclass(frozen=True)
+class SentimentSource:
+    fetch: Callable[[str], Awaitable[List[float]]]  # Compound scores for a query
+    timeout: float  # Deadline in seconds
+
+
+# Sources fanned out to by get_sentiment. Each runs concurrently, so adding
+# one (e.g. another RSS feed) doesn't add its latency to every request.
+SENTIMENT_SOURCES: Dict[str, SentimentSource] = {
+    "news": SentimentSource(_get_news_sentiment, timeout=5.0),
+}
+
+# Sources without a real client yet (the Reddit feed is mock posts). They're
+# reported with status "unavailable" and no score rather than scored.
+UNAVAILABLE_SOURCES = ("reddit",)
 
 
 async def _fetch_google_news(query: str, limit: int) -> list:
-    """Fetch news from Google News RSS"""
+    """Fetch news from Google News RSS (cached per normalized query)"""
+    key = sentiment_history.normalize_query(query)
+    news_items = await _news_cache.get_or_load(key, lambda: _load_google_news(key))
+    return news_items[:limit]
+
+
+async def _load_google_news(query: str) -> list:
     url = f"https://news.google.com/rss/search?q={query}&hl=en-US&gl=US&ceid=US:en"
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, timeout=10.0)
-        if response.status_code != 200:
-            return []
+    response = await http_clients.get("google_news", url)
+    response.raise_for_status()
 
-    feed = feedparser.parse(response.text)
+    # feedparser is pure Python; keep big feeds off the event loop
+    feed = await asyncio.to_thread(feedparser.parse, response.text)
     news_items = []
 
-    for entry in feed.entries[:limit]:
+    # Score the whole feed in one batch; cached with the feed afterwards
+    scores = score_texts([entry.title for entry in feed.entries])
+
+    for entry, score in zip(feed.entries, scores):
         news_items.append({
             "id": entry.get("id", entry.link),
             "title": entry.title,
             "source": entry.get("source", {}).get("title", "Google News"),
             "url": entry.link,
             "published_at": entry.get("published", datetime.now().isoformat()),
-            "sentiment": "neutral",  # Would use NLP to determine
+            "sentiment": label(score),
+            "sentiment_score": round(score, 4),
             "related_tickers": []
         })
 
@@ -1,199 +1,682 @@
-from fastapi import APIRouter, HTTPException
-from typing import Optional
-import httpx
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from typing import AsyncIterator, Callable, Dict, FrozenSet, Hashable, List, Optional, Set, Tuple
+import asyncio
+import base64
+import binascii
+import json
+import os
+from datetime import date, timedelta
+from sqlalchemy import select
+from ..database import AsyncSessionLocal
+from ..models import Portfolio, PortfolioPerson
+from ..services import downsample, prices, sectors, trade_ingest, trade_persistence
+from ..services.analytics import SORT_FIELDS, TradeAnalytics
+from ..services.broadcast import Broadcaster, Subscription
+from ..services.cache import TTLCache
+from ..services.holdings import HoldingsEngine
+from ..services.http import http_clients
+from ..services.refresh import SnapshotRefresher
+from ..services.responses import (
+    body_etag, cache_headers, dumps, etag, is_not_modified, json_bytes_response, not_modified
+)
+from ..services.trade_store import Cursor, TradeStore, normalize_name, trade_side
 
 router = APIRouter()
 
 
 # House Stock Watcher API (free)
-HOUSE_STOCK_WATCHER_API = "https://house-stock-watcher-data.s3-us-west-2.amazonaws.com/data/all_transactions.json"
+HOUSE_STOCK_WATCHER_API = os.getenv(
+    "HOUSE_STOCK_WATCHER_URL",
+    "https://house-stock-watcher-data.s3-us-west-2.amazonaws.com/data/all_transactions.json"
+)
 
-# Cache for API responses
-_trades_cache = {"data": None, "timestamp": None}
 CACHE_DURATION = timedelta(hours=1)
 
+# Comment line sent to idle stream clients, so proxies keep the connection
+# open and disconnects are noticed
+STREAM_HEARTBEAT_SECONDS = 15
+
+# Symbols served by one /stocks request
+MAX_BATCH_SYMBOLS = 50
+
+# Trade and price responses may be reused briefly without revalidating; after
+# that the ETag makes revalidation a 304 until the data actually changes
+CACHE_CONTROL = "public, max-age=60"
+
+# PortfolioPerson.identifier prefix for politicians resolved to canonical
+# representative IDs, e.g. "representative:12" (or "representative:12,40")
+REPRESENTATIVE_IDENTIFIER = "representative:"
+
+# Encoded bodies kept per trade snapshot, one per distinct route and arguments
+ENCODED_RESPONSES = 256
+
+
+# Query parameters of the paginated trade lists, and their unfiltered values
+TRADE_FILTERS = ("cursor", "ticker", "side", "owner", "since", "until", "min_amount", "max_amount")
+NO_FILTERS = dict.fromkeys(TRADE_FILTERS)
+
+# Transaction dates before the STOCK Act are typos, not trades to price
+EARLIEST_TRADE_DATE = date(2012, 1, 1)
+
+# Default page sizes, also what the pre-warm job encodes ahead of requests
+DEFAULT_PERSON_TRADES = 20
+DEFAULT_HOLDINGS = 20
+
+
+def _trade_filters(
+    cursor: Optional[str] = None,
+    ticker: Optional[str] = None,
+    side: Optional[str] = Query(None, alias="type", pattern="^(buy|sell)$"),
+    owner: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    min_amount: Optional[float] = Query(None, ge=0),
+    max_amount: Optional[float] = Query(None, ge=0),
+) -> dict:
+    """Query parameters shared by the paginated trade lists"""
+    return {
+        "cursor": _decode_cursor(cursor) if cursor else None,
+        "ticker": ticker.strip().upper() if ticker else None,
+        "side": side,
+        "owner": owner.strip().lower() if owner else None,
+        "since": since.isoformat() if since else None,
+        "until": until.isoformat() if until else None,
+        "min_amount": min_amount,
+        "max_amount": max_amount,
+    }
 
-@router.get("/politician/{name}")
-async def get_politician_trades(name: str, limit: int = 20):
-    """Get trades for a specific politician"""
-    trades = await _get_all_trades()
-
-    # Filter by name (case-insensitive partial match)
-    name_lower = name.lower()
-    filtered = [
-        t for t in trades
-        if name_lower in t.get("representative", "").lower()
-    ]
-
-    # Sort by transaction date descending
-    filtered.sort(key=lambda x: x.get("transaction_date", ""), reverse=True)
-
-    # Transform to our format
-    result = []
-    for trade in filtered[:limit]:
-        result.append({
-            "id": f"{trade.get('representative', '')}-{trade.get('transaction_date', '')}-{trade.get('ticker', '')}",
-            "person": trade.get("representative", "Unknown"),
-            "ticker": trade.get("ticker", "N/A"),
-            "company": trade.get("asset_description", "Unknown Company"),
-            "type": "buy" if "purchase" in trade.get("type", "").lower() else "sell",
-            "amount": trade.get("amount", "Unknown"),
-            "date": trade.get("transaction_date", ""),
-            "filed_date": trade.get("disclosure_date", "")
-        })
 
-    return result
+@router.get("/politician/{name}")
+async def get_politician_trades(
+    request: Request,
+    name: str,
+    limit: int = Query(DEFAULT_PERSON_TRADES, ge=1, le=1000),
+    filters: dict = Depends(_trade_filters)
+):
+    """Get trades for a specific politician, newest transactions first.
+
+    Filters narrow the list; when more trades match, ``X-Next-Cursor``
+    holds the ``cursor`` for the next page. ``since``/``until`` bound the
+    transaction date.
+    """
+    store = await _get_trade_store()
+    return _cached_response(request, store, *_politician_trades(store, name, limit, filters))
 
 
 @router.get("/recent")
-async def get_recent_trades(limit: int = 50):
-    """Get most recent trades across all tracked politicians"""
-    trades = await _get_all_trades()
+async def get_recent_trades(
+    request: Request,
+    limit: int = Query(50, ge=1, le=1000),
+    filters: dict = Depends(_trade_filters)
+):
+    """Get most recent trades across all tracked politicians.
 
-    # Sort by disclosure date descending
-    trades.sort(key=lambda x: x.get("disclosure_date", ""), reverse=True)
+    Ordered by disclosure date, which ``since``/``until`` bound; paginated
+    like ``/politician/{name}``.
+    """
+    store = await _get_trade_store()
+    key = ("recent", limit, _filters_key(filters))
+    return _cached_response(request, store, key, _page_body(lambda: store.disclosures.page(limit, **filters)))
 
-    result = []
-    for trade in trades[:limit]:
-        result.append({
-            "id": f"{trade.get('representative', '')}-{trade.get('transaction_date', '')}-{trade.get('ticker', '')}",
-            "person": trade.get("representative", "Unknown"),
-            "ticker": trade.get("ticker", "N/A"),
-            "company": trade.get("asset_description", "Unknown Company"),
-            "type": "buy" if "purchase" in trade.get("type", "").lower() else "sell",
-            "amount": trade.get("amount", "Unknown"),
-            "date": trade.get("transaction_date", ""),
-            "filed_date": trade.get("disclosure_date", "")
-        })
 
-    return result
+def _politician_trades(store: TradeStore, name: str, limit: int, filters: dict):
+    key = ("politician", name, limit, _filters_key(filters))
+    return key, _page_body(lambda: store.transactions.page(limit, names=store.match_names(name), **filters))
 
 
 @router.get("/holdings/{name}")
-async def get_holdings(name: str):
+async def get_holdings(request: Request, name: str, limit: int = Query(DEFAULT_HOLDINGS, ge=1, le=1000)):
     """Get estimated current holdings for a person"""
-    trades = await _get_all_trades()
+    store = await _get_trade_store()
+    return _cached_response(request, store, *_person_holdings(store, name, limit))
+
+
+def _person_holdings(store: TradeStore, name: str, limit: int):
+    key = ("holdings", name, limit)
+    return key, lambda: (dumps(_holdings_engine(store).for_representatives(store.match_names(name), limit)), {})
+
+
+@router.get("/holdings")
+async def get_holdings_batch(
+    request: Request,
+    names: Optional[List[str]] = Query(None),
+    limit: int = Query(DEFAULT_HOLDINGS, ge=1, le=1000)
+):
+    """Get estimated holdings for several people (``names`` repeated), or everyone.
+
+    Names aren't split on commas: "Pelosi, Nancy" is one person.
+    """
+    store = await _get_trade_store()
+    engine = _holdings_engine(store)
+    if names is None:
+        return _encoded(request, store, ("holdings_all", limit), lambda: engine.for_all(limit))
+    people = tuple(dict.fromkeys(name.strip() for name in names if name.strip()))
+    return _encoded(request, store, ("holdings_batch", people, limit), lambda: {
+        name: engine.for_representatives(store.match_names(name), limit) for name in people
+    })
+
+
+@router.get("/sectors/{name}")
+async def get_sectors(request: Request, name: str):
+    """Get estimated sector exposure for a person"""
+    store = await _get_trade_store()
+    return _encoded(request, store, ("sectors", name), lambda: _sector_exposure(store, {name: None}))
+
+
+@router.get("/resolve/{name}")
+async def resolve_person(request: Request, name: str):
+    """Representatives a free-text name resolves to, and the identifier to store for it"""
+    store = await _get_trade_store()
+
+    def build() -> dict:
+        matched = store.match_names(name)
+        return {
+            "identifier": _identifier(store, name),
+            "matches": [
+                {
+                    "id": store.representative_ids.get(n),
+                    "name": store.trades[store.by_representative[n][0]].get("representative"),
+                    "trade_count": len(store.by_representative[n]),
+                }
+                for n in matched
+            ],
+        }
+    return _encoded(request, store, ("resolve", name), build)
+
+
+def resolve_identifier(name: str) -> Optional[str]:
+    """Identifier for a politician's name from the current snapshot, if it resolves"""
+    store = _trades_cache.snapshot
+    return _identifier(store, name) if store is not None else None
+
+
+def _identifier(store: TradeStore, name: str) -> Optional[str]:
+    ids = store.resolve_ids(name)
+    identifier = REPRESENTATIVE_IDENTIFIER + ",".join(map(str, ids))
+    # Too broad a name to pin down is left to resolve at read time
+    return identifier if ids and len(identifier) <= 255 else None
+
+
+def _person_names(store: TradeStore, name: str, identifier: Optional[str] = None) -> List[str]:
+    """Normalized names for a person: keyed by stored identifier when it has one"""
+    if identifier and identifier.startswith(REPRESENTATIVE_IDENTIFIER):
+        try:
+            ids = [int(i) for i in identifier[len(REPRESENTATIVE_IDENTIFIER):].split(",")]
+        except ValueError:
+            ids = []
+        names = store.names_for_ids(ids)
+        if names:
+            return names
+    return store.match_names(name)
+
+
+async def get_sector_exposure(people: Dict[str, Optional[str]]) -> List[dict]:
+    """Combined sector exposure of several people's (name to identifier) estimated holdings"""
+    return _sector_exposure(await _get_trade_store(), people)
+
+
+def _sector_exposure(store: TradeStore, people: Dict[str, Optional[str]]) -> List[dict]:
+    matched = [n for name, identifier in people.items() for n in _person_names(store, name, identifier)]
+    return _holdings_engine(store).sector_exposure(list(dict.fromkeys(matched)))
+
+
+async def get_snapshot_version() -> str:
+    """Version of the trade snapshot behind every trade response"""
+    return (await _get_trade_store()).version
+
+
+async def get_people_summary(
+    people: Dict[str, Optional[str]], trade_limit: int = 20, holdings_limit: int = 20
+) -> Dict[str, dict]:
+    """Trades and holdings for many people (name to identifier) from a single snapshot read"""
+    store = await _get_trade_store()
+    engine = _holdings_engine(store)
+    summary = {}
+    for name, identifier in people.items():
+        matched = _person_names(store, name, identifier)
+        summary[name] = {
+            "trades": [_format_trade(t) for t in store.transactions.page(trade_limit, names=matched)[0]],
+            "holdings": engine.for_representatives(matched, holdings_limit),
+        }
+    return summary
+
+
+@router.get("/leaderboard")
+async def get_leaderboard(
+    request: Request,
+    sort: str = "weighted_return",
+    order: str = "desc",
+    limit: int = Query(50, ge=1, le=500),
+    min_trades: int = Query(5, ge=1)
+):
+    """Representatives ranked by mark-to-market trade returns or disclosure lag"""
+    if sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort: {sort}")
+    store = await _get_trade_store()
+    descending = order != "asc"
+    return _encoded(request, store, ("leaderboard", sort, descending, limit, min_trades),
+                    lambda: _trade_analytics(store).leaderboard(sort, descending, limit, min_trades))
+
+
+@router.get("/performance/{name}")
+async def get_performance(request: Request, name: str, trade_limit: int = 20):
+    """Trade returns since transaction date and disclosure lag for a person"""
+    store = await _get_trade_store()
+    return _encoded(request, store, ("performance", name, trade_limit),
+                    lambda: _trade_analytics(store).for_representatives(store.match_names(name), trade_limit))
+
+
+def _encoded(request: Request, store: TradeStore, key: Hashable, build: Callable[[], object]) -> Response:
+    """JSON response built and encoded once per snapshot for each distinct request.
 
-    # Filter by name
-    name_lower = name.lower()
-    person_trades = [
-        t for t in trades
-        if name_lower in t.get("representative", "").lower()
+    Tagged with the snapshot version, so a client that already has this
+    snapshot's response gets a 304 before anything is looked up or encoded.
+    """
+    return _cached_response(request, store, key, lambda: (dumps(build()), {}))
+
+
+def _page_body(page: Callable[[], Tuple[List[dict], Optional[Cursor]]]) -> Callable[[], Tuple[bytes, dict]]:
+    def build() -> Tuple[bytes, dict]:
+        trades, next_cursor = page()
+        headers = {"X-Next-Cursor": _encode_cursor(next_cursor)} if next_cursor else {}
+        return dumps([_format_trade(trade) for trade in trades]), headers
+    return build
+
+
+def _filters_key(filters: dict) -> tuple:
+    return tuple(filters.get(name) for name in TRADE_FILTERS)
+
+
+def _cached_response(request: Request, store: TradeStore, key: Hashable, build: Callable[[], Tuple[bytes, dict]]) -> Response:
+    tag = etag("trades", store.version, key)
+    if is_not_modified(request, tag):
+        return not_modified(tag, CACHE_CONTROL)
+    body, headers = _cached_body(store, key, build)
+    return json_bytes_response(body, {**headers, **cache_headers(tag, CACHE_CONTROL)})
+
+
+def _cached_body(store: TradeStore, key: Hashable, build: Callable[[], Tuple[bytes, dict]]) -> Tuple[bytes, dict]:
+    cache = store.derive(
+        "encoded_responses",
+        lambda s: TTLCache(maxsize=ENCODED_RESPONSES, ttl=CACHE_DURATION.total_seconds(), name="trade_responses"),
+    )
+    entry = cache.get(key)
+    if entry is None:
+        entry = build()
+        cache.set(key, entry)
+    return entry
+
+
+def _encode_cursor(cursor: Cursor) -> str:
+    # Opaque to clients; the (date, trade_hash) inside outlives any snapshot
+    return base64.urlsafe_b64encode(dumps(list(cursor))).rstrip(b"=").decode()
+
+
+def _decode_cursor(cursor: str) -> Cursor:
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        decoded = None
+    if not (isinstance(decoded, list) and len(decoded) == 2 and all(isinstance(v, str) for v in decoded)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return tuple(decoded)
+
+
+@router.get("/status")
+async def get_trades_status():
+    """Trade snapshot age, refresh timings and failure counts"""
+    store = _trades_cache.snapshot
+    return {
+        **_trades_cache.metrics(),
+        "trade_count": len(store) if store else 0,
+        "stream": _trade_events.metrics(),
+    }
+
+
+@router.get("/stream")
+async def stream_trades(request: Request, portfolio_id: Optional[int] = None):
+    """Server-sent events for newly disclosed trades.
+
+    Each refresh that brings in new trades pushes them as ``trade`` events,
+    optionally only those by people in the given portfolio, matched the same
+    way as their dashboard trades.
+    """
+    people = None
+    if portfolio_id is not None:
+        async with AsyncSessionLocal() as db:
+            if await db.get(Portfolio, portfolio_id) is None:
+                raise HTTPException(status_code=404, detail="Portfolio not found")
+            rows = await db.execute(
+                select(PortfolioPerson.name, PortfolioPerson.identifier)
+                .where(PortfolioPerson.portfolio_id == portfolio_id)
+            )
+            # (name, identifier) pairs, resolved against each new snapshot
+            people = frozenset((name, identifier) for name, identifier in rows if name)
+
+    subscription = _trade_events.subscribe(people)
+    return StreamingResponse(
+        _event_stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _event_stream(request: Request, subscription: Subscription) -> AsyncIterator[bytes]:
+    try:
+        yield b"retry: 10000\n\n"
+        while not await request.is_disconnected():
+            message = await subscription.get(timeout=STREAM_HEARTBEAT_SECONDS)
+            if message == b"":
+                break  # Server shutting down
+            yield message if message is not None else b": keep-alive\n\n"
+    finally:
+        _trade_events.unsubscribe(subscription)
+
+
+def _publish_new_trades(previous: Optional[TradeStore], current: TradeStore) -> None:
+    """Diff a refreshed snapshot against the last one and push unseen trades"""
+    if previous is None:
+        return
+    seen = _trade_hashes(previous)
+    new_trades = [t for t in current.trades if t.get("trade_hash") not in seen]
+    if not new_trades:
+        return
+
+    # Encoded once, shared by every subscriber
+    events = [
+        (normalize_name(t.get("representative")), _encode_event(t))
+        for t in new_trades
     ]
 
-    # Calculate holdings (simplified - just shows recent purchases)
-    holdings = {}
-    for trade in person_trades:
-        ticker = trade.get("ticker", "")
-        if not ticker or ticker == "--":
-            continue
+    def select_events(people: Optional[FrozenSet[Tuple[str, Optional[str]]]]) -> List[bytes]:
+        if people is None:
+            return [event for _, event in events]
+        names = {n for name, identifier in people for n in _person_names(current, name, identifier)}
+        return [event for name, event in events if name in names]
 
-        trade_type = trade.get("type", "").lower()
-        if "purchase" in trade_type:
-            if ticker not in holdings:
-                holdings[ticker] = {
-                    "ticker": ticker,
-                    "company": trade.get("asset_description", "Unknown"),
-                    "value": trade.get("amount", "Unknown"),
-                    "sector": _get_sector(ticker),
-                    "change_percent": 0  # Would need price data to calculate
-                }
+    _trade_events.publish(select_events)
+
+
+def _trade_hashes(store: TradeStore) -> FrozenSet[str]:
+    return store.derive("trade_hashes", lambda s: frozenset(t.get("trade_hash") for t in s.trades))
+
+
+def _encode_event(trade: dict) -> bytes:
+    header = f"id: {trade.get('trade_hash', '')}\nevent: trade\ndata: ".encode()
+    return header + dumps(_format_trade(trade)) + b"\n\n"
 
-    return list(holdings.values())[:20]
+
+def close_streams() -> None:
+    """End every open event stream, e.g. on shutdown"""
+    _trade_events.publish(lambda people: [b""])
+
+
+@router.get("/stocks")
+async def get_stocks_data(
+    request: Request,
+    symbols: str,
+    period: str = "1mo",
+    points: Optional[int] = Query(None, ge=3, le=5000),
+    method: str = "lttb"
+):
+    """Get stock price data for several symbols, optionally downsampled.
+
+    ``data`` maps each symbol to bars shaped like ``/stock/{symbol}``;
+    symbols that couldn't be served are listed in ``errors`` instead.
+    """
+    requested = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(requested) > MAX_BATCH_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SYMBOLS} symbols per request")
+    if method not in downsample.METHODS:
+        raise HTTPException(status_code=400, detail=f"Unsupported method: {method}")
+    _check_period(period)
+
+    results = await asyncio.gather(
+        *(_encoded_stock(symbol, period, points, method) for symbol in requested), return_exceptions=True
+    )
+
+    # Each symbol's encoded bars are spliced into the envelope as-is
+    data = []
+    errors = {}
+    for symbol, body in zip(requested, results):
+        if isinstance(body, HTTPException):
+            errors[symbol] = body.detail
+        elif isinstance(body, Exception):
+            print(f"Error fetching prices for {symbol}: {body}")
+            errors[symbol] = "Failed to fetch prices"
+        else:
+            data.append(dumps(symbol) + b":" + body)
+
+    body = b'{"period":' + dumps(period) + b',"data":{' + b",".join(data) + b'},"errors":' + dumps(errors) + b"}"
+    return _price_response(request, body)
 
 
 @router.get("/stock/{symbol}")
-async def get_stock_data(symbol: str, period: str = "1mo"):
+async def get_stock_data(request: Request, symbol: str, period: str = "1mo"):
     """Get stock price data for a symbol"""
-    try:
-        import yfinance as yf
-        stock = yf.Ticker(symbol)
-        hist = stock.history(period=period)
-
-        if hist.empty:
-            raise HTTPException(status_code=404, detail="Stock not found")
-
-        data = []
-        for date, row in hist.iterrows():
-            data.append({
-                "time": date.strftime("%Y-%m-%d"),
-                "open": round(row["Open"], 2),
-                "high": round(row["High"], 2),
-                "low": round(row["Low"], 2),
-                "close": round(row["Close"], 2),
-                "volume": int(row["Volume"])
-            })
-
-        return data
-
-    except ImportError:
-        # yfinance not installed, return mock data
-        return _mock_stock_data(symbol)
-    except Exception as e:
-        return _mock_stock_data(symbol)
+    _check_period(period)
+    return _price_response(request, await _encoded_stock(symbol, period))
+
 
+def _price_response(request: Request, body: bytes) -> Response:
+    # Bars have no version of their own, so the tag comes from the cached body
+    tag = body_etag(body)
+    if is_not_modified(request, tag):
+        return not_modified(tag, CACHE_CONTROL)
+    return json_bytes_response(body, cache_headers(tag, CACHE_CONTROL))
 
-async def _get_all_trades() -> list:
-    """Fetch all trades from House Stock Watcher (cached)"""
-    global _trades_cache
 
-    # Check cache
-    if _trades_cache["data"] and _trades_cache["timestamp"]:
-        if datetime.now() - _trades_cache["timestamp"] < CACHE_DURATION:
-            return _trades_cache["data"]
+async def _encoded_stock(symbol: str, period: str, points: Optional[int] = None, method: str = "lttb") -> bytes:
+    async def load() -> bytes:
+        bars = await _load_stock_bars(symbol, period)
+        if points:
+            bars = bars.iloc[downsample.downsample_indices(bars["close"].to_numpy(dtype=float), points, method)]
+        return dumps(prices.to_records(bars))
+    return await _stock_responses.get_or_load((symbol.upper(), period, points, method), load)
 
+
+def _check_period(period: str) -> None:
+    if period not in prices.PERIODS:
+        raise HTTPException(status_code=400, detail=f"Unsupported period: {period}")
+
+
+async def _load_stock_bars(symbol: str, period: str):
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(HOUSE_STOCK_WATCHER_API, timeout=30.0)
-            if response.status_code == 200:
-                data = response.json()
-                _trades_cache["data"] = data
-                _trades_cache["timestamp"] = datetime.now()
-                return data
+        bars = await prices.get_bars(symbol, period)
     except Exception as e:
-        print(f"Error fetching trades: {e}")
+        # Provider down or missing (e.g. yfinance not installed): say so
+        # rather than chart made-up prices
+        print(f"Error fetching prices for {symbol}: {e}")
+        raise HTTPException(status_code=502, detail="Failed to fetch prices")
+
+    if bars.empty:
+        raise HTTPException(status_code=404, detail="Stock not found")
+    return bars
+
+
+async def _fetch_trade_store() -> TradeStore:
+    """Download all trades from House Stock Watcher and ingest them.
+
+    The body is streamed to disk rather than held in memory, and the request
+    is conditional on the snapshot we already have, so an unchanged upstream
+    costs a 304 instead of a full download. The dump is then streamed into
+    the SQL trade tables, and the indexed snapshot is rebuilt from them only
+    if any rows actually changed.
+    """
+    current = _trades_cache.snapshot
+    headers = trade_persistence.conditional_headers() if current else {}
+
+    async with http_clients.stream("house_stock_watcher", "GET", HOUSE_STOCK_WATCHER_API, headers=headers) as response:
+        if response.status_code == 304:
+            trade_persistence.mark_not_modified()
+            return await _reprice(current)
+        response.raise_for_status()
+        validators = await trade_persistence.save_response(response)
+
+    changes = await asyncio.to_thread(trade_ingest.ingest_file, trade_persistence.SNAPSHOT_FILE)
+    trade_persistence.save_validators(validators)
+    if current is not None and not any(changes.values()):
+        return await _reprice(current)
+    return await asyncio.to_thread(_load_trade_store)
+
 
-    # Return cached data if available, otherwise empty list
-    return _trades_cache["data"] or []
+async def _reprice(store: TradeStore) -> TradeStore:
+    # Unchanged trades, but rebuild price-derived data if bars were stored since
+    if store.derive("price_version", lambda s: None) == prices.version():
+        return store
+    return await asyncio.to_thread(_build_trade_store, store.trades)
 
 
-def _get_sector(ticker: str) -> str:
-    """Get sector for a ticker (simplified mapping)"""
-    sectors = {
-        "AAPL": "Technology", "MSFT": "Technology", "GOOGL": "Technology",
-        "AMZN": "Consumer Cyclical", "TSLA": "Automotive",
-        "NVDA": "Technology", "META": "Technology",
-        "JPM": "Financial", "BAC": "Financial", "WFC": "Financial",
-        "JNJ": "Healthcare", "PFE": "Healthcare", "UNH": "Healthcare",
-        "XOM": "Energy", "CVX": "Energy",
+def _load_trade_store() -> TradeStore:
+    return _build_trade_store(trade_ingest.load_trades())
+
+
+def _build_trade_store(trades) -> TradeStore:
+    store = TradeStore(trades)
+    # Build derived data here, off the event loop, before the snapshot goes live
+    store.derive("price_version", lambda s: prices.version())
+    _holdings_engine(store)
+    _trade_analytics(store)
+    return store
+
+
+def _close_prices(store: TradeStore) -> prices.ClosePrices:
+    def load(s: TradeStore) -> prices.ClosePrices:
+        dates = [d for d in s.by_transaction_day if d]
+        return prices.load_closes((t for t in s.by_ticker if t not in ("", "--")), min(dates, default=None))
+    return store.derive("closes", load)
+
+
+def _holdings_engine(store: TradeStore) -> HoldingsEngine:
+    return store.derive("holdings", lambda s: HoldingsEngine(s.trades, sectors.sector_for, _close_prices(s)))
+
+
+def _trade_analytics(store: TradeStore) -> TradeAnalytics:
+    return store.derive("analytics", lambda s: TradeAnalytics(s.trades, _close_prices(s)))
+
+
+# Immutable TradeStore snapshot, replaced wholesale on refresh. One download
+# runs at a time and readers keep the stale snapshot while it does.
+_trades_cache = SnapshotRefresher(_fetch_trade_store, CACHE_DURATION, name="trades")
+
+# Encoded bar lists per (symbol, period, points, method), living as long as
+# the underlying bars cache entries
+_stock_responses = TTLCache(maxsize=512, ttl=prices.REFRESH_AFTER.total_seconds(), name="stock_responses")
+
+# Subscribers to /stream, keyed by the people they follow (None for everyone)
+_trade_events = Broadcaster(name="trade_stream")
+_trades_cache.add_listener(_publish_new_trades)
+
+
+async def _get_trade_store() -> TradeStore:
+    """Indexed snapshot of all trades, rebuilt only when the cache refreshes"""
+    return await _trades_cache.get() or TradeStore([])
+
+
+async def load_persisted_trades() -> None:
+    """Warm start from the trade tables so the first request doesn't wait"""
+    age = trade_persistence.snapshot_age()
+    if age is None:
+        return
+    try:
+        if not await asyncio.to_thread(trade_ingest.has_trades):
+            # Dump downloaded before the tables existed
+            await asyncio.to_thread(trade_ingest.ingest_file, trade_persistence.SNAPSHOT_FILE)
+        _trades_cache.set(await asyncio.to_thread(_load_trade_store), age=age)
+    except Exception as e:
+        print(f"Error loading persisted trades: {e}")
+
+
+async def refresh_trades() -> None:
+    """Refresh the snapshot now, e.g. from a scheduled job; raises if it failed"""
+    await _trades_cache.refresh()
+    if _trades_cache.consecutive_failures:
+        raise RuntimeError(_trades_cache.last_error)
+
+
+async def warm_people(people: Dict[str, Optional[str]]) -> Set[str]:
+    """Encode people's default trade and holdings responses ahead of requests.
+
+    ``people`` maps names to stored identifiers. Returns the tickers they
+    hold, so their prices can be warmed too.
+    """
+    store = await _get_trade_store()
+    engine = _holdings_engine(store)
+    tickers = set()
+    for name, identifier in people.items():
+        _cached_body(store, *_politician_trades(store, name, DEFAULT_PERSON_TRADES, NO_FILTERS))
+        _cached_body(store, *_person_holdings(store, name, DEFAULT_HOLDINGS))
+        tickers.update(h["ticker"] for h in engine.for_representatives(_person_names(store, name, identifier)))
+    return tickers
+
+
+async def backfill_starts(people: Dict[str, Optional[str]]) -> Dict[str, date]:
+    """Earliest transaction date per traded ticker, to backfill prices from.
+
+    The given people's (name to identifier) tickers come first, then the
+    rest by trade count, so the dashboards are priced before the long tail.
+    """
+    store = await _get_trade_store()
+    starts = store.derive("backfill_starts", _ticker_starts)
+    tracked = {
+        (store.trades[i].get("ticker") or "").upper()
+        for name, identifier in people.items()
+        for n in _person_names(store, name, identifier)
+        for i in store.by_representative.get(n, [])
     }
-    return sectors.get(ticker.upper(), "Other")
+    ordered = sorted(starts, key=lambda t: (t not in tracked, -len(store.by_ticker[t]), t))
+    return {ticker: starts[ticker] for ticker in ordered}
 
 
-def _mock_stock_data(symbol: str) -> list:
-    """Generate mock stock data for demo"""
-    import random
-    data = []
-    base_price = random.uniform(50, 500)
-
-    for i in range(30):
-        date = (datetime.now() - timedelta(days=30-i)).strftime("%Y-%m-%d")
-        daily_change = random.uniform(-0.03, 0.03)
-        open_price = base_price * (1 + daily_change)
-        high = open_price * (1 + random.uniform(0, 0.02))
-        low = open_price * (1 - random.uniform(0, 0.02))
-        close = random.uniform(low, high)
-
-        data.append({
-            "time": date,
-            "open": round(open_price, 2),
-            "high": round(high, 2),
-            "low": round(low, 2),
-            "close": round(close, 2),
-            "volume": random.randint(1000000, 50000000)
-        })
-
-        base_price = close
-
-    return data
+def _ticker_starts(store: TradeStore) -> Dict[str, date]:
+    today = date.today()
+    starts = {}
+    for ticker, positions in store.by_ticker.items():
+        if ticker in ("", "--"):
+            continue
+        dates = []
+        for i in positions:
+            try:
+                day = date.fromisoformat((store.trades[i].get("transaction_date") or "")[:10])
+            except ValueError:
+                continue
+            # Mistyped years (the dump has some like 0009) would fetch decades of bars
+            if EARLIEST_TRADE_DATE <= day <= today:
+                dates.append(day)
+        if dates:
+            starts[ticker] = min(dates)
+    return starts
+
+
+async def reprice_trades() -> None:
+    """Rebuild price-derived data (holdings, analytics) if bars were stored since the snapshot was built"""
+    current = _trades_cache.snapshot
+    if current is None:
+        return
+    store = await _reprice(current)
+    # Unless a refresh swapped in newer trades meanwhile
+    if store is not current and _trades_cache.snapshot is current:
+        _trades_cache.set(store, age=_trades_cache.age or 0.0)
+
+
+async def cancel_refresh() -> None:
+    """Cancel a refresh in progress, e.g. on shutdown"""
+    await _trades_cache.cancel()
+
+
+def _format_trade(trade: dict) -> dict:
+    """Transform a House Stock Watcher record to our trade format"""
+    # Stored trades carry missing fields as None rather than leaving them out
+    return {
+        "id": f"{trade.get('representative') or ''}-{trade.get('transaction_date') or ''}-{trade.get('ticker') or ''}",
+        "person": trade.get("representative") or "Unknown",
+        "ticker": trade.get("ticker") or "N/A",
+        "company": trade.get("asset_description") or "Unknown Company",
+        "type": trade_side(trade),
+        "amount": trade.get("amount") or "Unknown",
+        "date": trade.get("transaction_date") or "",
+        "filed_date": trade.get("disclosure_date") or ""
+    }
@@ -0,0 +1,180 @@
+"""Mark-to-market trade performance and disclosure lag per representative"""
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .prices import ClosePrices
+from .trade_store import normalize_name
+
+# STOCK Act deadline for disclosing a transaction
+LATE_DISCLOSURE_DAYS = 45
+# Longer lags come from mistyped dates (the dump has years like 0009)
+MAX_PLAUSIBLE_LAG_DAYS = 3650
+
+SORT_FIELDS = (
+    "weighted_return", "avg_return", "hit_rate", "trade_count",
+    "avg_lag_days", "median_lag_days", "late_rate",
+)
+LAG_FIELDS = {"avg_lag_days", "median_lag_days", "late_rate"}
+
+EMPTY_SUMMARY = {
+    "name": None, "trade_count": 0, "priced_trades": 0, "avg_return": None, "weighted_return": None,
+    "hit_rate": None, "avg_lag_days": None, "median_lag_days": None, "max_lag_days": None,
+    "late_disclosures": 0, "late_rate": None,
+}
+
+
+class TradeAnalytics:
+    """Returns and disclosure lags for every trade, in one vectorized pass.
+
+    Each trade is priced at the close on its transaction date and marked to
+    the latest stored close. ``directional_return`` flips the sign for sales,
+    so selling before a drop counts as a win just like buying before a rise.
+    Trades without stored prices still count toward disclosure lag.
+    """
+
+    def __init__(self, trades: Iterable[dict], closes: ClosePrices):
+        frame = pd.DataFrame.from_records(
+            [
+                (
+                    normalize_name(trade.get("representative")),
+                    trade.get("representative") or "Unknown",
+                    (trade.get("ticker") or "").strip().upper(),
+                    (trade.get("type") or "").lower(),
+                    trade.get("transaction_date") or "",
+                    trade.get("disclosure_date") or "",
+                    trade.get("amount_low"),
+                    trade.get("amount_high"),
+                )
+                for trade in trades
+            ],
+            columns=["representative", "name", "ticker", "type", "transaction_date", "disclosure_date", "low", "high"],
+        )
+        self.trades = self._price_trades(frame, closes)
+        self.people = _aggregate(self.trades, "representative")
+
+    @staticmethod
+    def _price_trades(frame: pd.DataFrame, closes: ClosePrices) -> pd.DataFrame:
+        transacted = pd.to_datetime(frame["transaction_date"], errors="coerce")
+        disclosed = pd.to_datetime(frame["disclosure_date"], errors="coerce")
+
+        direction = np.select(
+            [frame["type"].str.contains("purchase").to_numpy(), frame["type"].str.startswith("sale").to_numpy()],
+            [1.0, -1.0],
+            default=np.nan,
+        )
+        tickers = frame["ticker"].to_numpy()
+        entry = closes.close_on(tickers, transacted.to_numpy())
+        latest = closes.latest_close(tickers)
+        change = (latest / entry - 1) * 100
+
+        # Negative lags are data-entry errors, not early disclosures
+        lag = (disclosed - transacted).dt.days.to_numpy(dtype=float, copy=True)
+        lag[(lag < 0) | (lag > MAX_PLAUSIBLE_LAG_DAYS)] = np.nan
+
+        return frame.assign(
+            entry_close=entry,
+            latest_close=latest,
+            return_percent=change,
+            directional_return=change * direction,
+            weight=(frame["low"].to_numpy(dtype=float) + frame["high"].to_numpy(dtype=float)) / 2,
+            lag_days=lag,
+        )
+
+    def leaderboard(self, sort: str = "weighted_return", descending: bool = True,
+                    limit: int = 50, min_trades: int = 5) -> List[dict]:
+        """Representatives ranked by one aggregate, ignoring thin samples"""
+        people = self.people
+        sample = people["lagged_trades"] if sort in LAG_FIELDS else people["priced_trades"]
+        people = people[(sample >= min_trades) & people[sort].notna()]
+        people = people.sort_values(sort, ascending=not descending, kind="stable").head(limit)
+        return _records(people)
+
+    def for_representatives(self, names: List[str], trade_limit: int = 20) -> dict:
+        """Combined performance for the given normalized names, with recent trades"""
+        trades = self.trades[self.trades["representative"].isin(names)]
+        summary = _records(_aggregate(trades.assign(group=0), "group"))
+        result = summary[0] if summary else {**EMPTY_SUMMARY}
+
+        recent = trades.sort_values("transaction_date", ascending=False, kind="stable").head(trade_limit)
+        result["trades"] = [
+            {
+                "person": row.name,
+                "ticker": row.ticker,
+                "type": "buy" if "purchase" in row.type else "sell",
+                "date": row.transaction_date,
+                "filed_date": row.disclosure_date,
+                "lag_days": _round(row.lag_days, 0),
+                "entry_close": _round(row.entry_close),
+                "latest_close": _round(row.latest_close),
+                "return_percent": _round(row.return_percent),
+                "directional_return": _round(row.directional_return),
+            }
+            for row in recent.itertuples(index=False)
+        ]
+        return result
+
+
+def _aggregate(trades: pd.DataFrame, key: str) -> pd.DataFrame:
+    directional = trades["directional_return"]
+    priced = directional.notna()
+    # Amount-weighted return only over priced trades with a disclosed amount
+    weight = trades["weight"].where(priced & trades["weight"].notna(), 0.0)
+    frame = trades.assign(
+        priced=priced,
+        win=directional > 0,
+        weight=weight,
+        weighted=directional.fillna(0.0) * weight,
+        late=trades["lag_days"] > LATE_DISCLOSURE_DAYS,
+    )
+
+    people = frame.groupby(key, sort=False).agg(
+        name=("name", "last"),
+        trade_count=("ticker", "size"),
+        priced_trades=("priced", "sum"),
+        avg_return=("directional_return", "mean"),
+        weighted=("weighted", "sum"),
+        weight=("weight", "sum"),
+        wins=("win", "sum"),
+        lagged_trades=("lag_days", "count"),
+        avg_lag_days=("lag_days", "mean"),
+        median_lag_days=("lag_days", "median"),
+        max_lag_days=("lag_days", "max"),
+        late_disclosures=("late", "sum"),
+    )
+
+    weight = people["weight"].to_numpy(dtype=float)
+    priced_count = people["priced_trades"].to_numpy(dtype=float)
+    lagged = people["lagged_trades"].to_numpy(dtype=float)
+    nan = np.full(len(people), np.nan)
+    people["weighted_return"] = np.divide(people["weighted"].to_numpy(dtype=float), weight, out=nan.copy(), where=weight > 0)
+    people["hit_rate"] = np.divide(people["wins"].to_numpy(dtype=float), priced_count, out=nan.copy(), where=priced_count > 0) * 100
+    people["late_rate"] = np.divide(people["late_disclosures"].to_numpy(dtype=float), lagged, out=nan.copy(), where=lagged > 0) * 100
+    return people.drop(columns=["weighted", "weight", "wins"])
+
+
+def _records(people: pd.DataFrame) -> List[dict]:
+    return [
+        {
+            "name": row.name,
+            "trade_count": int(row.trade_count),
+            "priced_trades": int(row.priced_trades),
+            "avg_return": _round(row.avg_return),
+            "weighted_return": _round(row.weighted_return),
+            "hit_rate": _round(row.hit_rate),
+            "avg_lag_days": _round(row.avg_lag_days, 1),
+            "median_lag_days": _round(row.median_lag_days, 1),
+            "max_lag_days": _round(row.max_lag_days, 0),
+            "late_disclosures": int(row.late_disclosures),
+            "late_rate": _round(row.late_rate),
+        }
+        for row in people.itertuples(index=False)
+    ]
+
+
+def _round(value: float, digits: int = 2) -> Optional[float]:
+    """JSON-safe rounding; NaN becomes None"""
+    if value is None or np.isnan(value):
+        return None
+    return round(float(value), digits)
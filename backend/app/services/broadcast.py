@@ -0,0 +1,74 @@
+"""In-process fan-out of pre-encoded messages to many idle subscribers.
+
+Each subscriber owns a bounded queue and a filter key. Publishing computes
+the messages for each distinct key once, then hands the same bytes objects
+to every subscriber sharing that key, so the cost per extra listener is a
+queue put rather than another query or serialization.
+"""
+import asyncio
+from typing import Callable, Dict, Hashable, List, Optional, Set
+
+
+class Subscription:
+    def __init__(self, key: Hashable, maxsize: int):
+        self.key = key
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def deliver(self, messages: List[bytes]) -> None:
+        for message in messages:
+            if self.queue.full():
+                # A slow client loses its oldest messages, never blocks the publisher
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """Next message, or None after ``timeout`` seconds without one"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broadcaster:
+    def __init__(self, name: str = "broadcast", maxsize: int = 100):
+        self.name = name
+        self.maxsize = maxsize
+        self._by_key: Dict[Hashable, Set[Subscription]] = {}
+        self.published = 0
+
+    def subscribe(self, key: Hashable = None) -> Subscription:
+        subscription = Subscription(key, self.maxsize)
+        self._by_key.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._by_key.get(subscription.key)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._by_key[subscription.key]
+
+    def publish(self, select: Callable[[Hashable], List[bytes]]) -> int:
+        """Deliver ``select(key)`` to each key's subscribers; returns deliveries"""
+        delivered = 0
+        for key, subscribers in self._by_key.items():
+            messages = select(key)
+            if not messages:
+                continue
+            for subscription in subscribers:
+                subscription.deliver(messages)
+            delivered += len(messages) * len(subscribers)
+        self.published += delivered
+        return delivered
+
+    def metrics(self) -> dict:
+        subscribers = [s for group in self._by_key.values() for s in group]
+        return {
+            "name": self.name,
+            "subscribers": len(subscribers),
+            "filters": len(self._by_key),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in subscribers),
+        }
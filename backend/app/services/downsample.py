@@ -0,0 +1,57 @@
+"""Downsampling of long price series to a target number of points.
+
+Both methods pick rows rather than synthesizing them, so every point
+served is a real bar. Points are treated as evenly spaced, which trading
+days nearly are.
+"""
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(y: np.ndarray, points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: keeps the visual shape of a line"""
+    size = len(y)
+    if points >= size or points < 3:
+        return np.arange(size)
+
+    x = np.arange(size, dtype=float)
+    # First and last points are kept; the rest are split into points - 2 buckets
+    edges = np.linspace(1, size - 1, points - 1).astype(np.int64)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, size - 1
+
+    a = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (size - 1, size)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Twice the area of the triangle each candidate forms with the last
+        # selected point and the next bucket's average
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y: np.ndarray, points: int) -> np.ndarray:
+    """Keeps each bucket's lowest and highest point, so no extreme is lost"""
+    size = len(y)
+    if points >= size or points < 2:
+        return np.arange(size)
+
+    edges = np.linspace(0, size, points // 2 + 1).astype(np.int64)
+    selected = set()
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            bucket = y[start:end]
+            selected.add(start + int(np.argmin(bucket)))
+            selected.add(start + int(np.argmax(bucket)))
+    return np.array(sorted(selected), dtype=np.int64)
+
+
+def downsample_indices(y: np.ndarray, points: int, method: str = "lttb") -> np.ndarray:
+    if method == "minmax":
+        return minmax_indices(y, points)
+    return lttb_indices(y, points)
@@ -0,0 +1,202 @@
+"""Vectorized position estimates from disclosed trades"""
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .prices import ClosePrices
+from .trade_store import normalize_name
+
+_AMOUNT_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def parse_amount(amount: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    """Parse a disclosure range like "$1,001 - $15,000" into (low, high)"""
+    if not amount:
+        return None, None
+    numbers = [float(n.replace(",", "")) for n in _AMOUNT_NUMBER.findall(amount)]
+    if not numbers:
+        return None, None
+    return min(numbers), max(numbers)
+
+
+def format_range(low: float, high: float) -> str:
+    if round(low) == round(high):
+        return f"${low:,.0f}"
+    return f"${low:,.0f} - ${high:,.0f}"
+
+
+class HoldingsEngine:
+    """Net purchases against sales per representative and ticker.
+
+    Disclosures only give value ranges, so each position is a range:
+    buys add [low, high] and partial sales subtract [high, low], clipped at
+    zero. A full sale closes the position, so only trades after a ticker's
+    last full sale count. Everything is computed for all representatives in
+    one grouped pass when the trade snapshot is built.
+
+    With stored closes, ``change_percent`` is the latest close against the
+    position's average entry price, each buy weighted by its midpoint amount.
+    """
+
+    def __init__(self, trades: Iterable[dict], sector_for: Callable[[str], str], closes: Optional[ClosePrices] = None):
+        frame = pd.DataFrame.from_records(
+            [
+                (
+                    normalize_name(trade.get("representative")),
+                    (trade.get("ticker") or "").strip().upper(),
+                    trade.get("asset_description") or "Unknown",
+                    (trade.get("type") or "").lower(),
+                    trade.get("transaction_date") or "",
+                    trade.get("amount_low"),
+                    trade.get("amount_high"),
+                )
+                for trade in trades
+            ],
+            columns=["representative", "ticker", "company", "type", "transaction_date", "low", "high"],
+        )
+        self.positions = self._net_positions(frame, sector_for, closes)
+
+    @staticmethod
+    def _net_positions(frame: pd.DataFrame, sector_for: Callable[[str], str], closes: Optional[ClosePrices]) -> pd.DataFrame:
+        frame = frame[(frame["ticker"] != "") & (frame["ticker"] != "--") & frame["low"].notna()]
+        frame = frame.assign(
+            is_buy=frame["type"].str.contains("purchase"),
+            is_full_sale=frame["type"] == "sale_full",
+        )
+        # Exchanges and other types don't move the estimate
+        frame = frame[frame["is_buy"] | frame["type"].str.startswith("sale")]
+
+        # Chronological within each position; the sort is stable so same-day
+        # trades keep disclosure order
+        keys = ["representative", "ticker"]
+        frame = frame.sort_values(keys + ["transaction_date"], kind="stable")
+
+        # Each full sale starts a new epoch; only the last epoch is still held
+        epoch = frame.groupby(keys, sort=False)["is_full_sale"].cumsum()
+        current = epoch == epoch.groupby([frame[k] for k in keys], sort=False).transform("max")
+        frame = frame[current.to_numpy() & ~frame["is_full_sale"].to_numpy()]
+
+        low = frame["low"].to_numpy(dtype=float)
+        high = frame["high"].to_numpy(dtype=float)
+        buy = frame["is_buy"].to_numpy()
+
+        # Approximate shares bought at each buy's transaction-date close
+        if closes is not None:
+            entry = closes.close_on(frame["ticker"].to_numpy(), frame["transaction_date"].to_numpy())
+        else:
+            entry = np.full(len(frame), np.nan)
+        priced = buy & (entry > 0)
+        mid = (low + high) / 2
+        frame = frame.assign(
+            net_low=np.where(buy, low, -high),
+            net_high=np.where(buy, high, -low),
+            bought=np.where(buy, low, 0.0),
+            cost=np.where(priced, mid, 0.0),
+            shares=np.where(priced, mid / np.where(priced, entry, 1.0), 0.0),
+        )
+
+        positions = frame.groupby(keys, sort=False).agg(
+            company=("company", "last"),
+            value_low=("net_low", "sum"),
+            value_high=("net_high", "sum"),
+            bought=("bought", "sum"),
+            cost=("cost", "sum"),
+            shares=("shares", "sum"),
+        )
+        positions = positions[(positions["value_high"] > 0) & (positions["bought"] > 0)]
+        positions["value_low"] = positions["value_low"].clip(lower=0)
+        positions = positions.reset_index()
+
+        positions["latest"] = closes.latest_close(positions["ticker"].to_numpy()) if closes is not None else np.nan
+        positions = positions.drop(columns="bought")
+        positions["sector"] = positions["ticker"].map(sector_for)
+        return positions.set_index("representative").sort_index()
+
+    def for_representatives(self, names: List[str], limit: Optional[int] = None) -> List[dict]:
+        """Combined holdings for the given normalized names, largest first"""
+        names = [n for n in names if n in self.positions.index]
+        if not names:
+            return []
+        rows = self.positions.loc[names]
+        if len(names) > 1:
+            rows = rows.groupby("ticker", sort=False).agg(
+                company=("company", "last"),
+                value_low=("value_low", "sum"),
+                value_high=("value_high", "sum"),
+                sector=("sector", "first"),
+                cost=("cost", "sum"),
+                shares=("shares", "sum"),
+                latest=("latest", "first"),
+            ).reset_index()
+        return _to_holdings(rows, limit)
+
+    def sector_exposure(self, names: List[str]) -> List[dict]:
+        """Share of estimated value per sector for the given normalized names"""
+        names = [n for n in names if n in self.positions.index]
+        if not names:
+            return []
+        rows = self.positions.loc[names]
+        exposure = rows.groupby("sector", sort=False).agg(
+            value_low=("value_low", "sum"),
+            value_high=("value_high", "sum"),
+            holdings=("ticker", "nunique"),
+        )
+        mid = (exposure["value_low"].to_numpy(dtype=float) + exposure["value_high"].to_numpy(dtype=float)) / 2
+        total = mid.sum()
+        order = np.argsort(-mid, kind="stable")
+
+        sectors = exposure.index.to_numpy()
+        low = exposure["value_low"].to_numpy(dtype=float)
+        high = exposure["value_high"].to_numpy(dtype=float)
+        holdings = exposure["holdings"].to_numpy()
+        return [
+            {
+                "name": sectors[i],
+                "value": round(float(mid[i] / total * 100), 1) if total > 0 else 0.0,
+                "value_low": float(low[i]),
+                "value_high": float(high[i]),
+                "value_mid": float(mid[i]),
+                "holdings": int(holdings[i]),
+            }
+            for i in order
+        ]
+
+    def for_all(self, limit: Optional[int] = None) -> Dict[str, List[dict]]:
+        """Holdings for every representative, keyed by normalized name"""
+        return {
+            name: _to_holdings(rows, limit)
+            for name, rows in self.positions.groupby(level=0, sort=False)
+        }
+
+
+def _to_holdings(rows: pd.DataFrame, limit: Optional[int]) -> List[dict]:
+    low = rows["value_low"].to_numpy(dtype=float)
+    high = rows["value_high"].to_numpy(dtype=float)
+    mid = (low + high) / 2
+    order = np.argsort(-mid, kind="stable")
+    if limit is not None:
+        order = order[:limit]
+
+    tickers = rows["ticker"].to_numpy()
+    companies = rows["company"].to_numpy()
+    sectors = rows["sector"].to_numpy()
+    cost = rows["cost"].to_numpy(dtype=float)
+    value = rows["latest"].to_numpy(dtype=float) * rows["shares"].to_numpy(dtype=float)
+    # 0 where no entry or latest price is stored
+    change = np.divide(value, cost, out=np.full(len(cost), np.nan), where=cost > 0) * 100 - 100
+    change = np.nan_to_num(np.round(change, 2))
+    return [
+        {
+            "ticker": tickers[i],
+            "company": companies[i],
+            "value": format_range(low[i], high[i]),
+            "value_low": float(low[i]),
+            "value_high": float(high[i]),
+            "value_mid": float(mid[i]),
+            "sector": sectors[i],
+            "change_percent": float(change[i])
+        }
+        for i in order
+    ]
@@ -0,0 +1,175 @@
+"""Application-scoped HTTP clients for upstream APIs.
+
+One pooled ``httpx.AsyncClient`` per upstream, so connections, TLS sessions
+and DNS results are reused across requests. Every call gets that upstream's
+timeout, retries with exponential backoff and jitter, and a circuit breaker
+that fails fast while the upstream is down.
+"""
+import asyncio
+import importlib.util
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass(frozen=True)
+class Upstream:
+    timeout: float = 10.0
+    connect_timeout: float = 5.0
+    max_connections: int = 10
+    max_keepalive: int = 5
+    retries: int = 2
+    backoff: float = 0.5  # Seconds before the first retry, doubled after each
+    failure_threshold: int = 5  # Consecutive failures that open the circuit
+    reset_timeout: float = 30.0  # Seconds the circuit stays open
+
+
+UPSTREAMS: Dict[str, Upstream] = {
+    "house_stock_watcher": Upstream(timeout=30.0, max_connections=2, max_keepalive=1),
+    "google_news": Upstream(timeout=10.0, max_connections=20, max_keepalive=10),
+    "default": Upstream(),
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def check(self, name: str) -> None:
+        state = self.state
+        if state == "open":
+            raise CircuitOpenError(f"Circuit open for {name}")
+        if state == "half_open":
+            # Let this one call probe the upstream; others wait for its result
+            self.opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class HttpClients:
+    """Registry of per-upstream clients, created lazily and closed on shutdown"""
+
+    def __init__(self, upstreams: Dict[str, Upstream], transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.upstreams = upstreams
+        self.transport = transport
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def configure(self, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        """Route all upstream calls through another transport, e.g. httpx.MockTransport in tests"""
+        self.transport = transport
+        self._clients = {}
+
+    def _config(self, name: str) -> Upstream:
+        return self.upstreams.get(name) or self.upstreams["default"]
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            config = self._config(name)
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=config.max_connections,
+                    max_keepalive_connections=config.max_keepalive,
+                ),
+                http2=HTTP2_AVAILABLE and self.transport is None,
+                transport=self.transport,
+                follow_redirects=True,
+            )
+            self._clients[name] = client
+        return client
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            config = self._config(name)
+            breaker = self._breakers[name] = CircuitBreaker(config.failure_threshold, config.reset_timeout)
+        return breaker
+
+    async def _send(self, name: str, request: httpx.Request, stream: bool) -> httpx.Response:
+        config = self._config(name)
+        breaker = self.breaker(name)
+        retries = config.retries if request.method in IDEMPOTENT_METHODS else 0
+
+        for attempt in range(retries + 1):
+            breaker.check(name)
+            try:
+                response = await self.client(name).send(request, stream=stream)
+            except httpx.TransportError:
+                breaker.record_failure()
+                if attempt == retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+                if attempt == retries:
+                    return response
+                await response.aclose()
+
+            await asyncio.sleep(config.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    async def request(self, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request to an upstream and read the whole body"""
+        request = self.client(name).build_request(method, url, **kwargs)
+        return await self._send(name, request, stream=False)
+
+    async def get(self, name: str, url: str, **kwargs) -> httpx.Response:
+        return await self.request(name, "GET", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, name: str, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Send a request and stream the body; retries happen before any is read"""
+        request = self.client(name).build_request(method, url, **kwargs)
+        response = await self._send(name, request, stream=True)
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def metrics(self) -> dict:
+        return {
+            name: {"circuit": breaker.state, "consecutive_failures": breaker.failures}
+            for name, breaker in self._breakers.items()
+        }
+
+
+http_clients = HttpClients(UPSTREAMS)
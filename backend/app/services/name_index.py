@@ -0,0 +1,126 @@
+"""Free-text person names to canonical representative names.
+
+Built once per trade snapshot. Each disclosed name is reduced to tokens
+(lower-case, accents and punctuation dropped, honorifics like "Hon." and
+suffixes like "Jr." stripped), and posting lists are kept per token, per
+Soundex code and per trigram. A lookup tries, in order:
+
+1. the exact token sequence ("Nancy Pelosi" == "Hon. Nancy Pelosi"),
+2. every query token appearing in the name ("Pelosi", "Pelosi, Nancy"),
+3. every query token sounding like one in the name ("Nancy Pelosy"),
+4. trigram overlap for anything else that is close ("Gotheimer").
+
+Each step is a few set intersections over short posting lists, so a lookup
+never scans the list of names.
+"""
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+HONORIFICS = frozenset({
+    "hon", "honorable", "rep", "representative", "sen", "senator", "congressman", "congresswoman",
+    "mr", "mrs", "ms", "dr", "jr", "sr", "ii", "iii", "iv",
+})
+
+# Share of the query's trigrams a name must contain to count as a match
+MIN_TRIGRAM_SCORE = 0.6
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+    "l": "4", **dict.fromkeys("mn", "5"), "r": "6",
+}
+
+
+def tokens(name: str) -> Tuple[str, ...]:
+    """Name tokens without accents, punctuation or honorifics"""
+    ascii_name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode()
+    words = re.sub(r"[^a-z0-9]+", " ", ascii_name.lower().replace("'", "")).split()
+    return tuple(w for w in words if w not in HONORIFICS)
+
+
+def soundex(token: str) -> str:
+    """American Soundex code, e.g. "pelosi" -> "P420" """
+    if not token:
+        return ""
+    code = token[0].upper()
+    previous = _SOUNDEX_CODES.get(token[0], "")
+    for char in token[1:]:
+        digit = _SOUNDEX_CODES.get(char, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # h and w don't separate letters with the same code; vowels do
+        if char not in "hw":
+            previous = digit
+    return code.ljust(4, "0")
+
+
+def trigrams(name_tokens: Iterable[str]) -> FrozenSet[str]:
+    """Word-padded trigrams, like PostgreSQL's pg_trgm"""
+    grams: Set[str] = set()
+    for token in name_tokens:
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class NameIndex:
+    def __init__(self, names: Iterable[str]):
+        self._by_tokens: Dict[Tuple[str, ...], List[str]] = {}
+        self._by_token: Dict[str, Set[str]] = {}
+        self._by_soundex: Dict[str, Set[str]] = {}
+        self._by_trigram: Dict[str, Set[str]] = {}
+
+        for name in names:
+            name_tokens = tokens(name)
+            if not name_tokens:
+                continue
+            self._by_tokens.setdefault(name_tokens, []).append(name)
+            for token in name_tokens:
+                self._by_token.setdefault(token, set()).add(name)
+                self._by_soundex.setdefault(soundex(token), set()).add(name)
+            for gram in trigrams(name_tokens):
+                self._by_trigram.setdefault(gram, set()).add(name)
+
+    def resolve(self, query: str) -> List[str]:
+        """Names the query refers to, sorted; empty when none is close enough"""
+        query_tokens = tokens(query)
+        if not query_tokens:
+            return []
+
+        exact = self._by_tokens.get(query_tokens)
+        if exact:
+            return sorted(exact)
+
+        for postings, key in ((self._by_token, lambda t: t), (self._by_soundex, soundex)):
+            matched = _intersect(postings.get(key(token), set()) for token in query_tokens)
+            if matched:
+                return sorted(matched)
+
+        return self._closest(trigrams(query_tokens))
+
+    def _closest(self, query_grams: FrozenSet[str]) -> List[str]:
+        hits: Counter = Counter()
+        for gram in query_grams:
+            hits.update(self._by_trigram.get(gram, ()))
+        if not hits:
+            return []
+        best = max(hits.values())
+        if best / len(query_grams) < MIN_TRIGRAM_SCORE:
+            return []
+        return sorted(name for name, count in hits.items() if count == best)
+
+
+def _intersect(sets: Iterable[Set[str]]) -> Set[str]:
+    # Smallest first keeps every intersection as cheap as the rarest token
+    ordered = sorted(sets, key=len)
+    if not ordered or not ordered[0]:
+        return set()
+    result = set(ordered[0])
+    for postings in ordered[1:]:
+        result &= postings
+        if not result:
+            break
+    return result
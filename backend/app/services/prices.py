@@ -0,0 +1,291 @@
+"""Local store of daily OHLCV bars with a pluggable price provider.
+
+Bars live in the price_bars table. A request only fetches what the table
+doesn't cover yet: history older than the first fetched date, and the tail
+since the last check. Provider calls and database work run in a worker
+thread, and responses are built from column arrays rather than row by row.
+"""
+import asyncio
+import os
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models import PriceBar, PriceCoverage
+from .cache import TTLCache
+
+COLUMNS = ["date", "open", "high", "low", "close", "volume"]
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+
+# The latest bar can still move intraday; re-check the tail after this long
+REFRESH_AFTER = timedelta(minutes=int(os.getenv("PRICE_REFRESH_MINUTES", "15")))
+
+# yfinance-style periods as calendar lookbacks; ytd and max are special-cased
+PERIODS: Dict[str, Optional[pd.DateOffset]] = {
+    "1d": pd.DateOffset(days=7),
+    "5d": pd.DateOffset(days=10),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+    "ytd": None,
+    "max": None,
+}
+# Periods counted in trading days, looked back far enough to span weekends
+TRADING_DAYS = {"1d": 1, "5d": 5}
+MAX_HISTORY_START = date(1970, 1, 1)
+
+
+class PriceProvider(Protocol):
+    def history(self, symbol: str, start: date, end: date) -> pd.DataFrame:
+        """Daily bars in [start, end) with COLUMNS, dates as YYYY-MM-DD"""
+        ...
+
+
+class YFinanceProvider:
+    def history(self, symbol: str, start: date, end: date) -> pd.DataFrame:
+        import yfinance as yf
+        hist = yf.Ticker(symbol).history(start=start.isoformat(), end=end.isoformat())
+        if hist.empty:
+            return pd.DataFrame(columns=COLUMNS)
+        return pd.DataFrame({
+            "date": hist.index.strftime("%Y-%m-%d"),
+            "open": hist["Open"].to_numpy(),
+            "high": hist["High"].to_numpy(),
+            "low": hist["Low"].to_numpy(),
+            "close": hist["Close"].to_numpy(),
+            "volume": hist["Volume"].to_numpy(dtype=np.int64),
+        })
+
+
+class FixtureProvider:
+    """Serves bars from <directory>/<SYMBOL>.csv files, e.g. to run offline"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def history(self, symbol: str, start: date, end: date) -> pd.DataFrame:
+        path = self.directory / f"{symbol.upper()}.csv"
+        if not path.exists():
+            return pd.DataFrame(columns=COLUMNS)
+        frame = pd.read_csv(path, usecols=COLUMNS, dtype={"date": str})
+        return frame[(frame["date"] >= start.isoformat()) & (frame["date"] < end.isoformat())]
+
+
+def _default_provider() -> PriceProvider:
+    fixture_dir = os.getenv("PRICE_FIXTURE_DIR")
+    return FixtureProvider(fixture_dir) if fixture_dir else YFinanceProvider()
+
+
+_provider: PriceProvider = _default_provider()
+
+# Recently served frames per (symbol, start); the table is the real store
+_bars_cache = TTLCache(maxsize=256, ttl=REFRESH_AFTER.total_seconds(), name="price_bars")
+
+# Serializes fetch-and-store per symbol across worker threads
+_symbol_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+
+# Bumped whenever new bars are stored, so data derived from stored closes
+# knows when it's out of date
+_version = 0
+
+# Symbols per IN (...) clause when reading closes in bulk
+QUERY_CHUNK = 500
+
+# How far back an as-of lookup may reach for the last close (weekends, holidays)
+AS_OF_TOLERANCE = pd.Timedelta(days=7)
+
+
+def version() -> int:
+    return _version
+
+
+def set_provider(provider: PriceProvider) -> None:
+    """Swap the price source, e.g. for a FixtureProvider in tests"""
+    global _provider
+    _provider = provider
+    _bars_cache.clear()
+
+
+def period_start(period: str, today: Optional[date] = None) -> date:
+    today = today or date.today()
+    if period not in PERIODS:
+        raise ValueError(f"Unsupported period: {period}")
+    if period == "ytd":
+        return date(today.year, 1, 1)
+    if period == "max":
+        return MAX_HISTORY_START
+    return (pd.Timestamp(today) - PERIODS[period]).date()
+
+
+def _missing_ranges(coverage: Optional[PriceCoverage], start: date, today: date, now: datetime) -> List[Tuple[date, date]]:
+    """Inclusive date ranges the table doesn't cover yet"""
+    if coverage is None:
+        return [(start, today)]
+    gaps = []
+    first = date.fromisoformat(coverage.first_date)
+    if start < first:
+        gaps.append((start, first - timedelta(days=1)))
+    if now - coverage.checked_at >= REFRESH_AFTER:
+        # From the last covered day, whose bar may have been partial
+        gaps.append((date.fromisoformat(coverage.last_date), today))
+    return gaps
+
+
+def _store_bars(db: Session, symbol: str, frame: pd.DataFrame) -> bool:
+    if frame.empty:
+        return False
+    dates = frame["date"]
+    db.execute(delete(PriceBar).where(
+        PriceBar.symbol == symbol, PriceBar.date >= dates.min(), PriceBar.date <= dates.max()
+    ))
+    db.execute(insert(PriceBar), [
+        {"symbol": symbol, "date": d, "open": o, "high": h, "low": l, "close": c, "volume": v}
+        for d, (o, h, l, c), v in zip(
+            dates.tolist(),
+            frame[PRICE_COLUMNS].to_numpy(dtype=float).tolist(),
+            frame["volume"].to_numpy(dtype=np.int64).tolist(),
+        )
+    ])
+    return True
+
+
+def load_bars(symbol: str, start: date) -> pd.DataFrame:
+    """Bars from start to today, fetching only what isn't stored yet"""
+    global _version
+    symbol = symbol.upper()
+    today = date.today()
+    now = datetime.utcnow()
+
+    with _symbol_locks[symbol], SessionLocal() as db:
+        coverage = db.get(PriceCoverage, symbol)
+        gaps = _missing_ranges(coverage, start, today, now)
+        stored = False
+        try:
+            for gap_start, gap_end in gaps:
+                stored |= _store_bars(db, symbol, _provider.history(symbol, gap_start, gap_end + timedelta(days=1)))
+        except Exception as e:
+            if coverage is None:
+                raise
+            # Serve what's stored rather than failing the request
+            print(f"Error refreshing prices for {symbol}: {e}")
+            db.rollback()
+            gaps = []
+
+        if gaps:
+            if coverage is None:
+                coverage = PriceCoverage(symbol=symbol, first_date=start.isoformat(), last_date=today.isoformat(), checked_at=now)
+                db.add(coverage)
+            else:
+                coverage.first_date = min(coverage.first_date, start.isoformat())
+                if gaps[-1][1] == today:
+                    coverage.last_date = today.isoformat()
+                    coverage.checked_at = now
+            db.commit()
+            if stored:
+                _version += 1
+
+        rows = db.execute(
+            select(PriceBar.date, PriceBar.open, PriceBar.high, PriceBar.low, PriceBar.close, PriceBar.volume)
+            .where(PriceBar.symbol == symbol, PriceBar.date >= start.isoformat())
+            .order_by(PriceBar.date)
+        ).all()
+
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def uncovered(starts: Dict[str, date]) -> List[str]:
+    """Symbols whose stored bars don't reach back to their start date yet, in the given order"""
+    with SessionLocal() as db:
+        first_dates = dict(db.execute(select(PriceCoverage.symbol, PriceCoverage.first_date)).all())
+    return [
+        symbol for symbol, start in starts.items()
+        if first_dates.get(symbol.upper()) is None or first_dates[symbol.upper()] > start.isoformat()
+    ]
+
+
+async def get_bars(symbol: str, period: str) -> pd.DataFrame:
+    """Bars for a yfinance-style period; the frame is shared, don't mutate it"""
+    start = period_start(period)
+    key = (symbol.upper(), start)
+    frame = await _bars_cache.get_or_load(key, lambda: asyncio.to_thread(load_bars, symbol, start))
+    days = TRADING_DAYS.get(period)
+    return frame.tail(days) if days else frame
+
+
+def to_records(frame: pd.DataFrame) -> List[dict]:
+    """Bars in the API's {time, open, high, low, close, volume} shape"""
+    prices = np.round(frame[PRICE_COLUMNS].to_numpy(dtype=float), 2).tolist()
+    volumes = frame["volume"].to_numpy(dtype=np.int64).tolist()
+    return [
+        {"time": t, "open": o, "high": h, "low": l, "close": c, "volume": v}
+        for t, (o, h, l, c), v in zip(frame["date"].tolist(), prices, volumes)
+    ]
+
+
+class ClosePrices:
+    """Stored daily closes for many symbols, for vectorized as-of lookups"""
+
+    def __init__(self, frame: pd.DataFrame):
+        # Dates as day numbers, which every pandas version merges the same
+        # way; merge_asof needs the lookup table sorted on them
+        frame = frame.assign(day=_day_numbers(frame["date"]))
+        self.frame = frame.sort_values("day", kind="stable").reset_index(drop=True)[["symbol", "day", "close"]]
+        self.latest = self.frame.groupby("symbol")["close"].last()
+
+    def close_on(self, symbols: Sequence[str], dates: Sequence) -> np.ndarray:
+        """Close on or shortly before each date; NaN where none is stored"""
+        out = np.full(len(symbols), np.nan)
+        days = _day_numbers(dates)
+        query = pd.DataFrame({"symbol": np.asarray(symbols, dtype=object), "day": days, "row": np.arange(len(symbols))})
+        query = query[days != NO_DAY].sort_values("day", kind="stable")
+        if query.empty or self.frame.empty:
+            return out
+        merged = pd.merge_asof(
+            query, self.frame, on="day", by="symbol", direction="backward", tolerance=AS_OF_TOLERANCE.days
+        )
+        out[merged["row"].to_numpy()] = merged["close"].to_numpy(dtype=float)
+        return out
+
+    def latest_close(self, symbols: Sequence[str]) -> np.ndarray:
+        return pd.Series(symbols, dtype=object).map(self.latest).to_numpy(dtype=float)
+
+
+NO_DAY = np.iinfo(np.int64).min
+
+
+def _day_numbers(dates: Sequence) -> np.ndarray:
+    """Days since the epoch for date strings or datetimes; NO_DAY if unparseable"""
+    days = pd.to_datetime(pd.Series(dates), format="ISO8601", errors="coerce").to_numpy().astype("datetime64[D]")
+    return days.astype(np.int64)
+
+
+def load_closes(symbols: Iterable[str], since: Optional[str] = None) -> ClosePrices:
+    """Stored closes for the symbols from the earliest lookup date on, read in a few bulk queries"""
+    symbols = sorted({s.upper() for s in symbols if s})
+    start = pd.to_datetime(since, errors="coerce") if since else pd.NaT
+    since = None if pd.isna(start) else (start - AS_OF_TOLERANCE).date().isoformat()
+    rows = []
+    with SessionLocal() as db:
+        for i in range(0, len(symbols), QUERY_CHUNK):
+            query = select(PriceBar.symbol, PriceBar.date, PriceBar.close).where(
+                PriceBar.symbol.in_(symbols[i:i + QUERY_CHUNK])
+            )
+            if since:
+                query = query.where(PriceBar.date >= since)
+            rows.extend(db.execute(query).all())
+
+    frame = pd.DataFrame(rows, columns=["symbol", "date", "close"])
+    frame["close"] = frame["close"].astype(float)
+    return ClosePrices(frame)
@@ -0,0 +1,125 @@
+"""Single-flight, stale-while-revalidate refresh for cached snapshots"""
+import asyncio
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, List, Optional
+
+
+class SnapshotRefresher:
+    """Holds one snapshot and coordinates refreshing it.
+
+    Only one fetch runs at a time; concurrent callers share it. Once a
+    snapshot exists, readers get it immediately even when it is stale and
+    a refresh is kicked off in the background, so only the very first
+    request ever waits on the upstream download.
+    """
+
+    def __init__(self, fetch: Callable[[], Awaitable[Any]], max_age: timedelta, name: str = "snapshot"):
+        self.fetch = fetch
+        self.max_age = max_age.total_seconds()
+        self.name = name
+
+        self.snapshot: Any = None
+        self.updated_at: Optional[float] = None  # time.monotonic() of last success
+
+        self._inflight: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Any, Any], None]] = []
+
+        # Metrics
+        self.refresh_count = 0
+        self.failure_count = 0
+        self.consecutive_failures = 0
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the snapshot was last refreshed"""
+        if self.updated_at is None:
+            return None
+        return time.monotonic() - self.updated_at
+
+    @property
+    def is_stale(self) -> bool:
+        return self.age is None or self.age >= self.max_age
+
+    async def get(self) -> Any:
+        """Current snapshot, waiting for a fetch only when there is none yet"""
+        if self.snapshot is None:
+            await self.refresh()
+        elif self.is_stale:
+            self._start_refresh()
+        return self.snapshot
+
+    async def refresh(self) -> Any:
+        """Refresh now, joining a fetch that is already in flight"""
+        # Shielded so a cancelled request doesn't abort the shared fetch
+        await asyncio.shield(self._start_refresh())
+        return self.snapshot
+
+    def set(self, snapshot: Any, age: float = 0.0) -> None:
+        """Swap in a snapshot, e.g. one loaded from disk that is ``age`` seconds old"""
+        self.snapshot = snapshot
+        self.updated_at = time.monotonic() - age
+
+    def add_listener(self, listener: Callable[[Any, Any], None]) -> None:
+        """Call ``listener(previous, current)`` whenever a refresh replaces the snapshot"""
+        self._listeners.append(listener)
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._run())
+        return self._inflight
+
+    async def _run(self) -> None:
+        started = time.monotonic()
+        try:
+            snapshot = await self.fetch()
+        except Exception as e:
+            self.failure_count += 1
+            self.consecutive_failures += 1
+            self.last_error = str(e) or e.__class__.__name__
+            print(f"Error refreshing {self.name}: {self.last_error}")
+            return  # Keep serving the previous snapshot
+        finally:
+            self.last_duration = time.monotonic() - started
+
+        self.refresh_count += 1
+        self.consecutive_failures = 0
+        self.last_error = None
+        if snapshot is not None:
+            previous = self.snapshot
+            self.set(snapshot)
+            if snapshot is not previous:
+                self._notify(previous, snapshot)
+
+    def _notify(self, previous: Any, current: Any) -> None:
+        for listener in self._listeners:
+            try:
+                listener(previous, current)
+            except Exception as e:
+                print(f"Error notifying {self.name} listener: {e}")
+
+    async def cancel(self) -> None:
+        """Cancel a fetch in progress, e.g. on shutdown"""
+        task = self._inflight
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def metrics(self) -> dict:
+        return {
+            "name": self.name,
+            "loaded": self.snapshot is not None,
+            "age_seconds": round(self.age, 3) if self.age is not None else None,
+            "stale": self.is_stale,
+            "refreshing": self._inflight is not None and not self._inflight.done(),
+            "refresh_count": self.refresh_count,
+            "failure_count": self.failure_count,
+            "consecutive_failures": self.consecutive_failures,
+            "last_refresh_duration_seconds": round(self.last_duration, 3) if self.last_duration is not None else None,
+            "last_error": self.last_error,
+        }
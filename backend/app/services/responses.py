@@ -0,0 +1,98 @@
+"""JSON encoding, compression and conditional GETs for API responses.
+
+orjson is used when installed and the stdlib encoder otherwise. Handlers
+that return data we built ourselves can hand back a ``FastJSONResponse`` (or
+pre-encoded bytes via ``json_bytes_response``) so FastAPI skips its generic
+encoding and response-model validation pass.
+
+Read endpoints tag responses with an ETag derived from the version of the
+data behind them, so a matching ``If-None-Match`` is answered with a 304
+before any filtering or encoding happens.
+"""
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:  # Falls back to the stdlib encoder
+    orjson = None
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # Brotli is optional; gzip covers every client
+    BrotliMiddleware = None
+
+# Responses smaller than this aren't worth compressing
+COMPRESSION_MINIMUM_SIZE = 1000
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_bytes_response(body: bytes, headers: Optional[dict] = None) -> Response:
+    """Response for a body that is already encoded JSON"""
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def etag(*parts: Any) -> str:
+    """Strong ETag for the representation identified by ``parts``"""
+    return f'"{hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()}"'
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag from an encoded body, for data without a version of its own"""
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def is_not_modified(request: Request, tag: str) -> bool:
+    """Whether the client's ``If-None-Match`` already names ``tag``"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return any(candidate.strip().removeprefix("W/") == tag for candidate in header.split(","))
+
+
+def cache_headers(tag: str, cache_control: str) -> dict:
+    return {"ETag": tag, "Cache-Control": cache_control}
+
+
+def not_modified(tag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(tag, cache_control))
+
+
+class CompressionMiddleware:
+    """Brotli or gzip for large responses, leaving event streams uncompressed.
+
+    Compressors buffer output, which would hold server-sent events back
+    until enough of them piled up.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        if BrotliMiddleware is not None:
+            self.compressed = BrotliMiddleware(app, minimum_size=minimum_size, gzip_fallback=True)
+        else:
+            self.compressed = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and b"text/event-stream" in dict(scope["headers"]).get(b"accept", b""):
+            await self.app(scope, receive, send)
+        else:
+            await self.compressed(scope, receive, send)
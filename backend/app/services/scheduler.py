@@ -0,0 +1,167 @@
+"""In-process periodic jobs on the event loop.
+
+Each job gets its own loop task that sleeps between runs; a shared
+semaphore bounds how many jobs run at once, so warm-up work never crowds
+out request handling. Delays are jittered so jobs started together drift
+apart, and a failing job retries on an exponential backoff capped at its
+normal interval.
+"""
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# First retry after a failure; doubles per consecutive failure
+BACKOFF_BASE_SECONDS = 30
+
+
+class Job:
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[None]],
+        interval: timedelta,
+        jitter: float = 0.1,
+        timeout: Optional[timedelta] = None,
+        initial_delay: timedelta = timedelta(0),
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval.total_seconds()
+        self.jitter = jitter
+        self.timeout = timeout.total_seconds() if timeout else None
+        self.initial_delay = initial_delay.total_seconds()
+
+        self.task: Optional[asyncio.Task] = None
+        self.wake = asyncio.Event()
+        self.running = False
+
+        # Metrics
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_started_at: Optional[datetime] = None
+        self.last_finished_at: Optional[datetime] = None
+        self.last_duration: Optional[float] = None
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.last_error: Optional[str] = None
+        self.next_run_at: Optional[datetime] = None
+
+    def next_delay(self) -> float:
+        delay = self.interval
+        if self.consecutive_failures:
+            delay = min(delay, BACKOFF_BASE_SECONDS * 2 ** (self.consecutive_failures - 1))
+        return self.jittered(delay)
+
+    def jittered(self, delay: float) -> float:
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_finished_at": self.last_finished_at.isoformat() if self.last_finished_at else None,
+            "last_duration_seconds": round(self.last_duration, 3) if self.last_duration is not None else None,
+            "avg_duration_seconds": round(self.total_duration / self.runs, 3) if self.runs else None,
+            "max_duration_seconds": round(self.max_duration, 3),
+            "last_error": self.last_error,
+            "next_run_at": self.next_run_at.isoformat() if self.next_run_at and not self.running else None,
+        }
+
+
+class JobScheduler:
+    def __init__(self, concurrency: int = 2, name: str = "scheduler"):
+        self.name = name
+        self.concurrency = concurrency
+        self.jobs: Dict[str, Job] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def add(self, name: str, func: Callable[[], Awaitable[None]], interval: timedelta, **options) -> Job:
+        """Register a job; takes effect on the next ``start()``"""
+        job = Job(name, func, interval, **options)
+        self.jobs[name] = job
+        return job
+
+    @property
+    def started(self) -> bool:
+        return any(job.task is not None and not job.task.done() for job in self.jobs.values())
+
+    def start(self) -> None:
+        # Created here so it binds to the running loop
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        for job in self.jobs.values():
+            if job.task is None or job.task.done():
+                job.task = asyncio.create_task(self._loop(job), name=f"job:{job.name}")
+
+    async def stop(self) -> None:
+        """Cancel every job, including runs in progress, and wait for them"""
+        tasks = [job.task for job in self.jobs.values() if job.task and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self.jobs.values():
+            job.task = None
+            job.running = False
+            job.next_run_at = None
+
+    def trigger(self, name: str) -> Job:
+        """Run a job as soon as a slot is free instead of waiting out its delay"""
+        job = self.jobs[name]
+        job.wake.set()
+        return job
+
+    async def _loop(self, job: Job) -> None:
+        delay = job.jittered(job.initial_delay)
+        while True:
+            job.next_run_at = datetime.utcnow() + timedelta(seconds=delay)
+            try:
+                await asyncio.wait_for(job.wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            job.wake.clear()
+            await self._run(job)
+            delay = job.next_delay()
+
+    async def _run(self, job: Job) -> None:
+        async with self._semaphore:
+            job.running = True
+            job.last_started_at = datetime.utcnow()
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(job.func(), timeout=job.timeout)
+            except asyncio.CancelledError:
+                job.running = False
+                raise
+            except Exception as e:
+                job.failures += 1
+                job.consecutive_failures += 1
+                job.last_error = str(e) or e.__class__.__name__
+                print(f"Error running job {job.name}: {job.last_error}")
+            else:
+                job.consecutive_failures = 0
+                job.last_error = None
+
+            elapsed = time.monotonic() - started
+            job.running = False
+            job.runs += 1
+            job.last_finished_at = datetime.utcnow()
+            job.last_duration = elapsed
+            job.total_duration += elapsed
+            job.max_duration = max(job.max_duration, elapsed)
+
+    def status(self) -> dict:
+        jobs: List[dict] = [job.status() for job in self.jobs.values()]
+        return {
+            "name": self.name,
+            "started": self.started,
+            "concurrency": self.concurrency,
+            "running": sum(job["running"] for job in jobs),
+            "jobs": jobs,
+        }
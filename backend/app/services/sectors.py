@@ -0,0 +1,91 @@
+"""Sector and industry reference data for tickers.
+
+Loaded once from the bundled ``app/data/sectors.csv`` into plain dicts, so a
+lookup is a single dict probe. The file is refreshed offline, never on the
+request path:
+
+    python -m app.services.sectors AAPL MSFT   # add or update symbols
+    python -m app.services.sectors --traded    # every ticker in the trade tables
+"""
+import argparse
+import csv
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+DATA_FILE = Path(__file__).resolve().parent.parent / "data" / "sectors.csv"
+FIELDS = ("symbol", "sector", "industry")
+
+UNKNOWN_SECTOR = "Other"
+
+
+def load(path: Path = DATA_FILE) -> Dict[str, Tuple[str, str]]:
+    """(sector, industry) per upper-case symbol"""
+    with open(path, newline="") as f:
+        return {row["symbol"].upper(): (row["sector"], row["industry"]) for row in csv.DictReader(f)}
+
+
+_reference = load()
+_sectors: Dict[str, str] = {symbol: sector for symbol, (sector, _) in _reference.items()}
+
+
+def sector_for(ticker: str) -> str:
+    """Sector for an upper-case ticker, or UNKNOWN_SECTOR"""
+    return _sectors.get(ticker, UNKNOWN_SECTOR)
+
+
+def _fetch(symbols: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+    import yfinance as yf
+
+    fetched = {}
+    for symbol in symbols:
+        try:
+            info = yf.Ticker(symbol).info
+        except Exception as e:
+            print(f"Error fetching sector for {symbol}: {e}")
+            continue
+        if info.get("sector"):
+            fetched[symbol] = (info["sector"], info.get("industry") or "")
+    return fetched
+
+
+def _traded_symbols() -> Iterable[str]:
+    from sqlalchemy import select
+
+    from ..database import SessionLocal
+    from ..models import Ticker
+
+    with SessionLocal() as db:
+        return [s for s in db.scalars(select(Ticker.symbol)) if s and s != "--"]
+
+
+def refresh(symbols: Iterable[str], path: Path = DATA_FILE, missing_only: bool = False) -> int:
+    """Look symbols up with yfinance and merge them into the data file"""
+    reference = load(path) if path.exists() else {}
+    symbols = sorted({s.upper() for s in symbols})
+    if missing_only:
+        symbols = [s for s in symbols if s not in reference]
+
+    fetched = _fetch(symbols)
+    reference.update(fetched)
+
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(FIELDS)
+        for symbol in sorted(reference):
+            writer.writerow((symbol, *reference[symbol]))
+    tmp_path.replace(path)
+    return len(fetched)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the bundled sector reference file")
+    parser.add_argument("symbols", nargs="*", help="Symbols to add or update")
+    parser.add_argument("--traded", action="store_true", help="Include every ticker in the trade tables")
+    parser.add_argument("--missing-only", action="store_true", help="Skip symbols already in the file")
+    args = parser.parse_args()
+
+    symbols = list(args.symbols)
+    if args.traded:
+        symbols.extend(_traded_symbols())
+    print(f"Updated {refresh(symbols, missing_only=args.missing_only)} of {len(set(symbols))} symbols")
@@ -0,0 +1,139 @@
+"""Sentiment observations over time with incrementally maintained aggregates.
+
+Each observation updates its query's aggregate row in O(1): time-decayed
+EMAs of the overall score and decayed observation counts for every window.
+Trend and history reads come from that row, never from rescanning history.
+"""
+import math
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import PortfolioPerson, SentimentAggregate, SentimentObservation
+
+WINDOWS = {"1h": timedelta(hours=1), "24h": timedelta(hours=24), "7d": timedelta(days=7)}
+
+# EMA spread (points on the 0-100 scale) that counts as a trend
+TREND_THRESHOLD = 2.0
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def update_aggregate(aggregate: SentimentAggregate, observed_at: datetime, overall: float) -> None:
+    """Fold one observation into the aggregate"""
+    elapsed = max((observed_at - aggregate.last_observed_at).total_seconds(), 0.0)
+    for name, window in WINDOWS.items():
+        # Irregular sampling: weight the new value by how much time passed
+        decay = math.exp(-elapsed / window.total_seconds())
+        ema = getattr(aggregate, f"ema_{name}")
+        setattr(aggregate, f"ema_{name}", ema * decay + overall * (1 - decay))
+        setattr(aggregate, f"count_{name}", getattr(aggregate, f"count_{name}") * decay + 1)
+    aggregate.observation_count += 1
+    aggregate.last_observed_at = max(aggregate.last_observed_at, observed_at)
+
+
+async def record(db: AsyncSession, query: str, result: dict, observed_at: Optional[datetime] = None) -> SentimentAggregate:
+    """Persist an observation and update the query's aggregate"""
+    query = normalize_query(query)
+    observed_at = observed_at or datetime.utcnow()
+    overall = result["overall"]
+
+    db.add(SentimentObservation(
+        query=query, observed_at=observed_at, overall=overall,
+        mentions=result.get("mentions", 0), result=result
+    ))
+
+    aggregate = await db.get(SentimentAggregate, query)
+    if aggregate is None:
+        aggregate = SentimentAggregate(
+            query=query, observation_count=1, first_observed_at=observed_at, last_observed_at=observed_at,
+            **{f"ema_{name}": float(overall) for name in WINDOWS},
+            **{f"count_{name}": 1.0 for name in WINDOWS},
+        )
+        db.add(aggregate)
+    else:
+        update_aggregate(aggregate, observed_at, overall)
+    aggregate.last_result = result
+
+    await db.commit()
+    return aggregate
+
+
+def unrecorded(query: str, result: dict, observed_at: Optional[datetime] = None) -> SentimentAggregate:
+    """A result as an aggregate without storing it, for queries with no history yet"""
+    observed_at = observed_at or datetime.utcnow()
+    return SentimentAggregate(
+        query=normalize_query(query), observation_count=0, first_observed_at=observed_at,
+        last_observed_at=observed_at, last_result=result,
+        **{f"ema_{name}": 0.0 for name in WINDOWS},
+        **{f"count_{name}": 0.0 for name in WINDOWS},
+    )
+
+
+async def get_aggregate(db: AsyncSession, query: str) -> Optional[SentimentAggregate]:
+    return await db.get(SentimentAggregate, normalize_query(query))
+
+
+async def get_observations(db: AsyncSession, query: str, since: datetime, limit: int) -> List[SentimentObservation]:
+    """Most recent observations since a time, newest first"""
+    return (await db.scalars(
+        select(SentimentObservation)
+        .where(SentimentObservation.query == normalize_query(query), SentimentObservation.observed_at >= since)
+        .order_by(SentimentObservation.observed_at.desc())
+        .limit(limit)
+    )).all()
+
+
+async def tracked_queries(db: AsyncSession) -> List[str]:
+    """Distinct people across all portfolios"""
+    names = (await db.scalars(select(PortfolioPerson.name).distinct())).all()
+    return sorted({normalize_query(name) for name in names if name})
+
+
+def is_fresh(aggregate: SentimentAggregate, max_age: timedelta) -> bool:
+    return datetime.utcnow() - aggregate.last_observed_at < max_age
+
+
+def trend(aggregate: SentimentAggregate) -> str:
+    """Short-term EMA against the daily one"""
+    spread = aggregate.ema_1h - aggregate.ema_24h
+    if spread >= TREND_THRESHOLD:
+        return "up"
+    if spread <= -TREND_THRESHOLD:
+        return "down"
+    return "neutral"
+
+
+def to_response(aggregate: SentimentAggregate) -> dict:
+    """Latest sentiment result with the trend from the aggregates"""
+    return {
+        **aggregate.last_result,
+        "trend": trend(aggregate),
+        "observed_at": aggregate.last_observed_at.isoformat(),
+    }
+
+
+def summarize(aggregate: SentimentAggregate) -> dict:
+    return {
+        "query": aggregate.query,
+        "trend": trend(aggregate),
+        "observation_count": aggregate.observation_count,
+        "first_observed_at": aggregate.first_observed_at.isoformat(),
+        "last_observed_at": aggregate.last_observed_at.isoformat(),
+        "latest": aggregate.last_result.get("overall"),
+        "windows": {
+            name: {
+                "ema": round(getattr(aggregate, f"ema_{name}"), 2),
+                "count": round(getattr(aggregate, f"count_{name}"), 2),
+            }
+            for name in WINDOWS
+        },
+        "deltas": {
+            "1h_vs_24h": round(aggregate.ema_1h - aggregate.ema_24h, 2),
+            "24h_vs_7d": round(aggregate.ema_24h - aggregate.ema_7d, 2),
+        },
+    }
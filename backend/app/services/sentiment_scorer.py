@@ -0,0 +1,151 @@
+"""Local headline sentiment scoring.
+
+The default scorer is lexicon-based in the style of VADER: word valences
+summed with negation and intensifier handling, squashed to [-1, 1]. It needs
+no network or model download. Scores are cached by content hash, since the
+same headlines show up across many queries.
+"""
+import hashlib
+import math
+import re
+from typing import Dict, List, Optional, Protocol, Sequence
+
+import numpy as np
+
+from .cache import TTLCache
+
+# Word valences on VADER's -4..4 scale, tuned toward market news
+LEXICON: Dict[str, float] = {
+    # Positive
+    "beat": 1.8, "beats": 1.8, "boom": 2.0, "booming": 2.2, "boost": 1.7, "boosts": 1.7, "breakout": 1.9,
+    "bull": 1.6, "bullish": 2.3, "buy": 1.0, "buys": 1.0, "climb": 1.4, "climbs": 1.4, "confidence": 1.7,
+    "confident": 1.8, "gain": 1.8, "gains": 1.8, "good": 1.9, "great": 3.1, "growth": 1.6, "high": 0.8,
+    "higher": 1.2, "improve": 1.7, "improved": 1.7, "improves": 1.7, "jump": 1.5, "jumps": 1.5,
+    "outperform": 2.0, "outperforms": 2.0, "positive": 2.2, "profit": 1.9, "profitable": 2.1, "profits": 1.9,
+    "rally": 2.0, "rallies": 2.0, "rebound": 1.6, "record": 1.2, "recover": 1.5, "recovery": 1.6, "rise": 1.4,
+    "rises": 1.4, "rising": 1.4, "soar": 2.5, "soaring": 2.5, "soars": 2.5, "strong": 2.0, "stronger": 2.1,
+    "success": 2.7, "successful": 2.7, "surge": 2.2, "surges": 2.2, "upbeat": 2.1, "upgrade": 2.0,
+    "upgraded": 2.0, "upside": 1.5, "win": 2.8, "wins": 2.8, "winner": 2.6, "praise": 2.4, "praised": 2.4,
+    "approve": 1.6, "approved": 1.6, "support": 1.4, "supports": 1.4, "optimistic": 2.3, "optimism": 2.3,
+    "best": 3.2, "benefit": 2.0, "benefits": 2.0, "innovative": 2.0, "exceeds": 1.8,
+    # Negative
+    "bad": -2.5, "bankrupt": -3.0, "bankruptcy": -3.0, "bear": -1.6, "bearish": -2.3, "collapse": -3.0,
+    "collapses": -3.0, "concern": -1.4, "concerns": -1.4, "crash": -3.0, "crashes": -3.0, "crisis": -3.1,
+    "cut": -1.2, "cuts": -1.2, "decline": -1.6, "declines": -1.6, "default": -2.2, "downgrade": -2.0,
+    "downgraded": -2.0, "drop": -1.5, "drops": -1.5, "fall": -1.5, "falls": -1.5, "fear": -2.2,
+    "fears": -2.2, "fraud": -3.2, "illegal": -2.6, "investigation": -1.6, "investigated": -1.8,
+    "lawsuit": -2.0, "loss": -2.0, "losses": -2.1, "lose": -1.9, "loses": -1.9, "low": -0.8, "lower": -1.0,
+    "miss": -1.6, "misses": -1.6, "negative": -2.3, "plunge": -2.6, "plunges": -2.6, "recession": -2.6,
+    "risk": -1.1, "risks": -1.1, "risky": -1.6, "scandal": -2.9, "sell": -0.8, "selloff": -2.2,
+    "sells": -0.8, "sink": -1.8, "sinks": -1.8, "slump": -2.2, "slumps": -2.2, "tumble": -2.2,
+    "tumbles": -2.2, "underperform": -2.0, "volatile": -1.3, "volatility": -1.0, "warning": -1.7,
+    "warns": -1.8, "weak": -1.9, "weaker": -2.0, "worst": -3.1, "worse": -2.5, "criticism": -1.9,
+    "criticized": -2.0, "slams": -2.1, "ethics": -0.6, "violation": -2.4, "violations": -2.4,
+    "insider": -0.7, "probe": -1.7, "accused": -2.2, "conflict": -1.5, "controversy": -2.0,
+    "controversial": -1.7, "resign": -1.6, "resigns": -1.6, "penalty": -2.0, "fine": -0.5, "fined": -2.0,
+}
+
+NEGATIONS = {"not", "no", "never", "neither", "nor", "without", "isnt", "wasnt", "dont", "doesnt",
+             "didnt", "cant", "cannot", "wont", "shouldnt", "arent", "aint"}
+
+# Multipliers for the word that follows
+BOOSTERS: Dict[str, float] = {
+    "very": 1.3, "extremely": 1.5, "hugely": 1.5, "highly": 1.3, "massive": 1.4, "huge": 1.4,
+    "big": 1.2, "sharply": 1.4, "really": 1.2, "slightly": 0.6, "somewhat": 0.7, "barely": 0.5,
+}
+
+NEGATION_SCOPE = 3  # Words after a negation whose valence is flipped
+NEGATION_FACTOR = -0.74  # VADER's dampened flip
+NORMALIZATION_ALPHA = 15.0
+
+# VADER's conventional cut-offs for labelling a compound score
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+_TOKEN = re.compile(r"[a-z]+")
+
+
+class SentimentScorer(Protocol):
+    def score_batch(self, texts: Sequence[str]) -> List[float]:
+        """Compound score in [-1, 1] for each text"""
+        ...
+
+
+class LexiconScorer:
+    """VADER-style scorer that scores a whole batch with array operations"""
+
+    def __init__(self, lexicon: Dict[str, float] = LEXICON):
+        self.lexicon = lexicon
+
+    def score_batch(self, texts: Sequence[str]) -> List[float]:
+        if not texts:
+            return []
+
+        # Flatten every text's tokens into one array, remembering boundaries
+        docs = [_TOKEN.findall(text.lower().replace("'", "")) for text in texts]
+        lengths = np.fromiter((len(d) for d in docs), dtype=np.int64, count=len(docs))
+        tokens = [token for doc in docs for token in doc]
+        if not tokens:
+            return [0.0] * len(texts)
+        doc_ids = np.repeat(np.arange(len(docs)), lengths)
+
+        valence = np.fromiter((self.lexicon.get(t, 0.0) for t in tokens), dtype=float, count=len(tokens))
+        negator = np.fromiter((t in NEGATIONS for t in tokens), dtype=bool, count=len(tokens))
+        boost = np.fromiter((BOOSTERS.get(t, 1.0) for t in tokens), dtype=float, count=len(tokens))
+
+        # A word is negated if one of the few words before it, in the same
+        # text, is a negation; it's boosted by the word right before it
+        negated = np.zeros(len(tokens), dtype=bool)
+        for shift in range(1, NEGATION_SCOPE + 1):
+            same_doc = doc_ids[shift:] == doc_ids[:-shift]
+            negated[shift:] |= negator[:-shift] & same_doc
+        multiplier = np.ones(len(tokens))
+        multiplier[1:] = np.where(doc_ids[1:] == doc_ids[:-1], boost[:-1], 1.0)
+
+        valence = valence * multiplier * np.where(negated, NEGATION_FACTOR, 1.0)
+        totals = np.bincount(doc_ids, weights=valence, minlength=len(docs))
+        return (totals / np.sqrt(totals * totals + NORMALIZATION_ALPHA)).tolist()
+
+
+class CachedScorer:
+    """Wraps a scorer with a content-hash cache so repeat headlines are free"""
+
+    def __init__(self, scorer: SentimentScorer, maxsize: int = 50_000, ttl: float = 24 * 3600):
+        self.scorer = scorer
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, name="sentiment_scores")
+
+    def score_batch(self, texts: Sequence[str]) -> List[float]:
+        keys = [hashlib.blake2b(text.encode(), digest_size=16).digest() for text in texts]
+        scores: List[Optional[float]] = [self.cache.get(key) for key in keys]
+
+        missing = [i for i, score in enumerate(scores) if score is None]
+        self.cache.hits += len(texts) - len(missing)
+        self.cache.misses += len(missing)
+        if missing:
+            for i, score in zip(missing, self.scorer.score_batch([texts[i] for i in missing])):
+                scores[i] = score
+                self.cache.set(keys[i], score)
+        return scores
+
+
+_scorer: SentimentScorer = CachedScorer(LexiconScorer())
+
+
+def score_texts(texts: Sequence[str]) -> List[float]:
+    return _scorer.score_batch(texts)
+
+
+def label(score: float) -> str:
+    if score >= POSITIVE_THRESHOLD:
+        return "positive"
+    if score <= NEGATIVE_THRESHOLD:
+        return "negative"
+    return "neutral"
+
+
+def to_percent(scores: Sequence[float], default: Optional[int] = None) -> Optional[int]:
+    """Mean compound score mapped onto the 0-100 scale the API reports"""
+    if not scores:
+        return default
+    mean = math.fsum(scores) / len(scores)
+    return round((mean + 1) * 50)
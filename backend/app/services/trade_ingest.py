@@ -0,0 +1,214 @@
+"""Incremental ingestion of the House Stock Watcher dump into SQL tables"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models import Representative, Ticker, Trade
+from .holdings import parse_amount
+from .trade_store import normalize_name
+
+try:
+    import ijson
+except ImportError:  # Falls back to parsing the whole document at once
+    ijson = None
+
+BATCH_SIZE = 1000
+
+# Fields that identify a disclosure. Repeats of the same key within the dump
+# (several lots on one day) are told apart by their occurrence number.
+IDENTITY_FIELDS = ("representative", "transaction_date", "ticker", "type", "owner", "asset_description", "ptr_link")
+
+NO_TICKER = "--"
+
+
+def _iter_records(path: Path) -> Iterator[dict]:
+    with open(path, "rb") as f:
+        if ijson is None:
+            yield from json.load(f)
+        else:
+            # use_float keeps numbers as plain floats instead of Decimal
+            yield from ijson.items(f, "item", use_float=True)
+
+
+def _hash(values) -> str:
+    return hashlib.sha1(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _Ingestor:
+    def __init__(self, db: Session):
+        self.db = db
+        self.representatives: Dict[str, int] = dict(db.execute(select(Representative.name, Representative.id)).all())
+        self.districts: Dict[str, Optional[str]] = dict(db.execute(select(Representative.name, Representative.district)).all())
+        self.tickers: Dict[str, int] = dict(db.execute(select(Ticker.symbol, Ticker.id)).all())
+        self.occurrences: Dict[str, int] = {}
+        self.seen = set()
+        self.inserted = self.updated = 0
+
+    def representative_id(self, name: str, district: Optional[str]) -> int:
+        rep_id = self.representatives.get(name)
+        if rep_id is None:
+            rep_id = self.db.execute(
+                insert(Representative).values(name=name, name_normalized=normalize_name(name), district=district)
+            ).inserted_primary_key[0]
+            self.representatives[name] = rep_id
+            self.districts[name] = district
+        elif district and self.districts.get(name) != district:
+            self.db.execute(update(Representative).where(Representative.id == rep_id).values(district=district))
+            self.districts[name] = district
+        return rep_id
+
+    def ticker_id(self, symbol: str) -> Optional[int]:
+        if not symbol or symbol == NO_TICKER:
+            return None
+        ticker_id = self.tickers.get(symbol)
+        if ticker_id is None:
+            ticker_id = self.db.execute(insert(Ticker).values(symbol=symbol)).inserted_primary_key[0]
+            self.tickers[symbol] = ticker_id
+        return ticker_id
+
+    def row(self, position: int, record: dict) -> dict:
+        key = _hash([record.get(field) for field in IDENTITY_FIELDS])
+        occurrence = self.occurrences.get(key, 0)
+        self.occurrences[key] = occurrence + 1
+        trade_hash = _hash([key, occurrence])
+        self.seen.add(trade_hash)
+
+        representative = record.get("representative") or ""
+        cap_gains = record.get("cap_gains_over_200_usd")
+        amount_low, amount_high = parse_amount(record.get("amount"))
+        return {
+            "trade_hash": trade_hash,
+            "content_hash": _hash(record),
+            "position": position,
+            "representative_id": self.representative_id(representative, record.get("district")),
+            "ticker_id": self.ticker_id((record.get("ticker") or "").strip()),
+            "transaction_date": record.get("transaction_date"),
+            "disclosure_date": record.get("disclosure_date"),
+            "disclosure_year": _as_int(record.get("disclosure_year")),
+            "type": record.get("type"),
+            "amount": record.get("amount"),
+            "amount_low": amount_low,
+            "amount_high": amount_high,
+            "owner": record.get("owner"),
+            "asset_description": record.get("asset_description"),
+            "ptr_link": record.get("ptr_link"),
+            "cap_gains_over_200_usd": bool(cap_gains) if cap_gains is not None else None,
+        }
+
+    def upsert(self, rows: List[dict]) -> None:
+        """Insert new rows and update changed ones, leaving the rest alone.
+
+        A row keeps the position it was first ingested at, so a record
+        inserted mid-dump doesn't shift, and rewrite, every row after it.
+        """
+        existing = {
+            trade_hash: (trade_id, content_hash)
+            for trade_hash, trade_id, content_hash in self.db.execute(
+                select(Trade.trade_hash, Trade.id, Trade.content_hash)
+                .where(Trade.trade_hash.in_([r["trade_hash"] for r in rows]))
+            )
+        }
+
+        new_rows, changed_rows = [], []
+        for row in rows:
+            current = existing.get(row["trade_hash"])
+            if current is None:
+                new_rows.append(row)
+            elif current[1] != row["content_hash"]:
+                changed = {field: value for field, value in row.items() if field != "position"}
+                changed_rows.append({**changed, "id": current[0]})
+
+        if new_rows:
+            self.db.execute(insert(Trade), new_rows)
+        if changed_rows:
+            self.db.execute(update(Trade), changed_rows)
+        self.inserted += len(new_rows)
+        self.updated += len(changed_rows)
+
+    def delete_unseen(self) -> int:
+        stale = [
+            trade_id for trade_id, trade_hash in self.db.execute(select(Trade.id, Trade.trade_hash))
+            if trade_hash not in self.seen
+        ]
+        for i in range(0, len(stale), BATCH_SIZE):
+            self.db.execute(delete(Trade).where(Trade.id.in_(stale[i:i + BATCH_SIZE])))
+        return len(stale)
+
+
+def ingest_file(path: Path) -> dict:
+    """Stream a dump into the trade tables in batches.
+
+    Only rows whose stable hash is new, or whose content changed, are
+    written; trades that disappeared upstream are removed. Memory stays at
+    one batch of records plus the hash sets, never the whole document.
+    """
+    db = SessionLocal()
+    try:
+        ingestor = _Ingestor(db)
+        batch = []
+        for position, record in enumerate(_iter_records(path)):
+            batch.append(ingestor.row(position, record))
+            if len(batch) >= BATCH_SIZE:
+                ingestor.upsert(batch)
+                batch = []
+        if batch:
+            ingestor.upsert(batch)
+        deleted = ingestor.delete_unseen()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return {"inserted": ingestor.inserted, "updated": ingestor.updated, "deleted": deleted}
+
+
+def has_trades() -> bool:
+    db = SessionLocal()
+    try:
+        return db.execute(select(Trade.id).limit(1)).first() is not None
+    finally:
+        db.close()
+
+
+TRADE_FIELDS = (
+    "trade_hash", "representative_id", "transaction_date", "disclosure_date", "disclosure_year",
+    "type", "amount", "amount_low", "amount_high", "owner", "asset_description", "ptr_link", "cap_gains_over_200_usd",
+)
+
+
+def load_trades() -> List[dict]:
+    """All trades as upstream-shaped dicts, in the order they were first ingested"""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(
+                *(getattr(Trade, field) for field in TRADE_FIELDS),
+                Representative.name, Representative.district, Ticker.symbol
+            )
+            .join(Representative, Trade.representative_id == Representative.id)
+            .outerjoin(Ticker, Trade.ticker_id == Ticker.id)
+            .order_by(Trade.position, Trade.id)
+        )
+        trades = []
+        for row in rows:
+            trade = dict(zip(TRADE_FIELDS, row))
+            trade["representative"], trade["district"], symbol = row[len(TRADE_FIELDS):]
+            trade["ticker"] = symbol or NO_TICKER
+            trades.append(trade)
+        return trades
+    finally:
+        db.close()
@@ -0,0 +1,82 @@
+"""On-disk copy of the House Stock Watcher dump and its HTTP validators"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+TRADES_DATA_DIR = Path(os.getenv("TRADES_DATA_DIR", "./data"))
+SNAPSHOT_FILE = TRADES_DATA_DIR / "all_transactions.json"
+META_FILE = TRADES_DATA_DIR / "all_transactions.meta.json"
+
+
+def read_meta() -> dict:
+    """Validators and timestamps recorded with the last download"""
+    try:
+        with open(META_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(meta: dict) -> None:
+    tmp = META_FILE.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, META_FILE)
+
+
+def conditional_headers() -> dict:
+    """If-None-Match / If-Modified-Since for the snapshot on disk"""
+    if not SNAPSHOT_FILE.exists():
+        return {}
+    meta = read_meta()
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
+def snapshot_age() -> Optional[float]:
+    """Seconds since upstream last confirmed the snapshot on disk"""
+    checked_at = read_meta().get("checked_at")
+    if checked_at is None or not SNAPSHOT_FILE.exists():
+        return None
+    return max(time.time() - checked_at, 0.0)
+
+
+async def save_response(response: httpx.Response) -> dict:
+    """Stream a 200 response body to disk, replacing the snapshot atomically.
+
+    Returns the response's validators without recording them: pass them to
+    ``save_validators`` once the snapshot has been ingested, so a failed
+    ingest is retried with a full download instead of answered with a 304.
+    """
+    TRADES_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = SNAPSHOT_FILE.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        async for chunk in response.aiter_bytes():
+            f.write(chunk)
+    os.replace(tmp, SNAPSHOT_FILE)
+
+    return {
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+    }
+
+
+def save_validators(validators: dict) -> None:
+    """Record a downloaded snapshot's validators once it has been ingested"""
+    now = time.time()
+    _write_meta({**validators, "fetched_at": now, "checked_at": now})
+
+
+def mark_not_modified() -> None:
+    """Record that upstream answered 304 for the snapshot on disk"""
+    meta = read_meta()
+    meta["checked_at"] = time.time()
+    _write_meta(meta)
@@ -0,0 +1,227 @@
+"""In-memory indexes over the House Stock Watcher trade dump"""
+import heapq
+import re
+import uuid
+from bisect import bisect_left
+from itertools import count, islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .name_index import NameIndex
+
+
+# Snapshot versions are unique per process run, so a version handed out
+# before a restart never names different data after it
+_INSTANCE = uuid.uuid4().hex[:8]
+_versions = count(1)
+
+
+# Sorts after every trade hash, for "anything on this date" bounds
+_MAX_HASH = "\U0010ffff"
+
+# (date, trade_hash) of the last trade on a page
+Cursor = Tuple[str, str]
+
+
+_US_DATE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+
+
+def iso_date(value: Optional[str]) -> str:
+    """YYYY-MM-DD for an ISO or MM/DD/YYYY date, "" for anything else.
+
+    The dump has both: transaction dates are ISO, disclosure dates are
+    month first, which doesn't sort or compare as text.
+    """
+    value = (value or "").strip()
+    match = _US_DATE.fullmatch(value)
+    if match:
+        month, day, year = match.groups()
+        return f"{year}-{int(month):02d}-{int(day):02d}"
+    return value[:10] if re.match(r"\d{4}-\d{2}-\d{2}", value) else ""
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a representative name for matching"""
+    return (name or "").lower()
+
+
+def trade_side(trade: dict) -> str:
+    """"buy" or "sell", as shown to clients"""
+    return "buy" if "purchase" in (trade.get("type") or "").lower() else "sell"
+
+
+class TradeOrder:
+    """Trades newest first by one date field, with per-field indexes in that order.
+
+    Dates are compared as ISO strings (see ``iso_date``), whatever format the
+    field uses. Ties on the date are broken by ``trade_hash``, so the order
+    and any cursor into it depend only on the trades themselves, not on
+    where they sit in the dump, and a cursor stays valid across refreshes.
+    A page is a bisect into the smallest index matching the filters, then a
+    scan that stops as soon as the page is full.
+    """
+
+    def __init__(self, trades: Tuple[dict, ...], date_field: str):
+        self.trades = trades
+        self.date_field = date_field
+
+        self._keys = keys = [(iso_date(t.get(date_field)), t.get("trade_hash") or "") for t in trades]
+        self.positions = sorted(range(len(trades)), key=keys.__getitem__, reverse=True)
+        self.rank = [0] * len(trades)
+        for rank, i in enumerate(self.positions):
+            self.rank[i] = rank
+        self._ascending_keys = [keys[i] for i in reversed(self.positions)]
+
+        # Positions per value, each list in rank order
+        self.by_representative: Dict[str, List[int]] = {}
+        self.by_ticker: Dict[str, List[int]] = {}
+        self.by_side: Dict[str, List[int]] = {}
+        self.by_owner: Dict[str, List[int]] = {}
+        for i in self.positions:
+            trade = trades[i]
+            self.by_representative.setdefault(normalize_name(trade.get("representative")), []).append(i)
+            self.by_ticker.setdefault((trade.get("ticker") or "").upper(), []).append(i)
+            self.by_side.setdefault(trade_side(trade), []).append(i)
+            self.by_owner.setdefault((trade.get("owner") or "").lower(), []).append(i)
+
+    def key(self, position: int) -> Cursor:
+        return self._keys[position]
+
+    def _rank_below(self, key: Cursor) -> int:
+        """Rank of the first trade whose key sorts below ``key``"""
+        return len(self.positions) - bisect_left(self._ascending_keys, key)
+
+    def page(
+        self,
+        limit: int,
+        cursor: Optional[Cursor] = None,
+        names: Optional[Iterable[str]] = None,
+        ticker: Optional[str] = None,
+        side: Optional[str] = None,
+        owner: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+    ) -> Tuple[List[dict], Optional[Cursor]]:
+        """Matching trades after ``cursor``, and the cursor for the next page.
+
+        ``names`` are normalized representative names; ``since``/``until``
+        are YYYY-MM-DD bounds on the order's date field, inclusive. The amount filters keep
+        trades whose reported bracket overlaps the range. The next cursor is
+        None on the last page.
+        """
+        if limit <= 0:
+            return [], None
+
+        # Cursor and date bounds are a contiguous rank range
+        low, high = 0, len(self.positions)
+        if cursor is not None:
+            low = self._rank_below(cursor)
+        if until:
+            low = max(low, self._rank_below((until, _MAX_HASH)))
+        if since:
+            high = min(high, self._rank_below((since, "")))
+
+        candidates = [[self.positions]]
+        predicates = []
+        if names is not None:
+            names = set(names)
+            candidates.append([self.by_representative.get(n, []) for n in names])
+            predicates.append(lambda t: normalize_name(t.get("representative")) in names)
+        if ticker:
+            ticker = ticker.upper()
+            candidates.append([self.by_ticker.get(ticker, [])])
+            predicates.append(lambda t: (t.get("ticker") or "").upper() == ticker)
+        if side:
+            candidates.append([self.by_side.get(side, [])])
+            predicates.append(lambda t: trade_side(t) == side)
+        if owner:
+            owner = owner.lower()
+            candidates.append([self.by_owner.get(owner, [])])
+            predicates.append(lambda t: (t.get("owner") or "").lower() == owner)
+        if min_amount is not None:
+            predicates.append(lambda t: t.get("amount_high") is not None and t["amount_high"] >= min_amount)
+        if max_amount is not None:
+            predicates.append(lambda t: t.get("amount_low") is not None and t["amount_low"] <= max_amount)
+
+        # Walk the smallest index; the other filters are checked per trade
+        lists = min(candidates, key=lambda group: sum(map(len, group)))
+        rank = self.rank.__getitem__
+        # Lazy slices: nothing past the end of the page is touched
+        sliced = []
+        for positions in lists:
+            start, stop = bisect_left(positions, low, key=rank), bisect_left(positions, high, key=rank)
+            sliced.append(map(positions.__getitem__, range(start, stop)))
+        merged: Iterator[int] = heapq.merge(*sliced, key=rank)
+
+        matching = (i for i in merged if all(p(self.trades[i]) for p in predicates))
+        page = list(islice(matching, limit + 1))
+        if len(page) <= limit:
+            return [self.trades[i] for i in page], None
+        page = page[:limit]
+        return [self.trades[i] for i in page], self.key(page[-1])
+
+
+class TradeStore:
+    """Immutable trade snapshot plus lookup indexes, built once per cache refresh.
+
+    ``trades`` is a tuple and every index holds positions into it, so
+    concurrent requests can read the same snapshot without copying or
+    locking. A refresh builds a new store and swaps it in. Per-person and
+    per-ticker lookups cost O(matches) instead of a scan over the whole dump.
+    """
+
+    def __init__(self, trades: list):
+        self.trades: Tuple[dict, ...] = tuple(trades)
+        # Identifies this snapshot, e.g. for ETags
+        self.version = f"{_INSTANCE}-{next(_versions)}"
+        trades = self.trades
+
+        self.by_representative: Dict[str, List[int]] = {}
+        self.by_ticker: Dict[str, List[int]] = {}
+        self.by_transaction_day: Dict[str, List[int]] = {}
+        # Canonical representative ID per normalized name, and back
+        self.representative_ids: Dict[str, int] = {}
+        self._names_by_id: Dict[int, List[str]] = {}
+
+        for i, trade in enumerate(trades):
+            name = normalize_name(trade.get("representative"))
+            self.by_representative.setdefault(name, []).append(i)
+            if trade.get("representative_id") is not None and name not in self.representative_ids:
+                self.representative_ids[name] = trade["representative_id"]
+                self._names_by_id.setdefault(trade["representative_id"], []).append(name)
+            self.by_ticker.setdefault((trade.get("ticker") or "").upper(), []).append(i)
+            self.by_transaction_day.setdefault(trade.get("transaction_date") or "", []).append(i)
+
+        # Distinct normalized names, and free-text lookups into them
+        self.names = list(self.by_representative)
+        self.name_index = NameIndex(self.names)
+
+        # Newest first by transaction and by disclosure date, each with its
+        # own per-field indexes for filtered, paginated reads
+        self.transactions = TradeOrder(trades, "transaction_date")
+        self.disclosures = TradeOrder(trades, "disclosure_date")
+
+        # Per-snapshot derived data (holdings, analytics...), dropped on refresh
+        self._derived: Dict[str, Any] = {}
+
+    def derive(self, key: str, build: Callable[["TradeStore"], Any]) -> Any:
+        """Compute something from this snapshot once and reuse it until refresh"""
+        if key not in self._derived:
+            self._derived[key] = build(self)
+        return self._derived[key]
+
+    def __len__(self) -> int:
+        return len(self.trades)
+
+    def match_names(self, query: str) -> List[str]:
+        """Normalized representative names a free-text name refers to"""
+        return self.name_index.resolve(query)
+
+    def resolve_ids(self, query: str) -> List[int]:
+        """Canonical representative IDs a free-text name refers to"""
+        return sorted({self.representative_ids[n] for n in self.match_names(query) if n in self.representative_ids})
+
+    def names_for_ids(self, ids: Iterable[int]) -> List[str]:
+        """Normalized names of representatives, skipping IDs without trades"""
+        return [name for i in ids for name in self._names_by_id.get(i, [])]
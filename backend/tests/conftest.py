@@ -0,0 +1,118 @@
+"""Shared fixtures: a throwaway database and data directory, and no background jobs.
+
+Settings are read from the environment when the app modules are imported,
+so they're set here before anything from ``app`` is.
+"""
+import json
+import os
+from xml.sax.saxutils import escape
+import sys
+import tempfile
+from pathlib import Path
+
+_TMP = Path(tempfile.mkdtemp(prefix="portfolio-tracker-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP / 'test.db'}"
+os.environ["TRADES_DATA_DIR"] = str(_TMP / "data")
+for variable in ("TRADES_BACKGROUND_REFRESH", "SENTIMENT_BACKGROUND_REFRESH", "PREWARM_JOBS", "PRICE_BACKFILL"):
+    os.environ[variable] = "false"
+os.environ.pop("PRICE_FIXTURE_DIR", None)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import delete  # noqa: E402
+
+from app import models  # noqa: E402
+from app.database import SessionLocal, init_db  # noqa: E402
+from app.routers import sentiment, trades  # noqa: E402
+from app.services import prices, trade_ingest  # noqa: E402
+from app.services.http import http_clients  # noqa: E402
+from app.services.trade_store import TradeStore  # noqa: E402
+
+init_db()
+
+# Children before parents
+TABLES = (
+    models.Trade, models.Ticker, models.Representative, models.PriceBar, models.PriceCoverage,
+    models.PortfolioPerson, models.WidgetLayout, models.Portfolio,
+    models.SentimentObservation, models.SentimentAggregate,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """Empty tables, no dump on disk and no trade snapshot for every test"""
+    with SessionLocal() as db:
+        for table in TABLES:
+            db.execute(delete(table))
+        db.commit()
+    for path in Path(os.environ["TRADES_DATA_DIR"]).glob("*"):
+        path.unlink()
+    trades._trades_cache.snapshot = None
+    trades._trades_cache.updated_at = None
+    trades._stock_responses.clear()
+    sentiment._news_cache.clear()
+    yield
+    http_clients.configure(None)
+    http_clients._breakers.clear()
+    prices.set_provider(prices.YFinanceProvider())
+
+
+def make_trade(index: int, **fields) -> dict:
+    """An upstream-shaped dump record; ``fields`` override the defaults"""
+    record = {
+        "representative": "Hon. Nancy Pelosi",
+        "district": "CA11",
+        "transaction_date": "2023-01-03",
+        "disclosure_date": "01/20/2023",
+        "disclosure_year": 2023,
+        "ticker": "AAPL",
+        "asset_description": "Apple Inc.",
+        "type": "purchase",
+        "amount": "$1,001 - $15,000",
+        "owner": "self",
+        "ptr_link": f"https://example.com/ptr/{index}",
+        "cap_gains_over_200_usd": False,
+    }
+    record.update(fields)
+    return record
+
+
+@pytest.fixture
+def use_store(tmp_path):
+    """Ingest dump records and swap in the snapshot built from them, as a refresh would"""
+    def use(records) -> TradeStore:
+        path = tmp_path / "dump.json"
+        path.write_text(json.dumps(records))
+        trade_ingest.ingest_file(path)
+        store = trades._load_trade_store()
+        trades._trades_cache.set(store)
+        return store
+    return use
+
+
+class GoogleNews:
+    """Answers every Google News search with an RSS feed of ``headlines``, or ``status``"""
+
+    def __init__(self, headlines):
+        self.headlines = list(headlines)
+        self.status = 200
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.status != 200:
+            return httpx.Response(self.status)
+        items = "".join(
+            f"<item><title>{escape(title)}</title><link>https://example.com/news/{i}</link></item>"
+            for i, title in enumerate(self.headlines)
+        )
+        return httpx.Response(200, text=f"<rss version='2.0'><channel>{items}</channel></rss>")
+
+
+@pytest.fixture
+def google_news():
+    news = GoogleNews(["Stocks rally as profits beat expectations", "Shares fall after weak outlook"])
+    http_clients.configure(httpx.MockTransport(news.handler))
+    return news
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import date, timedelta
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app import jobs
+from app.main import app
+from app.services import prices
+from app.services.analytics import TradeAnalytics
+
+from conftest import make_trade
+
+CLOSES = prices.ClosePrices(pd.DataFrame({
+    "symbol": ["AAPL", "AAPL", "MSFT", "MSFT"],
+    "date": ["2023-01-03", "2023-06-01", "2023-01-03", "2023-06-01"],
+    "close": [100.0, 110.0, 200.0, 150.0],
+}))
+
+
+def trade(ticker, type_, transaction_date="2023-01-03", disclosure_date="2023-01-20", low=1001.0, high=15000.0,
+          representative="Hon. Nancy Pelosi"):
+    return {
+        "representative": representative, "ticker": ticker, "type": type_, "transaction_date": transaction_date,
+        "disclosure_date": disclosure_date, "amount_low": low, "amount_high": high,
+    }
+
+
+def test_returns_are_directional_and_weighted_by_amount():
+    analytics = TradeAnalytics([
+        trade("AAPL", "purchase"),                                # +10%
+        trade("MSFT", "sale_full", low=15001.0, high=50000.0),    # -25% price, a +25% call
+        trade("MSFT", "purchase"),                                # -25%
+        trade("NVDA", "purchase"),                                # No prices
+    ], CLOSES)
+
+    summary = analytics.for_representatives(["hon. nancy pelosi"])
+
+    assert (summary["trade_count"], summary["priced_trades"]) == (4, 3)
+    assert summary["avg_return"] == round((10 + 25 - 25) / 3, 2)
+    weights = [8000.5, 32500.5, 8000.5]
+    assert summary["weighted_return"] == round((10 * weights[0] + 25 * weights[1] - 25 * weights[2]) / sum(weights), 2)
+    assert summary["hit_rate"] == round(2 / 3 * 100, 2)
+    assert [t["directional_return"] for t in summary["trades"]][:2] == [10.0, 25.0]
+
+
+def test_disclosure_lag_ignores_impossible_dates():
+    analytics = TradeAnalytics([
+        trade("AAPL", "purchase", disclosure_date="2023-01-13"),            # 10 days
+        trade("AAPL", "purchase", disclosure_date="2023-03-03"),            # 59 days, late
+        trade("AAPL", "purchase", disclosure_date="2022-12-01"),            # Before the trade
+        trade("AAPL", "purchase", transaction_date="0009-01-03"),           # Mistyped year
+    ], CLOSES)
+
+    summary = analytics.for_representatives(["hon. nancy pelosi"])
+
+    assert (summary["avg_lag_days"], summary["max_lag_days"]) == (34.5, 59)
+    assert (summary["late_disclosures"], summary["late_rate"]) == (1, 50.0)
+
+
+def test_leaderboard_skips_thin_samples():
+    analytics = TradeAnalytics(
+        [trade("AAPL", "purchase")] * 3 + [trade("MSFT", "purchase", representative="Dan Crenshaw")],
+        CLOSES,
+    )
+
+    assert [p["name"] for p in analytics.leaderboard(min_trades=1)] == ["Hon. Nancy Pelosi", "Dan Crenshaw"]
+    assert [p["name"] for p in analytics.leaderboard(min_trades=2)] == ["Hon. Nancy Pelosi"]
+    assert [p["name"] for p in analytics.leaderboard(descending=False, min_trades=1)][0] == "Dan Crenshaw"
+    assert analytics.for_representatives(["nobody"])["trade_count"] == 0
+
+
+def test_backfill_prices_the_trades_for_the_leaderboard(use_store, tmp_path):
+    days = pd.bdate_range(date.today() - timedelta(days=200), date.today() - timedelta(days=1))
+    closes = [100.0 + i for i in range(len(days))]
+    pd.DataFrame({
+        "date": days.strftime("%Y-%m-%d"), "open": closes, "high": closes, "low": closes, "close": closes,
+        "volume": 1000,
+    }).to_csv(tmp_path / "AAPL.csv", index=False)
+    prices.set_provider(prices.FixtureProvider(str(tmp_path)))
+
+    bought = days[10].strftime("%Y-%m-%d")
+    use_store([make_trade(0, transaction_date=bought, disclosure_date=days[20].strftime("%m/%d/%Y"))])
+
+    with TestClient(app) as client:
+        url = "/api/trades/leaderboard?min_trades=1"
+        assert client.get(url).json() == []
+
+        asyncio.run(jobs.backfill_prices())
+        assert prices.uncovered({"AAPL": days[10].date()}) == []
+
+        leader, = client.get(url).json()
+        assert leader["priced_trades"] == 1
+        assert leader["avg_return"] == round((closes[-1] / closes[10] - 1) * 100, 2)
+        assert client.get("/api/trades/leaderboard", params={"sort": "luck"}).status_code == 400
@@ -0,0 +1,45 @@
+import asyncio
+
+from app.services.broadcast import Broadcaster
+
+
+def test_messages_are_selected_once_per_key():
+    broadcaster = Broadcaster(maxsize=10)
+    selected = []
+
+    def select(key):
+        selected.append(key)
+        return [f"{key}:1".encode()] if key != "quiet" else []
+
+    a1, a2, b, quiet = (broadcaster.subscribe(k) for k in ("a", "a", "b", "quiet"))
+
+    assert broadcaster.publish(select) == 3
+    assert sorted(selected) == ["a", "b", "quiet"]
+    assert a1.queue.get_nowait() is a2.queue.get_nowait()
+    assert b.queue.get_nowait() == b"b:1"
+    assert quiet.queue.empty()
+
+
+def test_slow_subscribers_drop_their_oldest_messages():
+    broadcaster = Broadcaster(maxsize=2)
+    subscription = broadcaster.subscribe()
+
+    broadcaster.publish(lambda key: [b"1", b"2", b"3"])
+
+    assert [subscription.queue.get_nowait() for _ in range(2)] == [b"2", b"3"]
+    assert broadcaster.metrics()["dropped"] == 1
+
+
+def test_unsubscribed_keys_are_forgotten():
+    broadcaster = Broadcaster()
+    subscription = broadcaster.subscribe("a")
+    broadcaster.unsubscribe(subscription)
+
+    assert broadcaster.publish(lambda key: [b"x"]) == 0
+    assert broadcaster.metrics()["filters"] == 0
+
+
+def test_get_times_out_with_none():
+    subscription = Broadcaster().subscribe()
+
+    assert asyncio.run(subscription.get(timeout=0.01)) is None
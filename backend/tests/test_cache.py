@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.cache import TTLCache
+
+
+def test_entries_expire_and_the_least_recently_used_is_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=2, ttl=10)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+    now[0] += 10
+    assert cache.get("a", "expired") == "expired"
+
+
+def test_concurrent_misses_share_one_load():
+    loads = []
+
+    async def run():
+        cache = TTLCache(maxsize=10, ttl=60)
+        release = asyncio.Event()
+
+        async def load():
+            loads.append(1)
+            await release.wait()
+            return "value"
+
+        waiting = [asyncio.create_task(cache.get_or_load("key", load)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        values = await asyncio.gather(*waiting)
+        return values + [await cache.get_or_load("key", load)], cache.metrics()
+
+    values, metrics = asyncio.run(run())
+    assert values == ["value"] * 6
+    assert len(loads) == 1
+    assert (metrics["misses"], metrics["coalesced"], metrics["hits"]) == (1, 4, 1)
+
+
+def test_failed_loads_are_not_cached():
+    async def run():
+        cache = TTLCache(maxsize=10, ttl=60)
+
+        async def fail():
+            raise RuntimeError("upstream down")
+
+        async def load():
+            return "value"
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load("key", fail)
+        return await cache.get_or_load("key", load)
+
+    assert asyncio.run(run()) == "value"
@@ -0,0 +1,49 @@
+import inspect
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import database
+from app.main import app
+from app.routers import portfolios
+
+
+@pytest.mark.parametrize("url, drivers, expected", [
+    ("sqlite:///./app.db", database.ASYNC_DRIVERS, "sqlite+aiosqlite:///./app.db"),
+    ("postgresql://user:secret@db/app", database.ASYNC_DRIVERS, "postgresql+asyncpg://user:secret@db/app"),
+    ("sqlite+aiosqlite:///./app.db", database.ASYNC_DRIVERS, "sqlite+aiosqlite:///./app.db"),
+    ("postgresql+asyncpg://user:secret@db/app", database.SYNC_DRIVERS, "postgresql://user:secret@db/app"),
+    ("sqlite:///./app.db", database.SYNC_DRIVERS, "sqlite:///./app.db"),
+])
+def test_driver_for_each_engine(url, drivers, expected):
+    assert database._with_driver(url, drivers) == expected
+
+
+def test_portfolio_routes_are_async():
+    routes = [r for r in portfolios.router.routes if hasattr(r, "endpoint")]
+    assert routes and all(inspect.iscoroutinefunction(r.endpoint) for r in routes)
+
+
+def test_portfolio_requests_never_touch_the_sync_engine():
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    # Startup (init_db, the trade warm start) is what the sync engine is for
+    with TestClient(app) as client:
+        event.listen(database.engine, "before_cursor_execute", record)
+        try:
+            portfolio = client.post("/api/portfolios/", json={"name": "Async", "people": [], "widgets": ["trades"]}).json()
+            client.get("/api/portfolios/")
+            client.get(f"/api/portfolios/{portfolio['id']}")
+            client.delete(f"/api/portfolios/{portfolio['id']}")
+        finally:
+            event.remove(database.engine, "before_cursor_execute", record)
+
+    assert statements == []
+
+
+def test_sqlite_connections_use_wal():
+    with database.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
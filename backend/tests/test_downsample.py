@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from app.services.downsample import downsample_indices, lttb_indices, minmax_indices
+
+
+def series(size=1000, seed=3):
+    rng = np.random.default_rng(seed)
+    return np.cumsum(rng.normal(size=size)) + 100
+
+
+@pytest.mark.parametrize("points", [3, 10, 97, 500])
+def test_lttb_returns_points_sorted_unique_rows_with_both_ends(points):
+    y = series()
+    indices = lttb_indices(y, points)
+
+    assert len(indices) == points
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(1000)
+    y[437] = 50.0
+    assert 437 in lttb_indices(y, 20)
+
+
+def test_lttb_passes_short_series_through():
+    y = series(10)
+    assert lttb_indices(y, 10).tolist() == list(range(10))
+    assert lttb_indices(y, 50).tolist() == list(range(10))
+    assert lttb_indices(y, 2).tolist() == list(range(10))
+
+
+@pytest.mark.parametrize("points", [2, 10, 101, 600])
+def test_minmax_keeps_every_buckets_extremes(points):
+    y = series()
+    indices = minmax_indices(y, points)
+
+    assert len(indices) <= points
+    assert np.all(np.diff(indices) > 0)
+    assert np.argmin(y) in indices and np.argmax(y) in indices
+    edges = np.linspace(0, len(y), points // 2 + 1).astype(np.int64)
+    for start, end in zip(edges[:-1], edges[1:]):
+        bucket = y[start:end]
+        assert start + np.argmin(bucket) in indices
+        assert start + np.argmax(bucket) in indices
+
+
+def test_minmax_passes_short_series_through():
+    assert minmax_indices(series(5), 10).tolist() == list(range(5))
+
+
+def test_downsample_dispatches_on_method():
+    y = series()
+    assert downsample_indices(y, 50, "minmax").tolist() == minmax_indices(y, 50).tolist()
+    assert downsample_indices(y, 50).tolist() == lttb_indices(y, 50).tolist()
@@ -0,0 +1,117 @@
+import pandas as pd
+import pytest
+
+from app.services.holdings import HoldingsEngine, format_range, parse_amount
+from app.services.prices import ClosePrices
+
+PELOSI = "hon. nancy pelosi"
+
+
+def trade(transaction_date, type_, low, high, ticker="AAPL", representative="Hon. Nancy Pelosi"):
+    return {
+        "representative": representative, "ticker": ticker, "asset_description": f"{ticker} Inc.",
+        "type": type_, "transaction_date": transaction_date, "amount_low": low, "amount_high": high,
+    }
+
+
+def holdings(trades, closes=None):
+    return {h["ticker"]: h for h in HoldingsEngine(trades, lambda ticker: "Technology", closes).for_representatives([PELOSI])}
+
+
+@pytest.mark.parametrize("amount, expected", [
+    ("$1,001 - $15,000", (1001.0, 15000.0)),
+    ("$50,000,001 +", (50000001.0, 50000001.0)),
+    ("", (None, None)),
+    (None, (None, None)),
+    ("Spouse/DC Over $1,000,000", (1000000.0, 1000000.0)),
+])
+def test_parse_amount(amount, expected):
+    assert parse_amount(amount) == expected
+
+
+def test_format_range():
+    assert format_range(1001, 15000) == "$1,001 - $15,000"
+    assert format_range(1000, 1000) == "$1,000"
+
+
+def test_buys_add_their_ranges():
+    result = holdings([
+        trade("2023-01-03", "purchase", 1001, 15000),
+        trade("2023-02-03", "purchase", 15001, 50000),
+    ])
+    assert (result["AAPL"]["value_low"], result["AAPL"]["value_high"]) == (16002, 65000)
+    assert result["AAPL"]["value"] == "$16,002 - $65,000"
+
+
+def test_partial_sale_subtracts_the_opposite_bound_clipped_at_zero():
+    result = holdings([
+        trade("2023-01-03", "purchase", 15001, 50000),
+        trade("2023-02-03", "sale_partial", 1001, 15000),
+    ])
+    # Low loses the sale's high, high loses the sale's low
+    assert (result["AAPL"]["value_low"], result["AAPL"]["value_high"]) == (1, 48999)
+
+    result = holdings([
+        trade("2023-01-03", "purchase", 1001, 15000),
+        trade("2023-02-03", "sale_partial", 15001, 50000),
+    ])
+    assert result == {}
+
+
+def test_full_sale_closes_the_position():
+    result = holdings([
+        trade("2023-01-03", "purchase", 1001, 15000),
+        trade("2023-02-03", "sale_full", 1001, 15000),
+        trade("2023-03-03", "purchase", 15001, 50000),
+        trade("2023-01-10", "purchase", 1001, 15000, ticker="MSFT"),
+        trade("2023-02-10", "sale_full", 1001, 15000, ticker="MSFT"),
+    ])
+    # Only the buy after AAPL's last full sale counts, and MSFT is gone
+    assert list(result) == ["AAPL"]
+    assert (result["AAPL"]["value_low"], result["AAPL"]["value_high"]) == (15001, 50000)
+
+
+def test_netting_is_chronological_not_dump_order():
+    result = holdings([
+        trade("2023-03-03", "purchase", 15001, 50000),
+        trade("2023-02-03", "sale_full", 1001, 15000),
+        trade("2023-01-03", "purchase", 1001, 15000),
+    ])
+    assert (result["AAPL"]["value_low"], result["AAPL"]["value_high"]) == (15001, 50000)
+
+
+def test_people_are_netted_separately_and_combined_by_ticker():
+    trades = [
+        trade("2023-01-03", "purchase", 1001, 15000),
+        trade("2023-01-03", "purchase", 1001, 15000, representative="Dan Crenshaw"),
+        trade("2023-02-03", "sale_full", 1001, 15000, representative="Dan Crenshaw"),
+        trade("2023-01-05", "purchase", 15001, 50000, ticker="NVDA", representative="Dan Crenshaw"),
+    ]
+    engine = HoldingsEngine(trades, lambda ticker: "Technology")
+
+    combined = engine.for_representatives([PELOSI, "dan crenshaw"])
+    assert [(h["ticker"], h["value_low"]) for h in combined] == [("NVDA", 15001), ("AAPL", 1001)]
+    assert set(engine.for_all()) == {PELOSI, "dan crenshaw"}
+
+
+def test_change_percent_marks_entry_to_latest_close():
+    closes = ClosePrices(pd.DataFrame({
+        "symbol": ["AAPL", "AAPL", "AAPL"],
+        "date": ["2023-01-03", "2023-02-03", "2023-06-01"],
+        "close": [100.0, 150.0, 200.0],
+    }))
+    result = holdings([trade("2023-01-03", "purchase", 1000, 1000), trade("2023-02-03", "purchase", 1500, 1500)], closes)
+    # 10 shares at 100 and 10 at 150, now worth 4000 against 2500 paid
+    assert result["AAPL"]["change_percent"] == 60.0
+
+
+def test_change_percent_is_zero_without_prices():
+    assert holdings([trade("2023-01-03", "purchase", 1001, 15000)])["AAPL"]["change_percent"] == 0.0
+
+
+def test_exchanges_and_untickered_trades_are_ignored():
+    assert holdings([
+        trade("2023-01-03", "exchange", 1001, 15000),
+        trade("2023-01-03", "purchase", 1001, 15000, ticker="--"),
+        trade("2023-01-03", "purchase", None, None),
+    ]) == {}
@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.http import CircuitOpenError, HttpClients, Upstream
+
+
+class Flaky:
+    """Answers with each status in turn, then 200"""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        status = self.statuses.pop(0) if self.statuses else 200
+        if status == "drop":
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(status)
+
+
+def clients_for(upstream: Flaky, **config) -> HttpClients:
+    return HttpClients(
+        {"default": Upstream(backoff=0, **config)}, transport=httpx.MockTransport(upstream.handler)
+    )
+
+
+def run(clients: HttpClients, method: str = "GET"):
+    async def send():
+        try:
+            return await clients.request("api", method, "https://example.com/")
+        finally:
+            await clients.close()
+    return asyncio.run(send())
+
+
+def test_retryable_failures_are_retried():
+    upstream = Flaky(503, "drop")
+
+    assert run(clients_for(upstream, retries=2)).status_code == 200
+    assert len(upstream.requests) == 3
+
+
+def test_last_response_is_returned_once_retries_run_out():
+    upstream = Flaky(503, 503, 503, 503)
+
+    assert run(clients_for(upstream, retries=1)).status_code == 503
+    assert len(upstream.requests) == 2
+
+
+def test_other_errors_and_non_idempotent_requests_are_not_retried():
+    upstream = Flaky(404, 503)
+    clients = clients_for(upstream, retries=3)
+
+    assert run(clients).status_code == 404
+    assert run(clients, "POST").status_code == 503
+    assert len(upstream.requests) == 2
+
+
+def test_circuit_opens_after_consecutive_failures():
+    upstream = Flaky(*["drop"] * 3)
+    clients = clients_for(upstream, retries=0, failure_threshold=3, reset_timeout=60)
+
+    for _ in range(3):
+        with pytest.raises(httpx.ConnectError):
+            run(clients)
+    with pytest.raises(CircuitOpenError):
+        run(clients)
+
+    assert len(upstream.requests) == 3
+    assert clients.metrics() == {"api": {"circuit": "open", "consecutive_failures": 3}}
+
+
+def test_half_open_circuit_closes_after_a_successful_probe():
+    upstream = Flaky("drop")
+    clients = clients_for(upstream, retries=0, failure_threshold=1, reset_timeout=0)
+
+    with pytest.raises(httpx.ConnectError):
+        run(clients)
+    assert clients.breaker("api").state == "half_open"
+
+    assert run(clients).status_code == 200
+    assert clients.breaker("api").state == "closed"
+
+
+def test_one_pooled_client_per_upstream():
+    clients = HttpClients({"default": Upstream()})
+
+    assert clients.client("a") is clients.client("a")
+    assert clients.client("a") is not clients.client("b")
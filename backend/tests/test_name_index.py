@@ -0,0 +1,57 @@
+import pytest
+
+from app.services.name_index import NameIndex, soundex, tokens, trigrams
+
+NAMES = [
+    "hon. nancy pelosi",
+    "nancy mace",
+    "dan crenshaw",
+    "josh gottheimer",
+    "marjorie taylor greene",
+    "al green",
+    "mark e. green",
+    "hon. gilbert ray cisneros, jr.",
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return NameIndex(NAMES)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Nancy Pelosi", ["hon. nancy pelosi"]),
+    ("Hon. Nancy Pelosi", ["hon. nancy pelosi"]),
+    ("Pelosi", ["hon. nancy pelosi"]),
+    ("Pelosi, Nancy", ["hon. nancy pelosi"]),
+    ("NANCY   pelosi", ["hon. nancy pelosi"]),
+    ("Nancy Pelosy", ["hon. nancy pelosi"]),
+    ("Nancy", ["hon. nancy pelosi", "nancy mace"]),
+    ("Gotheimer", ["josh gottheimer"]),
+    ("Rep. Gilbert Cisneros", ["hon. gilbert ray cisneros, jr."]),
+    ("Green", ["al green", "mark e. green"]),
+    ("Greene", ["marjorie taylor greene"]),
+])
+def test_resolve(index, query, expected):
+    assert index.resolve(query) == expected
+
+
+@pytest.mark.parametrize("query", ["", "   ", "Hon.", "Zzyzx Qwerty"])
+def test_resolve_without_a_match(index, query):
+    assert index.resolve(query) == []
+
+
+def test_tokens_drop_accents_punctuation_and_honorifics():
+    assert tokens("Hon. José O'Rourke, Jr.") == ("jose", "orourke")
+
+
+@pytest.mark.parametrize("token, code", [
+    ("pelosi", "P420"), ("pelosy", "P420"), ("robert", "R163"), ("rupert", "R163"),
+    ("ashcraft", "A261"), ("tymczak", "T522"), ("a", "A000"), ("", ""),
+])
+def test_soundex(token, code):
+    assert soundex(token) == code
+
+
+def test_trigrams_are_word_padded():
+    assert trigrams(["al"]) == {"  a", " al", "al "}
@@ -0,0 +1,175 @@
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import async_engine
+from app.main import app
+from app.routers import sentiment
+
+from conftest import make_trade
+
+RECORDS = [
+    make_trade(0, ticker="AAPL"),
+    make_trade(1, ticker="MSFT", transaction_date="2023-02-01"),
+    make_trade(2, representative="Dan Crenshaw", ticker="XOM"),
+]
+
+
+@pytest.fixture
+def client(use_store):
+    use_store(RECORDS)
+    with TestClient(app) as client:
+        yield client
+
+
+def create(client, name="Watch", people=("Pelosi, Nancy",), widgets=("trades",)) -> dict:
+    response = client.post("/api/portfolios/", json={
+        "name": name,
+        "people": [{"name": person, "type": "politician"} for person in people],
+        "widgets": list(widgets),
+    })
+    assert response.status_code == 200
+    return response.json()
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def test_listing_costs_the_same_queries_for_any_number_of_portfolios(client):
+    create(client, "First")
+    with count_queries() as few:
+        assert len(client.get("/api/portfolios/").json()) == 1
+
+    for i in range(10):
+        create(client, f"More {i}", people=("Pelosi, Nancy", "Crenshaw"), widgets=("trades", "chart"))
+    with count_queries() as many:
+        listed = client.get("/api/portfolios/").json()
+
+    assert len(listed) == 11
+    assert few and len(many) == len(few)
+    assert [len(p["people"]) for p in listed] == [1] + [2] * 10
+
+
+def test_listing_pages_and_projects_fields(client):
+    ids = [create(client, f"Portfolio {i}")["id"] for i in range(5)]
+
+    first = client.get("/api/portfolios/", params={"limit": 2, "fields": "name"})
+    assert [p["id"] for p in first.json()] == ids[:2]
+    assert "people" not in first.json()[0] and "widgets" not in first.json()[0]
+
+    rest = client.get("/api/portfolios/", params={"limit": 10, "after_id": first.headers["X-Next-Cursor"]})
+    assert [p["id"] for p in rest.json()] == ids[2:]
+    assert "X-Next-Cursor" not in rest.headers
+
+
+def test_dashboard_combines_trades_holdings_and_sentiment(client, google_news):
+    portfolio = create(client, people=("Pelosi, Nancy", "Crenshaw"))
+
+    body = client.get(f"/api/portfolios/{portfolio['id']}/dashboard").json()
+
+    assert body["portfolio"]["id"] == portfolio["id"]
+    pelosi, crenshaw = body["people"]
+    assert [t["ticker"] for t in pelosi["trades"]] == ["MSFT", "AAPL"]
+    assert {h["ticker"] for h in pelosi["holdings"]} == {"AAPL", "MSFT"}
+    assert [t["ticker"] for t in crenshaw["trades"]] == ["XOM"]
+    assert pelosi["sentiment"]["mentions"] == 2
+    assert 0 <= pelosi["sentiment"]["overall"] <= 100
+    # Both people were scored, in one request each
+    assert len(google_news.requests) == 2
+
+
+def test_dashboard_of_a_missing_portfolio(client):
+    assert client.get("/api/portfolios/999/dashboard").status_code == 404
+
+
+def test_writes_report_the_rows_they_changed(client):
+    created = client.post("/api/portfolios/", json={
+        "name": "Watch", "people": [{"name": "Pelosi, Nancy", "type": "politician"}], "widgets": ["trades", "chart"],
+    })
+    assert created.headers["X-Rows-Changed"] == "people_inserted=1, people_deleted=0, widgets_inserted=2, widgets_deleted=0"
+    portfolio = created.json()
+    assert portfolio["people"][0]["identifier"].startswith("representative:")
+
+    url = f"/api/portfolios/{portfolio['id']}"
+    updated = client.put(url, json={
+        "name": "Watch", "people": [{"name": "Pelosi, Nancy", "type": "politician"}, {"name": "Crenshaw", "type": "politician"}],
+    })
+    assert updated.headers["X-Rows-Changed"] == "people_inserted=2, people_deleted=1, widgets_inserted=0, widgets_deleted=0"
+    assert [p["name"] for p in updated.json()["people"]] == ["Pelosi, Nancy", "Crenshaw"]
+
+    deleted = client.delete(url).json()
+    assert (deleted["people_deleted"], deleted["widgets_deleted"]) == (2, 2)
+    assert client.get(url).status_code == 404
+
+
+def test_widget_layouts_only_write_changed_rows(client):
+    portfolio = create(client, widgets=("trades", "chart"))
+    url = f"/api/portfolios/{portfolio['id']}/widgets"
+    trades_widget, chart_widget = portfolio["widgets"]
+
+    moved = {"widget_type": "trades", "widget_id": trades_widget["widget_id"], "x": 4, "y": 1, "w": 6, "h": 4}
+    unchanged = {key: chart_widget[key] for key in ("widget_type", "widget_id", "x", "y", "w", "h")}
+    assert client.put(url, json=[moved, unchanged]).json()["updated"] == 1
+    assert client.put(url, json=[moved, unchanged]).json()["updated"] == 0
+
+    # Matched by type when the portfolio has a single widget of it
+    assert client.put(url, json=[{"widget_type": "chart", "x": 8}]).json()["updated"] == 1
+    widgets = {w["widget_type"]: w for w in client.get(f"/api/portfolios/{portfolio['id']}").json()["widgets"]}
+    assert (widgets["trades"]["x"], widgets["trades"]["w"], widgets["chart"]["x"]) == (4, 6, 8)
+
+    assert client.put("/api/portfolios/999/widgets", json=[moved]).status_code == 404
+
+
+def test_portfolio_reads_revalidate_until_a_write(client):
+    portfolio = create(client)
+    url = f"/api/portfolios/{portfolio['id']}"
+    tag = client.get(url).headers["ETag"]
+    list_tag = client.get("/api/portfolios/").headers["ETag"]
+
+    assert client.get(url, headers={"If-None-Match": tag}).status_code == 304
+    assert client.get("/api/portfolios/", headers={"If-None-Match": list_tag}).status_code == 304
+
+    client.put(f"{url}/widgets", json=[{"widget_type": "trades", "x": 5}])
+    assert client.get(url, headers={"If-None-Match": tag}).status_code == 200
+    assert client.get("/api/portfolios/", headers={"If-None-Match": list_tag}).status_code == 200
+
+
+def wait_for_refreshes():
+    deadline = time.monotonic() + 5
+    while sentiment._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_dashboard_304_still_refreshes_stale_sentiment(client, google_news, monkeypatch):
+    portfolio = create(client)
+    url = f"/api/portfolios/{portfolio['id']}/dashboard"
+    first = client.get(url)
+    tag = first.headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": tag}).status_code == 304
+    assert len(google_news.requests) == 1
+
+    # Stale sentiment: the revalidation is still a 304, and a refresh starts behind it
+    monkeypatch.setattr(sentiment, "SENTIMENT_MAX_AGE", timedelta(0))
+    sentiment._news_cache.clear()
+    assert client.get(url, headers={"If-None-Match": tag}).status_code == 304
+    wait_for_refreshes()
+    assert len(google_news.requests) == 2
+
+    monkeypatch.setattr(sentiment, "SENTIMENT_MAX_AGE", timedelta(hours=1))
+    refreshed = client.get(url, headers={"If-None-Match": tag})
+    assert refreshed.status_code == 200
+    assert refreshed.json()["people"][0]["sentiment"]["observed_at"] > first.json()["people"][0]["sentiment"]["observed_at"]
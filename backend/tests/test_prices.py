@@ -0,0 +1,130 @@
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import prices
+
+
+class CountingProvider:
+    """Wraps a provider and records every range asked for"""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.calls = []
+
+    def history(self, symbol, start, end):
+        self.calls.append((symbol, start, end))
+        return self.provider.history(symbol, start, end)
+
+
+@pytest.fixture
+def fixtures(tmp_path):
+    days = pd.bdate_range(date.today() - timedelta(days=400), date.today())
+    closes = [100.0 + i for i in range(len(days))]
+    pd.DataFrame({
+        "date": days.strftime("%Y-%m-%d"), "open": closes, "high": closes, "low": closes, "close": closes,
+        "volume": 1000,
+    }).to_csv(tmp_path / "AAPL.csv", index=False)
+    provider = CountingProvider(prices.FixtureProvider(str(tmp_path)))
+    prices.set_provider(provider)
+    return provider
+
+
+def test_fixture_provider_serves_the_requested_range(fixtures):
+    frame = fixtures.provider.history("aapl", date.today() - timedelta(days=30), date.today())
+
+    assert list(frame.columns) == prices.COLUMNS
+    assert frame["date"].min() >= (date.today() - timedelta(days=30)).isoformat()
+    assert frame["date"].max() < date.today().isoformat()
+    assert fixtures.provider.history("MISSING", date(2020, 1, 1), date.today()).empty
+
+
+def test_load_bars_fetches_only_missing_history(fixtures):
+    today = date.today()
+    version = prices.version()
+
+    recent = prices.load_bars("AAPL", today - timedelta(days=30))
+    assert len(fixtures.calls) == 1
+    assert prices.version() == version + 1
+
+    # Served from the table while the tail is fresh
+    assert prices.load_bars("AAPL", today - timedelta(days=10)).equals(
+        recent[recent["date"] >= (today - timedelta(days=10)).isoformat()].reset_index(drop=True)
+    )
+    assert len(fixtures.calls) == 1
+
+    # Only the older range is fetched when reaching further back
+    longer = prices.load_bars("AAPL", today - timedelta(days=90))
+    assert fixtures.calls[-1] == ("AAPL", today - timedelta(days=90), today - timedelta(days=30))
+    assert len(longer) > len(recent)
+    assert longer["date"].is_monotonic_increasing and longer["date"].is_unique
+
+
+def test_uncovered_lists_symbols_short_of_their_start(fixtures):
+    today = date.today()
+    prices.load_bars("AAPL", today - timedelta(days=30))
+
+    starts = {"MSFT": today - timedelta(days=5), "AAPL": today - timedelta(days=60)}
+    assert prices.uncovered(starts) == ["MSFT", "AAPL"]
+    assert prices.uncovered({"AAPL": today - timedelta(days=20)}) == []
+
+
+def test_close_prices_look_back_to_the_last_close():
+    closes = prices.ClosePrices(pd.DataFrame({
+        "symbol": ["AAPL", "AAPL", "MSFT"],
+        "date": ["2023-01-03", "2023-01-06", "2023-01-03"],
+        "close": [100.0, 110.0, 200.0],
+    }))
+
+    found = closes.close_on(["AAPL", "AAPL", "MSFT", "AAPL", "NVDA"],
+                            ["2023-01-05", "2023-01-08", "2023-01-03", "2022-12-01", "2023-01-03"])
+    assert found[:3].tolist() == [100.0, 110.0, 200.0]
+    assert pd.isna(found[3]) and pd.isna(found[4])
+    assert closes.latest_close(["AAPL", "MSFT"]).tolist() == [110.0, 200.0]
+
+
+def test_stock_route_serves_stored_bars(fixtures):
+    with TestClient(app) as client:
+        bars = client.get("/api/trades/stock/AAPL").json()
+        assert client.get("/api/trades/stock/AAPL").json() == bars
+        assert client.get("/api/trades/stock/MISSING").status_code == 404
+        assert client.get("/api/trades/stock/AAPL", params={"period": "2w"}).status_code == 400
+
+    assert list(bars[0]) == ["time", "open", "high", "low", "close", "volume"]
+    assert [b["time"] for b in bars] == sorted(b["time"] for b in bars)
+    assert len([call for call in fixtures.calls if call[0] == "AAPL"]) == 1
+
+
+def test_batch_route_downsamples_and_reports_each_symbol(fixtures):
+    with TestClient(app) as client:
+        body = client.get("/api/trades/stocks", params={"symbols": "aapl, MISSING,AAPL", "period": "1y", "points": 20}).json()
+        assert client.get("/api/trades/stocks", params={"symbols": " , "}).status_code == 400
+        assert client.get("/api/trades/stocks", params={"symbols": "AAPL", "method": "median"}).status_code == 400
+
+    assert list(body["data"]) == ["AAPL"]
+    assert len(body["data"]["AAPL"]) == 20
+    assert body["errors"] == {"MISSING": "Stock not found"}
+
+
+def test_provider_failures_are_reported_not_mocked():
+    class Down:
+        def history(self, symbol, start, end):
+            raise RuntimeError("provider down")
+    prices.set_provider(Down())
+
+    with TestClient(app) as client:
+        single = client.get("/api/trades/stock/AAPL")
+        batch = client.get("/api/trades/stocks", params={"symbols": "AAPL"}).json()
+
+    assert single.status_code == 502
+    assert batch == {"period": "1mo", "data": {}, "errors": {"AAPL": "Failed to fetch prices"}}
+
+
+def test_day_numbers_parse_iso_dates_and_datetimes():
+    days = prices._day_numbers(["2023-01-02", "2023-01-03T00:00:00", pd.Timestamp("2023-01-04"), "", None, "soon"])
+
+    assert days[:3].tolist() == [19359, 19360, 19361]
+    assert (days[3:] == prices.NO_DAY).all()
@@ -0,0 +1,72 @@
+import asyncio
+from datetime import timedelta
+
+from app.services.refresh import SnapshotRefresher
+
+
+class Upstream:
+    """Counts fetches; each returns the next version, or raises while ``failing``"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failing = False
+        self.release = asyncio.Event()
+
+    async def fetch(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.failing:
+            raise RuntimeError("upstream down")
+        return f"v{self.calls}"
+
+
+def test_concurrent_callers_share_one_fetch():
+    async def run():
+        upstream = Upstream()
+        refresher = SnapshotRefresher(upstream.fetch, timedelta(hours=1))
+        waiting = [asyncio.create_task(refresher.get()) for _ in range(10)]
+        while not upstream.calls:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        upstream.release.set()
+        return upstream.calls, await asyncio.gather(*waiting)
+
+    calls, snapshots = asyncio.run(run())
+    assert calls == 1
+    assert snapshots == ["v1"] * 10
+
+
+def test_stale_snapshot_is_served_while_refreshing():
+    async def run():
+        upstream = Upstream()
+        upstream.release.set()
+        refresher = SnapshotRefresher(upstream.fetch, timedelta(seconds=30))
+        refresher.set("old", age=60)
+        assert refresher.is_stale
+
+        served = await refresher.get()
+        await refresher._inflight
+        return served, refresher.snapshot, refresher.is_stale
+
+    assert asyncio.run(run()) == ("old", "v1", False)
+
+
+def test_failed_refresh_keeps_the_snapshot():
+    async def run():
+        upstream = Upstream()
+        upstream.release.set()
+        refresher = SnapshotRefresher(upstream.fetch, timedelta(hours=1))
+        changes = []
+        refresher.add_listener(lambda previous, current: changes.append((previous, current)))
+
+        await refresher.refresh()
+        upstream.failing = True
+        await refresher.refresh()
+        await refresher.refresh()
+        return refresher, changes
+
+    refresher, changes = asyncio.run(run())
+    assert refresher.snapshot == "v1"
+    assert changes == [(None, "v1")]
+    assert (refresher.failure_count, refresher.consecutive_failures) == (2, 2)
+    assert refresher.metrics()["last_error"] == "upstream down"
@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.services import responses
+from app.services.responses import CompressionMiddleware, FastJSONResponse, dumps, json_bytes_response
+
+
+@pytest.mark.parametrize("orjson", [responses.orjson, None])
+def test_dumps_matches_the_stdlib_encoding(monkeypatch, orjson):
+    monkeypatch.setattr(responses, "orjson", orjson)
+    content = {"name": "Café", "values": [1, 2.5, None, True], "nested": {"empty": []}}
+
+    assert dumps(content) == json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def test_dumps_handles_numpy_and_int_keys():
+    if responses.orjson is None:
+        pytest.skip("orjson not installed")
+    assert json.loads(dumps({1: np.float64(2.5), "a": np.arange(3)})) == {"1": 2.5, "a": [0, 1, 2]}
+
+
+def app_with(routes) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+    for path, endpoint in routes.items():
+        app.get(path)(endpoint)
+    return TestClient(app)
+
+
+def test_large_responses_are_compressed_and_small_ones_are_not():
+    rows = [{"ticker": "AAPL", "close": 100.0 + i} for i in range(200)]
+    client = app_with({
+        "/large": lambda: FastJSONResponse(rows),
+        "/small": lambda: json_bytes_response(b'{"ok":true}'),
+    })
+
+    large = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert large.headers["content-encoding"] in ("gzip", "br")
+    assert large.json() == rows
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.json() == {"ok": True}
+
+
+def test_event_streams_are_not_compressed():
+    client = app_with({"/events": lambda: json_bytes_response(b"x" * 5000)})
+
+    response = client.get("/events", headers={"Accept-Encoding": "gzip", "Accept": "text/event-stream"})
+
+    assert "content-encoding" not in response.headers
+    assert response.content == b"x" * 5000
+
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"other", "abc"', True),
+    ('"other"', False),
+    ("*", True),
+])
+def test_if_none_match(header, matches):
+    request = Request({"type": "http", "headers": [(b"if-none-match", header.encode())] if header else []})
+
+    assert responses.is_not_modified(request, '"abc"') is matches
+
+
+def test_tags_identify_their_parts():
+    assert responses.etag("trades", 1, ("a", None)) == responses.etag("trades", 1, ("a", None))
+    assert responses.etag("trades", 1) != responses.etag("trades", 2)
+    assert responses.body_etag(b"[1]") != responses.body_etag(b"[2]")
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import jobs
+from app.main import app
+from app.services import prices, scheduler as scheduler_module
+from app.services.scheduler import Job, JobScheduler
+
+from conftest import make_trade
+
+HOUR = timedelta(hours=1)
+
+
+def test_failures_back_off_up_to_the_interval():
+    job = Job("flaky", None, timedelta(minutes=5), jitter=0)
+
+    delays = []
+    for failures in range(6):
+        job.consecutive_failures = failures
+        delays.append(job.next_delay())
+
+    base = scheduler_module.BACKOFF_BASE_SECONDS
+    assert delays == [300, base, base * 2, base * 4, base * 8, 300]
+
+
+def test_triggered_jobs_run_within_the_concurrency_limit():
+    async def run():
+        scheduler = JobScheduler(concurrency=2)
+        running, peak = [0], [0]
+
+        async def work():
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.02)
+            running[0] -= 1
+
+        for name in ("a", "b", "c"):
+            scheduler.add(name, work, HOUR, initial_delay=HOUR)
+        scheduler.start()
+        for name in ("a", "b", "c"):
+            scheduler.trigger(name)
+        while sum(job.runs for job in scheduler.jobs.values()) < 3:
+            await asyncio.sleep(0.005)
+        status = scheduler.status()
+        await scheduler.stop()
+        return peak[0], status, scheduler.started
+
+    peak, status, started = asyncio.run(asyncio.wait_for(run(), 5))
+    assert peak == 2
+    assert [job["runs"] for job in status["jobs"]] == [1, 1, 1]
+    assert status["started"] and not started
+
+
+def test_failed_and_timed_out_runs_are_recorded():
+    async def run():
+        scheduler = JobScheduler()
+
+        async def fail():
+            raise RuntimeError("upstream down")
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        failing = scheduler.add("fail", fail, HOUR, initial_delay=HOUR)
+        hanging = scheduler.add("hang", hang, HOUR, initial_delay=HOUR, timeout=timedelta(seconds=0.01))
+        scheduler.start()
+        scheduler.trigger("fail")
+        scheduler.trigger("hang")
+        while failing.runs + hanging.runs < 2:
+            await asyncio.sleep(0.005)
+        await scheduler.stop()
+        return failing, hanging
+
+    failing, hanging = asyncio.run(run())
+    assert (failing.failures, failing.last_error) == (1, "upstream down")
+    assert (hanging.failures, hanging.last_error) == (1, "TimeoutError")
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    """A fresh app scheduler with one job that counts its runs"""
+    monkeypatch.setattr(jobs, "scheduler", JobScheduler())
+    runs = []
+
+    async def count():
+        runs.append(1)
+    jobs.scheduler.add("count", count, HOUR, initial_delay=HOUR)
+    return runs
+
+
+def test_admin_routes_list_and_trigger_jobs(scheduled):
+    with TestClient(app) as client:
+        assert client.post("/api/admin/jobs/count/run").status_code == 202
+        for _ in range(100):
+            if scheduled:
+                break
+            time.sleep(0.01)
+        status = client.get("/api/admin/jobs").json()
+        assert client.post("/api/admin/jobs/missing/run").status_code == 404
+
+    assert scheduled == [1]
+    assert status["started"]
+    assert [(job["name"], job["runs"]) for job in status["jobs"]] == [("count", 1)]
+
+
+def test_jobs_added_after_start_cant_be_triggered(scheduled):
+    async def noop():
+        pass
+
+    with TestClient(app) as client:
+        jobs.scheduler.add("late", noop, HOUR)
+        assert client.post("/api/admin/jobs/late/run").status_code == 409
+
+
+def test_prewarm_warms_tracked_people_and_their_prices(use_store, tmp_path):
+    fetched = []
+
+    class Recording:
+        def history(self, symbol, start, end):
+            fetched.append(symbol)
+            return prices.FixtureProvider(str(tmp_path)).history(symbol, start, end)
+    prices.set_provider(Recording())
+    use_store([make_trade(0, ticker="AAPL"), make_trade(1, ticker="MSFT"), make_trade(2, representative="Other", ticker="XOM")])
+
+    with TestClient(app) as client:
+        client.post("/api/portfolios/", json={"name": "Watch", "people": [{"name": "Pelosi", "type": "politician"}]})
+        asyncio.run(jobs.prewarm_people())
+
+    assert sorted(fetched) == ["AAPL", "MSFT"]
@@ -0,0 +1,47 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import sectors
+
+from conftest import make_trade
+
+
+def test_sector_lookup():
+    assert sectors.sector_for("AAPL") == "Technology"
+    assert sectors.sector_for("ABBV") == "Healthcare"
+    assert sectors.sector_for("NOT-A-TICKER") == sectors.UNKNOWN_SECTOR
+
+
+def test_refresh_merges_fetched_symbols_into_the_file(tmp_path, monkeypatch):
+    path = tmp_path / "sectors.csv"
+    path.write_text("symbol,sector,industry\nAAPL,Technology,Consumer Electronics\nXOM,Energy,Oil & Gas\n")
+    known = {"XOM": ("Energy", "Oil & Gas Integrated"), "NEWCO": ("Industrials", "Airlines")}
+    fetched = []
+
+    def fetch(symbols):
+        fetched.append(list(symbols))
+        return {s: known[s] for s in symbols if s in known}
+    monkeypatch.setattr(sectors, "_fetch", fetch)
+
+    assert sectors.refresh(["newco", "XOM", "AAPL"], path=path, missing_only=True) == 1
+    assert sectors.refresh(["XOM", "UNKNOWN"], path=path) == 1
+    assert fetched == [["NEWCO"], ["UNKNOWN", "XOM"]]
+    assert sectors.load(path) == {
+        "AAPL": ("Technology", "Consumer Electronics"),
+        "NEWCO": ("Industrials", "Airlines"),
+        "XOM": ("Energy", "Oil & Gas Integrated"),
+    }
+
+
+def test_sector_exposure_route(use_store):
+    use_store([
+        make_trade(0, ticker="AAPL", amount="$15,001 - $50,000"),
+        make_trade(1, ticker="XOM"),
+        make_trade(2, ticker="ZZZZ"),
+    ])
+
+    with TestClient(app) as client:
+        exposure = client.get("/api/trades/sectors/Pelosi").json()
+
+    assert [s["name"] for s in exposure] == ["Technology", "Energy", sectors.UNKNOWN_SECTOR]
+    assert round(sum(s["value"] for s in exposure)) == 100
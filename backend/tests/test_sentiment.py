@@ -0,0 +1,152 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import AsyncSessionLocal
+from app.main import app
+from app.routers import sentiment
+from app.routers.sentiment import SentimentSource
+from app.services import sentiment_history
+from app.services.http import Upstream, http_clients
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_news_is_fetched_once_per_normalized_query(client, google_news):
+    hits = client.get("/api/sentiment/cache/stats").json()["hits"]
+    first = client.get("/api/sentiment/news/Nancy Pelosi").json()
+    again = client.get("/api/sentiment/news/  nancy   PELOSI ", params={"limit": 1}).json()
+
+    assert [item["title"] for item in first] == google_news.headlines
+    assert again == first[:1]
+    assert len(google_news.requests) == 1
+    assert client.get("/api/sentiment/cache/stats").json()["hits"] == hits + 1
+
+
+def test_news_headlines_are_labelled(client, google_news):
+    rally, fall = client.get("/api/sentiment/news/Pelosi").json()
+
+    assert (rally["sentiment"], fall["sentiment"]) == ("positive", "negative")
+    assert rally["sentiment_score"] > 0 > fall["sentiment_score"]
+
+
+def test_reddit_is_reported_unavailable_rather_than_scored(client, google_news):
+    body = client.get("/api/sentiment/Pelosi").json()
+
+    assert body["reddit"] is None
+    assert body["sources"]["reddit"] == {"status": "unavailable", "score": None, "mentions": 0, "latency_ms": None}
+    assert body["mentions"] == body["sources"]["news"]["mentions"] == 2
+
+
+def source(scores, delay=0.0, error=None):
+    async def fetch(query):
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return scores
+    return fetch
+
+
+def test_sources_are_queried_concurrently_and_fail_alone(monkeypatch):
+    monkeypatch.setattr(sentiment, "SENTIMENT_SOURCES", {
+        "first": SentimentSource(source([0.5, 0.5], delay=0.2), timeout=1.0),
+        "second": SentimentSource(source([-0.5], delay=0.2), timeout=1.0),
+        "slow": SentimentSource(source([1.0], delay=5.0), timeout=0.1),
+        "broken": SentimentSource(source([], error=RuntimeError("boom")), timeout=1.0),
+    })
+
+    started = time.monotonic()
+    result = asyncio.run(sentiment._score_sentiment("Pelosi"))
+
+    assert time.monotonic() - started < 0.4
+    assert {name: s["status"] for name, s in result["sources"].items()} == {
+        "first": "ok", "second": "ok", "slow": "timeout", "broken": "error", "reddit": "unavailable",
+    }
+    assert (result["first"], result["second"], result["slow"], result["broken"]) == (75, 25, None, None)
+    assert result["overall"] == 58
+    assert result["mentions"] == 3
+
+
+def test_failed_news_gives_no_score(client, google_news, monkeypatch):
+    monkeypatch.setitem(http_clients.upstreams, "google_news", Upstream(retries=0))
+    google_news.status = 500
+
+    body = client.get("/api/sentiment/Pelosi").json()
+
+    assert body["sources"]["news"]["status"] == "error"
+    assert (body["overall"], body["news"], body["mentions"]) == (None, None, 0)
+
+
+def stored(query):
+    async def read():
+        async with AsyncSessionLocal() as db:
+            aggregate = await sentiment_history.get_aggregate(db, query)
+            since = datetime.utcnow() - timedelta(days=1)
+            return aggregate, len(await sentiment_history.get_observations(db, query, since, 100))
+    return asyncio.run(read())
+
+
+def test_an_outage_is_not_recorded(client, google_news, monkeypatch):
+    monkeypatch.setitem(http_clients.upstreams, "google_news", Upstream(retries=0))
+    google_news.status = 500
+    client.get("/api/sentiment/Pelosi")
+    assert stored("Pelosi") == (None, 0)
+
+    google_news.status = 200
+    client.get("/api/sentiment/Pelosi")
+    aggregate, observations = stored("Pelosi")
+    assert (aggregate.observation_count, observations) == (1, 1)
+
+    google_news.status = 500
+    sentiment._news_cache.clear()
+    assert asyncio.run(sentiment.refresh_sentiment("Pelosi")).observation_count == 1
+    assert stored("Pelosi")[0].ema_24h == aggregate.ema_24h
+    assert stored("Pelosi")[1] == 1
+
+
+def record(query, observed_at, overall=60):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await sentiment_history.record(db, query, {"overall": overall, "mentions": 1}, observed_at)
+    asyncio.run(run())
+
+
+def test_history_route_is_not_shadowed_by_the_source_routes(client):
+    record("news", datetime.utcnow())
+
+    body = client.get("/api/sentiment/history/news").json()
+
+    assert body["query"] == "news"
+    assert [o["overall"] for o in body["observations"]] == [60]
+    assert client.get("/api/sentiment/history/nobody").status_code == 404
+
+
+def test_history_etag_follows_the_sliding_window(client, monkeypatch):
+    now = datetime.utcnow()
+    record("Pelosi", now - timedelta(minutes=59, seconds=50), overall=40)
+    record("Pelosi", now, overall=80)
+    url = "/api/sentiment/history/Pelosi?hours=1"
+
+    first = client.get(url)
+    tag = first.headers["ETag"]
+    assert [o["overall"] for o in first.json()["observations"]] == [80, 40]
+    assert client.get(url, headers={"If-None-Match": tag}).status_code == 304
+    assert client.get(url + "&limit=1", headers={"If-None-Match": tag}).status_code == 200
+
+    class Later(datetime):
+        @classmethod
+        def utcnow(cls):
+            return now + timedelta(seconds=20)
+    monkeypatch.setattr(sentiment, "datetime", Later)
+
+    # Nothing was recorded, but the older observation left the window
+    later = client.get(url, headers={"If-None-Match": tag})
+    assert later.status_code == 200
+    assert [o["overall"] for o in later.json()["observations"]] == [80]
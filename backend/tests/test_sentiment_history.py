@@ -0,0 +1,59 @@
+import asyncio
+import math
+from datetime import datetime, timedelta
+
+from app.database import AsyncSessionLocal
+from app.services import sentiment_history
+
+START = datetime(2024, 1, 1, 12)
+
+
+def record_all(query, observations):
+    """Record (minutes after START, overall) observations; returns the aggregate"""
+    async def run():
+        async with AsyncSessionLocal() as db:
+            aggregate = None
+            for minutes, overall in observations:
+                aggregate = await sentiment_history.record(
+                    db, query, {"overall": overall, "mentions": 1}, START + timedelta(minutes=minutes)
+                )
+            return aggregate
+    return asyncio.run(run())
+
+
+def test_aggregates_decay_with_the_time_between_observations():
+    aggregate = record_all("Nancy Pelosi", [(0, 40), (60, 80)])
+
+    for name, window in sentiment_history.WINDOWS.items():
+        decay = math.exp(-3600 / window.total_seconds())
+        assert math.isclose(getattr(aggregate, f"ema_{name}"), 40 * decay + 80 * (1 - decay))
+        assert math.isclose(getattr(aggregate, f"count_{name}"), decay + 1)
+    assert aggregate.observation_count == 2
+    assert (aggregate.first_observed_at, aggregate.last_observed_at) == (START, START + timedelta(hours=1))
+
+
+def test_queries_are_normalized_and_trend_compares_windows():
+    record_all("Nancy Pelosi", [(0, 50), (60 * 24, 50)])
+    aggregate = record_all("  nancy   PELOSI", [(60 * 24 + 30, 90)])
+
+    assert aggregate.query == "nancy pelosi"
+    assert aggregate.observation_count == 3
+    assert sentiment_history.trend(aggregate) == "up"
+    assert sentiment_history.summarize(aggregate)["deltas"]["1h_vs_24h"] > sentiment_history.TREND_THRESHOLD
+
+
+def test_out_of_order_observations_keep_the_latest_time():
+    aggregate = record_all("Crenshaw", [(60, 50), (0, 70)])
+
+    assert aggregate.last_observed_at == START + timedelta(hours=1)
+
+
+def test_observations_are_read_newest_first_within_the_window():
+    record_all("Crenshaw", [(0, 10), (30, 20), (60, 30), (90, 40)])
+
+    async def read(since, limit):
+        async with AsyncSessionLocal() as db:
+            return [o.overall for o in await sentiment_history.get_observations(db, "crenshaw", since, limit)]
+
+    assert asyncio.run(read(START + timedelta(minutes=30), 10)) == [40, 30, 20]
+    assert asyncio.run(read(START, 2)) == [40, 30]
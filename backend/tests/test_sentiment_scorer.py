@@ -0,0 +1,53 @@
+import pytest
+
+from app.services.sentiment_scorer import CachedScorer, LexiconScorer, label, to_percent
+
+
+@pytest.fixture
+def scorer():
+    return LexiconScorer()
+
+
+def test_polarity_negation_and_boosters(scorer):
+    good, bad, not_good, very_good, plain = scorer.score_batch([
+        "Profits beat expectations", "Shares plunge after losses", "Results are not good",
+        "Results are very good", "The committee met on Tuesday",
+    ])
+
+    assert good > 0 > bad
+    assert not_good < 0
+    assert very_good > scorer.score_batch(["Results are good"])[0] > 0
+    assert plain == 0.0
+    assert all(-1 <= score <= 1 for score in (good, bad, not_good, very_good))
+
+
+def test_batch_scores_match_single_scores(scorer):
+    texts = ["Stocks rally", "", "Not a great day: shares fall", "Don't panic"]
+
+    assert scorer.score_batch(texts) == [scorer.score_batch([text])[0] for text in texts]
+    assert scorer.score_batch([]) == []
+
+
+def test_repeat_texts_are_scored_once():
+    class Counting:
+        def __init__(self):
+            self.scored = []
+
+        def score_batch(self, texts):
+            self.scored.extend(texts)
+            return [0.5] * len(texts)
+
+    inner = Counting()
+    cached = CachedScorer(inner)
+
+    assert cached.score_batch(["a", "b"]) == [0.5, 0.5]
+    assert cached.score_batch(["b", "c", "a"]) == [0.5, 0.5, 0.5]
+    assert inner.scored == ["a", "b", "c"]
+    assert (cached.cache.hits, cached.cache.misses) == (2, 3)
+
+
+def test_labels_and_percentages():
+    assert [label(s) for s in (0.6, 0.0, -0.6)] == ["positive", "neutral", "negative"]
+    assert to_percent([1.0, 0.0]) == 75
+    assert to_percent([]) is None
+    assert to_percent([], default=50) == 50
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.models import Representative, Trade
+from app.services import trade_ingest
+
+from conftest import make_trade
+
+
+@pytest.fixture
+def ingest(tmp_path):
+    """Write records as a dump file and ingest it"""
+    def run(records):
+        path = tmp_path / "dump.json"
+        path.write_text(json.dumps(records))
+        return trade_ingest.ingest_file(path)
+    return run
+
+
+def stored_ids():
+    with SessionLocal() as db:
+        return dict(db.execute(select(Trade.trade_hash, Trade.id)).all())
+
+
+def test_first_ingest_inserts_every_record(ingest):
+    records = [make_trade(i, ticker=f"T{i}") for i in range(5)]
+
+    assert ingest(records) == {"inserted": 5, "updated": 0, "deleted": 0}
+    assert trade_ingest.has_trades()
+    assert [t["ticker"] for t in trade_ingest.load_trades()] == [f"T{i}" for i in range(5)]
+
+
+def test_unchanged_dump_writes_nothing(ingest):
+    records = [make_trade(i) for i in range(5)]
+    ingest(records)
+    ids = stored_ids()
+
+    assert ingest(records) == {"inserted": 0, "updated": 0, "deleted": 0}
+    assert stored_ids() == ids
+
+
+def test_record_inserted_mid_dump_only_inserts_itself(ingest):
+    records = [make_trade(i, ticker=f"T{i}") for i in range(5)]
+    ingest(records)
+
+    records.insert(1, make_trade(99, ticker="NEW"))
+
+    assert ingest(records) == {"inserted": 1, "updated": 0, "deleted": 0}
+    assert len(trade_ingest.load_trades()) == 6
+
+
+def test_edited_and_removed_records(ingest):
+    records = [make_trade(i, ticker=f"T{i}") for i in range(5)]
+    ingest(records)
+
+    records[2]["amount"] = "$15,001 - $50,000"
+    del records[4]
+
+    assert ingest(records) == {"inserted": 0, "updated": 1, "deleted": 1}
+    trades = {t["ticker"]: t for t in trade_ingest.load_trades()}
+    assert set(trades) == {"T0", "T1", "T2", "T3"}
+    assert (trades["T2"]["amount_low"], trades["T2"]["amount_high"]) == (15001.0, 50000.0)
+
+
+def test_repeated_lots_are_told_apart(ingest):
+    # Same person, day, ticker and filing: several lots
+    records = [make_trade(0), make_trade(0), make_trade(0)]
+    assert ingest(records)["inserted"] == 3
+
+    assert ingest(records[:2]) == {"inserted": 0, "updated": 0, "deleted": 1}
+
+
+def test_representatives_and_missing_fields(ingest):
+    ingest([
+        make_trade(0),
+        make_trade(1, representative="Dan Crenshaw", district="TX02", ticker="--", type=None, amount=None),
+    ])
+
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count()).select_from(Representative)) == 2
+    crenshaw = next(t for t in trade_ingest.load_trades() if t["representative"] == "Dan Crenshaw")
+    assert crenshaw["ticker"] == "--"
+    assert crenshaw["type"] is None
+    assert crenshaw["amount_low"] is None
+    assert crenshaw["district"] == "TX02"
+    assert crenshaw["representative_id"] is not None
+
+
+def test_failed_ingest_rolls_back(ingest, monkeypatch):
+    ingest([make_trade(i, ticker=f"T{i}") for i in range(3)])
+
+    def fail(self):
+        raise RuntimeError("database is locked")
+    monkeypatch.setattr(trade_ingest._Ingestor, "delete_unseen", fail)
+
+    with pytest.raises(RuntimeError):
+        ingest([make_trade(i, ticker=f"T{i}") for i in range(10)])
+    assert len(trade_ingest.load_trades()) == 3
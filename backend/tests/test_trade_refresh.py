@@ -0,0 +1,150 @@
+"""Trade refreshes against a stubbed House Stock Watcher: downloads, 304s and failures"""
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.routers import trades
+from app.services import trade_ingest, trade_persistence
+from app.services.http import Upstream, http_clients
+
+from conftest import make_trade
+
+
+class StubUpstream:
+    """Serves a dump with an ETag and answers a matching If-None-Match with 304"""
+
+    def __init__(self, records, etag='"v1"'):
+        self.requests = []
+        self.publish(records, etag)
+
+    def publish(self, records, etag):
+        self.body = json.dumps(records).encode()
+        self.etag = etag
+
+    def respond(self, if_none_match):
+        if if_none_match == self.etag:
+            return 304, {}, b""
+        return 200, {"ETag": self.etag, "Content-Type": "application/json"}, self.body
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        status, headers, body = self.respond(request.headers.get("if-none-match"))
+        return httpx.Response(status, headers=headers, content=body)
+
+
+@pytest.fixture
+def upstream():
+    stub = StubUpstream([make_trade(i, ticker=f"T{i}") for i in range(3)])
+    http_clients.configure(httpx.MockTransport(stub.handler))
+    return stub
+
+
+def refresh():
+    async def run():
+        try:
+            await trades._trades_cache.refresh()
+        finally:
+            # Clients are bound to this event loop
+            await http_clients.close()
+    asyncio.run(run())
+    return trades._trades_cache.snapshot
+
+
+def test_refresh_downloads_then_revalidates(upstream):
+    store = refresh()
+
+    assert len(store) == 3
+    assert trade_persistence.read_meta()["etag"] == '"v1"'
+    assert "if-none-match" not in upstream.requests[0].headers
+
+    assert refresh() is store
+    assert upstream.requests[1].headers["if-none-match"] == '"v1"'
+    assert trades._trades_cache.consecutive_failures == 0
+
+
+def test_changed_dump_is_ingested(upstream):
+    first = refresh()
+    upstream.publish([make_trade(i, ticker=f"T{i}") for i in range(5)], '"v2"')
+
+    second = refresh()
+
+    assert second is not first
+    assert len(second) == 5
+    assert trade_persistence.read_meta()["etag"] == '"v2"'
+
+
+def test_failed_ingest_keeps_the_previous_validators(upstream, monkeypatch):
+    first = refresh()
+    upstream.publish([make_trade(i, ticker=f"T{i}") for i in range(5)], '"v2"')
+    ingest_file = trade_ingest.ingest_file
+
+    def locked(path):
+        raise RuntimeError("database is locked")
+    monkeypatch.setattr(trade_ingest, "ingest_file", locked)
+
+    assert refresh() is first
+    assert trades._trades_cache.consecutive_failures == 1
+    assert trade_persistence.read_meta()["etag"] == '"v1"'
+
+    # The retry downloads again instead of getting a 304 for the unloaded dump
+    monkeypatch.setattr(trade_ingest, "ingest_file", ingest_file)
+    assert len(refresh()) == 5
+    assert upstream.requests[-1].headers["if-none-match"] == '"v1"'
+
+
+def test_upstream_errors_keep_serving_the_snapshot(upstream, monkeypatch):
+    monkeypatch.setitem(http_clients.upstreams, "house_stock_watcher", Upstream(retries=1, backoff=0))
+    first = refresh()
+
+    upstream.respond = lambda if_none_match: (503, {}, b"")
+    assert refresh() is first
+    assert len(upstream.requests) == 3  # The failed refresh retried once
+    assert trades._trades_cache.last_error
+
+
+def test_startup_loads_the_dump_on_disk(upstream):
+    refresh()
+    trades._trades_cache.snapshot = None
+    requests = len(upstream.requests)
+
+    asyncio.run(trades.load_persisted_trades())
+
+    assert len(trades._trades_cache.snapshot) == 3
+    assert not trades._trades_cache.is_stale
+    assert len(upstream.requests) == requests
+
+
+def test_refresh_from_a_local_stub_server(monkeypatch):
+    """HOUSE_STOCK_WATCHER_URL pointed at a local server, over real HTTP"""
+    stub = StubUpstream([make_trade(i, ticker=f"T{i}") for i in range(4)])
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            stub.requests.append(dict(self.headers))
+            status, headers, body = stub.respond(self.headers.get("If-None-Match"))
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(trades, "HOUSE_STOCK_WATCHER_API", f"http://127.0.0.1:{server.server_port}/all_transactions.json")
+    try:
+        store = refresh()
+        assert refresh() is store
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert len(store) == 4
+    assert stub.requests[1]["If-None-Match"] == '"v1"'
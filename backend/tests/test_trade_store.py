@@ -0,0 +1,160 @@
+import random
+
+import pytest
+
+from app.services.trade_store import TradeStore, iso_date, normalize_name, trade_side
+
+NAMES = ["Hon. Nancy Pelosi", "Dan Crenshaw", "Josh Gottheimer"]
+TICKERS = ["AAPL", "MSFT", "NVDA", "--"]
+AMOUNTS = [(1001.0, 15000.0), (15001.0, 50000.0), (50001.0, 100000.0), (None, None)]
+
+
+def random_trades(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    trades = []
+    for i in range(count):
+        year, month, day = rng.choice([2020, 2021, 2022, 2023]), rng.randint(1, 12), rng.randint(1, 28)
+        low, high = rng.choice(AMOUNTS)
+        trades.append({
+            "trade_hash": f"{rng.getrandbits(64):016x}",
+            "representative": rng.choice(NAMES),
+            "ticker": rng.choice(TICKERS),
+            "type": rng.choice(["purchase", "sale_full", "sale_partial", None]),
+            "owner": rng.choice(["self", "spouse", None]),
+            "transaction_date": f"{year}-{month:02d}-{day:02d}",
+            # Month first, like the dump, and a few days later
+            "disclosure_date": f"{month:02d}/{min(day + rng.randint(0, 3), 28):02d}/{year}",
+            "amount_low": low,
+            "amount_high": high,
+        })
+    return trades
+
+
+def test_indexes_hold_every_matching_position():
+    trades = random_trades(500)
+    store = TradeStore(trades)
+
+    for name in NAMES:
+        expected = [i for i, t in enumerate(trades) if normalize_name(t["representative"]) == normalize_name(name)]
+        assert store.by_representative[normalize_name(name)] == expected
+    for ticker in TICKERS:
+        assert store.by_ticker[ticker] == [i for i, t in enumerate(trades) if t["ticker"] == ticker]
+    assert sum(len(positions) for positions in store.by_transaction_day.values()) == len(trades)
+
+
+def test_name_lookups_go_through_the_index():
+    store = TradeStore(random_trades(50))
+
+    assert store.match_names("Pelosi") == ["hon. nancy pelosi"]
+    assert store.match_names("Nobody Known") == []
+
+
+def test_derived_data_is_built_once_per_snapshot():
+    trades = random_trades(20)
+    store = TradeStore(trades)
+    builds = []
+
+    def build(s):
+        builds.append(s)
+        return len(s)
+
+    assert store.derive("count", build) == store.derive("count", build) == 20
+    assert builds == [store]
+    # A refresh builds a new store, which starts without derived data
+    assert TradeStore(trades).derive("count", build) == 20
+    assert len(builds) == 2
+    assert TradeStore(trades).version != store.version
+
+
+def brute_force(trades, date_field, names=None, ticker=None, side=None, owner=None,
+                since=None, until=None, min_amount=None, max_amount=None):
+    def matches(t):
+        day = iso_date(t[date_field])
+        return (
+            (names is None or normalize_name(t["representative"]) in names)
+            and (ticker is None or t["ticker"] == ticker)
+            and (side is None or trade_side(t) == side)
+            and (owner is None or (t["owner"] or "") == owner)
+            and (since is None or day >= since)
+            and (until is None or day <= until)
+            and (min_amount is None or (t["amount_high"] is not None and t["amount_high"] >= min_amount))
+            and (max_amount is None or (t["amount_low"] is not None and t["amount_low"] <= max_amount))
+        )
+    return sorted(
+        (t for t in trades if matches(t)),
+        key=lambda t: (iso_date(t[date_field]), t["trade_hash"]),
+        reverse=True,
+    )
+
+
+def all_pages(order, limit, **filters):
+    pages, cursor = [], None
+    while True:
+        page, cursor = order.page(limit, cursor=cursor, **filters)
+        pages.append(page)
+        if cursor is None:
+            return pages
+
+
+FILTERS = [
+    {},
+    {"ticker": "AAPL"},
+    {"side": "sell", "owner": "spouse"},
+    {"names": ["dan crenshaw"], "since": "2021-03-01", "until": "2022-10-15"},
+    {"since": "2023-02-01"},
+    {"until": "2020-06-30", "min_amount": 20000.0},
+    {"max_amount": 15000.0, "ticker": "NVDA"},
+    {"names": [], "ticker": "AAPL"},
+]
+
+
+@pytest.mark.parametrize("date_field", ["transaction_date", "disclosure_date"])
+@pytest.mark.parametrize("filters", FILTERS)
+def test_pages_match_brute_force(date_field, filters):
+    trades = random_trades(2000)
+    store = TradeStore(trades)
+    order = store.transactions if date_field == "transaction_date" else store.disclosures
+
+    pages = all_pages(order, 37, **filters)
+
+    assert all(len(page) == 37 for page in pages[:-1])
+    assert [t for page in pages for t in page] == brute_force(trades, date_field, **filters)
+
+
+def test_cursor_survives_a_refresh_with_new_trades():
+    trades = random_trades(500)
+    first, cursor = TradeStore(trades).transactions.page(50)
+
+    newer = dict(trades[0], trade_hash="f" * 16, transaction_date="2024-01-01")
+    rest, _ = TradeStore([newer] + trades).transactions.page(1000, cursor=cursor)
+
+    assert first + rest == brute_force(trades, "transaction_date")
+
+
+def test_disclosure_order_sorts_month_first_dates_by_year():
+    trades = [
+        {"trade_hash": "a", "disclosure_date": "12/01/2021"},
+        {"trade_hash": "b", "disclosure_date": "01/15/2023"},
+        {"trade_hash": "c", "disclosure_date": "06/30/2022"},
+    ]
+    order = TradeStore(trades).disclosures
+
+    assert [t["trade_hash"] for t in order.page(10)[0]] == ["b", "c", "a"]
+    assert [t["trade_hash"] for t in order.page(10, since="2022-01-01")[0]] == ["b", "c"]
+
+
+def test_zero_limit_is_an_empty_last_page():
+    assert TradeStore(random_trades(10)).transactions.page(0) == ([], None)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2023-03-01", "2023-03-01"),
+    ("03/01/2023", "2023-03-01"),
+    ("3/1/2023", "2023-03-01"),
+    ("2023-03-01T00:00:00", "2023-03-01"),
+    ("", ""),
+    (None, ""),
+    ("unknown", ""),
+])
+def test_iso_date(value, expected):
+    assert iso_date(value) == expected
@@ -0,0 +1,169 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import trades
+from app.services.trade_store import TradeStore
+
+from conftest import make_trade
+
+RECORDS = [
+    make_trade(i, ticker=ticker, transaction_date=f"2023-{month:02d}-10", disclosure_date=f"{month:02d}/20/{year}")
+    for i, (ticker, month, year) in enumerate([
+        ("AAPL", 1, 2023), ("MSFT", 2, 2022), ("NVDA", 3, 2023), ("AAPL", 4, 2021), ("TSLA", 5, 2023),
+    ])
+] + [
+    make_trade(10, representative="Dan Crenshaw", ticker="XOM", type="sale_full"),
+    make_trade(11, representative="Dan Crenshaw", ticker="--", type=None, amount=None, asset_description=None),
+]
+
+
+@pytest.fixture
+def client(use_store):
+    use_store(RECORDS)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_recent_is_ordered_by_disclosure_date_across_years(client):
+    response = client.get("/api/trades/recent")
+
+    assert response.status_code == 200
+    filed = [t["filed_date"] for t in response.json()]
+    assert filed[:4] == ["05/20/2023", "03/20/2023", "01/20/2023", "01/20/2023"]
+    assert filed[-2:] == ["02/20/2022", "04/20/2021"]
+
+    since = client.get("/api/trades/recent", params={"since": "2023-01-01"}).json()
+    assert all(t["filed_date"].endswith("2023") for t in since) and len(since) == 5
+
+
+def test_recent_leaves_the_shared_snapshot_untouched(client):
+    store = trades._trades_cache.snapshot
+    before = list(store.trades)
+
+    client.get("/api/trades/recent")
+    client.get("/api/trades/recent", params={"limit": 2})
+
+    assert list(store.trades) == before
+
+
+def test_trades_with_missing_fields_are_formatted(client):
+    trades_ = client.get("/api/trades/politician/Crenshaw").json()
+
+    missing = next(t for t in trades_ if t["ticker"] == "--")
+    assert (missing["type"], missing["amount"], missing["company"]) == ("sell", "Unknown", "Unknown Company")
+
+
+def test_batch_holdings_take_repeated_names(client):
+    body = client.get("/api/trades/holdings", params=[("names", "Pelosi, Nancy"), ("names", "Crenshaw")]).json()
+
+    assert list(body) == ["Pelosi, Nancy", "Crenshaw"]
+    assert {h["ticker"] for h in body["Pelosi, Nancy"]} == {"AAPL", "MSFT", "NVDA", "TSLA"}
+    assert body["Crenshaw"] == []  # Sold everything
+
+
+def test_holdings_limit_is_bounded(client):
+    assert client.get("/api/trades/holdings/Pelosi", params={"limit": 0}).status_code == 422
+    assert client.get("/api/trades/holdings", params={"limit": 1001}).status_code == 422
+    assert len(client.get("/api/trades/holdings/Pelosi", params={"limit": 2}).json()) == 2
+
+
+def test_refreshes_publish_only_unseen_trades(use_store):
+    before = use_store(RECORDS)
+    after = TradeStore(list(before.trades) + [dict(before.trades[0], trade_hash="new", ticker="AMD")])
+    subscription = trades._trade_events.subscribe(None)
+    try:
+        trades._publish_new_trades(None, before)
+        trades._publish_new_trades(before, before)
+        trades._publish_new_trades(before, after)
+
+        assert subscription.queue.qsize() == 1
+        event = subscription.queue.get_nowait()
+        assert event.startswith(b"id: new\nevent: trade\ndata: ") and event.endswith(b"\n\n")
+        assert json.loads(event.split(b"data: ", 1)[1])["ticker"] == "AMD"
+    finally:
+        trades._trade_events.unsubscribe(subscription)
+
+
+def test_stream_of_a_missing_portfolio(client):
+    assert client.get("/api/trades/stream", params={"portfolio_id": 999}).status_code == 404
+
+
+def test_conditional_get_is_a_304_until_the_snapshot_changes(client, use_store):
+    first = client.get("/api/trades/recent")
+    tag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == trades.CACHE_CONTROL
+
+    cached = client.get("/api/trades/recent", headers={"If-None-Match": tag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == tag
+
+    assert client.get("/api/trades/recent", headers={"If-None-Match": f'W/{tag}, "other"'}).status_code == 304
+    # Each distinct request has its own tag
+    assert client.get("/api/trades/recent?limit=2", headers={"If-None-Match": tag}).status_code == 200
+
+    use_store(RECORDS + [make_trade(20, ticker="AMD")])
+    refreshed = client.get("/api/trades/recent", headers={"If-None-Match": tag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != tag
+
+
+def test_pages_follow_the_next_cursor_header(client):
+    everything = client.get("/api/trades/politician/Pelosi, Nancy", params={"limit": 100}).json()
+    assert len(everything) == 5
+
+    pages, params = [], {"limit": 2}
+    while True:
+        response = client.get("/api/trades/politician/Nancy Pelosy", params=params)
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params = {"limit": 2, "cursor": cursor}
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [t for page in pages for t in page] == everything
+
+
+def test_filters(client):
+    aapl = client.get("/api/trades/politician/Pelosi", params={"ticker": "aapl"}).json()
+    assert [t["date"] for t in aapl] == ["2023-04-10", "2023-01-10"]
+
+    sells = client.get("/api/trades/recent", params={"type": "sell"}).json()
+    assert {t["person"] for t in sells} == {"Dan Crenshaw"}
+
+    assert client.get("/api/trades/recent", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/api/trades/recent", params={"type": "hold"}).status_code == 422
+
+
+def test_resolve_pins_names_to_representative_ids(client):
+    body = client.get("/api/trades/resolve/Pelosi, Nancy").json()
+
+    assert [m["name"] for m in body["matches"]] == ["Hon. Nancy Pelosi"]
+    assert body["identifier"] == f"representative:{body['matches'][0]['id']}"
+
+
+def test_stream_filters_match_resolved_names(use_store):
+    before = use_store(RECORDS)
+    after = TradeStore(list(before.trades) + [
+        dict(before.trades[0], trade_hash="new-pelosi", ticker="AMD"),
+        dict(before.trades[-1], trade_hash="new-crenshaw", ticker="CVX"),
+    ])
+    crenshaw_id = before.representative_ids["dan crenshaw"]
+    keys = [
+        frozenset({("Pelosi, Nancy", None)}),
+        frozenset({("Nancy Pelosy", None)}),
+        frozenset({("Someone Else", f"representative:{crenshaw_id}")}),
+        frozenset({("Nobody In Particular", None)}),
+        None,
+    ]
+    subscriptions = [trades._trade_events.subscribe(key) for key in keys]
+    try:
+        trades._publish_new_trades(before, after)
+        assert [s.queue.qsize() for s in subscriptions] == [1, 1, 1, 0, 2]
+    finally:
+        for subscription in subscriptions:
+            trades._trade_events.unsubscribe(subscription)
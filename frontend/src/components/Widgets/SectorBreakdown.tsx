@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react'
 import { PieChart, Pie, Cell, ResponsiveContainer, Tooltip } from 'recharts'
 import { Portfolio, SectorData } from '../../types'
+import { api } from '../../services/api'
 
 interface SectorBreakdownProps {
   portfolio: Portfolio
@@ -17,6 +18,12 @@ const SECTOR_COLORS: Record<string, string> = {
   Materials: '#00cec9',
   Utilities: '#fab1a0',
   'Real Estate': '#74b9ff',
+  'Financial Services': '#0984e3',
+  'Consumer Cyclical': '#e17055',
+  'Consumer Defensive': '#fd79a8',
+  'Communication Services': '#a29bfe',
+  Industrials: '#6c5ce7',
+  'Basic Materials': '#00cec9',
   Other: '#636e72',
 }
 
@@ -34,6 +41,25 @@ export default function SectorBreakdown({ portfolio, trackedNames }: SectorBreak
   const [sectors, setSectors] = useState<SectorData[]>(MOCK_SECTORS)
   const [activeIndex, setActiveIndex] = useState<number | null>(null)
 
+  useEffect(() => {
+    const fetchSectors = async () => {
+      try {
+        const data = await api.getPortfolioSectors(portfolio.id)
+        if (data.length > 0) {
+          setSectors(data.map((sector) => ({
+            name: sector.name,
+            value: sector.value,
+            color: SECTOR_COLORS[sector.name] ?? SECTOR_COLORS.Other,
+          })))
+        }
+      } catch (error) {
+        setSectors(MOCK_SECTORS)
+      }
+    }
+
+    fetchSectors()
+  }, [portfolio.id, trackedNames])
+
   const CustomTooltip = ({ active, payload }: any) => {
     if (active && payload && payload.length) {
       const data = payload[0].payload
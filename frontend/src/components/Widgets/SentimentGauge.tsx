@@ -53,7 +53,8 @@ export default function SentimentGauge({ portfolio, trackedNames }: SentimentGau
     )
   }
 
-  const getSentimentColor = (value: number) => {
+  const getSentimentColor = (value: number | null) => {
+    if (value === null) return 'text-text-muted'
     if (value >= 60) return 'text-positive'
     if (value <= 40) return 'text-negative'
     return 'text-warning'
@@ -71,7 +72,8 @@ export default function SentimentGauge({ portfolio, trackedNames }: SentimentGau
   }
 
   // Calculate gauge rotation (-90 to 90 degrees based on 0-100 value)
-  const rotation = ((sentiment.overall / 100) * 180) - 90
+  // Unscored sentiment points the needle at the middle
+  const rotation = (((sentiment.overall ?? 50) / 100) * 180) - 90
 
   return (
     <div className="h-full flex flex-col items-center justify-center">
@@ -99,7 +101,7 @@ export default function SentimentGauge({ portfolio, trackedNames }: SentimentGau
       {/* Score */}
       <div className="text-center">
         <div className={`text-3xl font-bold ${getSentimentColor(sentiment.overall)}`}>
-          {sentiment.overall}
+          {sentiment.overall ?? '—'}
         </div>
         <div className="flex items-center justify-center gap-1 text-text-secondary text-sm">
           {getTrendIcon()}
@@ -111,13 +113,13 @@ export default function SentimentGauge({ portfolio, trackedNames }: SentimentGau
       <div className="w-full grid grid-cols-2 gap-2 mt-4">
         <div className="bg-terminal-bg rounded p-2 text-center">
           <div className={`text-lg font-semibold ${getSentimentColor(sentiment.reddit)}`}>
-            {sentiment.reddit}
+            {sentiment.reddit ?? '—'}
           </div>
           <div className="text-xs text-text-muted">Reddit</div>
         </div>
         <div className="bg-terminal-bg rounded p-2 text-center">
           <div className={`text-lg font-semibold ${getSentimentColor(sentiment.news)}`}>
-            {sentiment.news}
+            {sentiment.news ?? '—'}
           </div>
           <div className="text-xs text-text-muted">News</div>
         </div>
@@ -1,4 +1,4 @@
-import { Portfolio, PortfolioFormData, Trade, Holding, SentimentData, NewsItem, RedditPost, ChartDataPoint } from '../types'
+import { Portfolio, PortfolioDashboard, PortfolioFormData, Trade, Holding, SentimentData, NewsItem, RedditPost, ChartDataPoint, BatchStockData, SectorExposure, TradeFilters, TradePage } from '../types'
 
 const API_BASE = '/api'
 
@@ -27,6 +27,15 @@ export const api = {
     return fetchApi<Portfolio>(`/portfolios/${id}`)
   },
 
+  async getPortfolioDashboard(id: number, tradeLimit?: number): Promise<PortfolioDashboard> {
+    const params = tradeLimit ? `?trade_limit=${tradeLimit}` : ''
+    return fetchApi<PortfolioDashboard>(`/portfolios/${id}/dashboard${params}`)
+  },
+
+  async getPortfolioSectors(id: number): Promise<SectorExposure[]> {
+    return fetchApi<SectorExposure[]>(`/portfolios/${id}/sectors`)
+  },
+
   async createPortfolio(data: PortfolioFormData): Promise<Portfolio> {
     return fetchApi<Portfolio>('/portfolios', {
       method: 'POST',
@@ -56,15 +65,49 @@ export const api = {
     return fetchApi<Trade[]>(`/trades/recent${params}`)
   },
 
+  // One page of trades for a person, or of recent trades when name is omitted
+  async getTradePage(filters: TradeFilters = {}, options: { name?: string; limit?: number; cursor?: string } = {}): Promise<TradePage> {
+    const params = new URLSearchParams()
+    for (const [key, value] of Object.entries(filters)) {
+      if (value !== undefined && value !== '') params.set(key, String(value))
+    }
+    if (options.limit) params.set('limit', String(options.limit))
+    if (options.cursor) params.set('cursor', options.cursor)
+    const path = options.name ? `/trades/politician/${encodeURIComponent(options.name)}` : '/trades/recent'
+    const response = await fetch(`${API_BASE}${path}?${params}`)
+    if (!response.ok) {
+      throw new Error(`API error: ${response.statusText}`)
+    }
+    return { trades: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') }
+  },
+
+  streamTrades(onTrade: (trade: Trade) => void, portfolioId?: number): () => void {
+    const params = portfolioId ? `?portfolio_id=${portfolioId}` : ''
+    const source = new EventSource(`${API_BASE}/trades/stream${params}`)
+    source.addEventListener('trade', (event) => onTrade(JSON.parse((event as MessageEvent).data)))
+    return () => source.close()
+  },
+
   async getHoldings(name: string): Promise<Holding[]> {
     return fetchApi<Holding[]>(`/trades/holdings/${encodeURIComponent(name)}`)
   },
 
+  async getSectors(name: string): Promise<SectorExposure[]> {
+    return fetchApi<SectorExposure[]>(`/trades/sectors/${encodeURIComponent(name)}`)
+  },
+
   async getStockData(symbol: string, period?: string): Promise<ChartDataPoint[]> {
     const params = period ? `?period=${period}` : ''
     return fetchApi<ChartDataPoint[]>(`/trades/stock/${symbol}${params}`)
   },
 
+  async getStocksData(symbols: string[], period?: string, points?: number): Promise<BatchStockData> {
+    const params = new URLSearchParams({ symbols: symbols.join(',') })
+    if (period) params.set('period', period)
+    if (points) params.set('points', String(points))
+    return fetchApi<BatchStockData>(`/trades/stocks?${params}`)
+  },
+
   // Sentiment
   async getSentiment(query: string): Promise<SentimentData> {
     return fetchApi<SentimentData>(`/sentiment/${encodeURIComponent(query)}`)
@@ -54,6 +54,21 @@ export interface Trade {
   filed_date: string;
 }
 
+export interface TradeFilters {
+  ticker?: string;
+  type?: 'buy' | 'sell';
+  owner?: string;
+  since?: string;  // YYYY-MM-DD
+  until?: string;
+  min_amount?: number;
+  max_amount?: number;
+}
+
+export interface TradePage {
+  trades: Trade[];
+  nextCursor: string | null;
+}
+
 // Holdings data
 export interface Holding {
   ticker: string;
@@ -66,9 +81,9 @@ export interface Holding {
 
 // Sentiment data
 export interface SentimentData {
-  overall: number; // -100 to 100
-  reddit: number;
-  news: number;
+  overall: number | null; // 0 to 100, null when nothing could be scored
+  reddit: number | null; // null while the source is unavailable
+  news: number | null;
   threads?: number;
   trend: 'up' | 'down' | 'neutral';
   mentions: number;
@@ -98,6 +113,18 @@ export interface RedditPost {
   sentiment: 'positive' | 'negative' | 'neutral';
 }
 
+// Combined per-person data for a portfolio dashboard
+export interface DashboardPerson extends TrackedPerson {
+  trades: Trade[];
+  holdings: Holding[];
+  sentiment: SentimentData;
+}
+
+export interface PortfolioDashboard {
+  portfolio: Portfolio;
+  people: DashboardPerson[];
+}
+
 // Stock chart data
 export interface ChartDataPoint {
   time: string;
@@ -108,6 +135,12 @@ export interface ChartDataPoint {
   volume?: number;
 }
 
+export interface BatchStockData {
+  period: string;
+  data: Record<string, ChartDataPoint[]>;
+  errors: Record<string, string>;
+}
+
 // Sector breakdown
 export interface SectorData {
   name: string;
@@ -115,6 +148,15 @@ export interface SectorData {
   color: string;
 }
 
+export interface SectorExposure {
+  name: string;
+  value: number;
+  value_low: number;
+  value_high: number;
+  value_mid: number;
+  holdings: number;
+}
+
 // Form data for creating portfolio
 export interface PortfolioFormData {
   name: string;